@@ -0,0 +1,213 @@
+# analytics.py
+# Rollup tables behind the admin dashboard's sales and stock panels, so the
+# dashboard reads a few hundred pre-aggregated rows instead of scanning
+# order_item on every view.
+#
+#   sales_daily         one row per (day, product): orders, units, revenue.
+#   order_daily         one row per day: orders, units, revenue. Kept apart
+#                       because an order spans several products, so daily
+#                       order counts can't be summed from sales_daily.
+#                       Both are maintained incrementally: order_queue adds an
+#                       order in the same transaction that confirms it, and
+#                       cancelling or deleting a confirmed order takes it
+#                       back out. rebuild() recomputes a date range from
+#                       scratch if they ever drift.
+#   inventory_snapshot  one row per product: stock plus units sold over the
+#                       last VELOCITY_DAYS, for low-stock alerts. Rows touched
+#                       by an order are refreshed with it; refresh_inventory()
+#                       (periodic, `flask refresh-analytics`) picks up
+#                       everything else, e.g. admin stock edits and imports.
+#
+# The day an order counts towards is the day it was placed (Order.created_at).
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import bindparam, text
+
+from extensions import db
+from models import Customer, Product, InventorySnapshot, OrderDaily, SalesDaily
+import keyset
+
+VELOCITY_DAYS = 7
+REFRESH_INTERVAL = 300  # seconds between background inventory refreshes
+
+# Statuses whose lines are in sales_daily: confirmed by order_queue and not
+# cancelled since.
+COUNTED = ('Pending', 'In Progress', 'Shipped', 'Delivered')
+
+_ORDER_LINES = (
+    "SELECT date(o.created_at), i.product_id, p.category, "
+    "       {sign} count(DISTINCT o.id), {sign} sum(i.quantity), {sign} sum(i.subtotal) "
+    "FROM \"order\" o JOIN order_item i ON i.order_id = o.id "
+    "LEFT JOIN product p ON p.id = i.product_id "
+    "WHERE o.created_at IS NOT NULL AND {where} "
+    "GROUP BY date(o.created_at), i.product_id"
+)
+_INSERT_SALES = "INSERT INTO sales_daily (day, product_id, category, orders, units, revenue) "
+
+_ADD_ORDERS = text(
+    _INSERT_SALES + _ORDER_LINES.format(sign=':sign *', where='o.id IN :order_ids') +
+    " ON CONFLICT (day, product_id) DO UPDATE SET"
+    " orders = orders + excluded.orders, units = units + excluded.units,"
+    " revenue = revenue + excluded.revenue, category = coalesce(excluded.category, category)"
+).bindparams(bindparam('order_ids', expanding=True))
+
+_REBUILD = text(
+    _INSERT_SALES + _ORDER_LINES.format(sign='', where='o.created_at >= :since AND o.status IN :statuses')
+).bindparams(bindparam('statuses', expanding=True))
+
+_ORDER_TOTALS = (
+    "INSERT INTO order_daily (day, orders, units, revenue) "
+    "SELECT date(o.created_at), {sign} count(DISTINCT o.id), "
+    "       {sign} coalesce(sum(i.quantity), 0), {sign} coalesce(sum(i.subtotal), 0) "
+    "FROM \"order\" o LEFT JOIN order_item i ON i.order_id = o.id "
+    "WHERE o.created_at IS NOT NULL AND {where} "
+    "GROUP BY date(o.created_at)"
+)
+_ADD_ORDER_TOTALS = text(
+    _ORDER_TOTALS.format(sign=':sign *', where='o.id IN :order_ids') +
+    " ON CONFLICT (day) DO UPDATE SET"
+    " orders = orders + excluded.orders, units = units + excluded.units,"
+    " revenue = revenue + excluded.revenue"
+).bindparams(bindparam('order_ids', expanding=True))
+_REBUILD_ORDER_TOTALS = text(
+    _ORDER_TOTALS.format(sign='', where='o.created_at >= :since AND o.status IN :statuses')
+).bindparams(bindparam('statuses', expanding=True))
+
+_SNAPSHOT = (
+    "INSERT OR REPLACE INTO inventory_snapshot "
+    "  (product_id, name, category, stock_quantity, units_sold, refreshed_at) "
+    "SELECT p.id, p.name, p.category, coalesce(p.stock_quantity, 0), "
+    "       coalesce((SELECT sum(s.units) FROM sales_daily s "
+    "                 WHERE s.product_id = p.id AND s.day >= :since), 0), :now "
+    "FROM product p"
+)
+_SNAPSHOT_ALL = text(_SNAPSHOT)
+_SNAPSHOT_FOR_ORDERS = text(
+    _SNAPSHOT + " WHERE p.id IN (SELECT product_id FROM order_item WHERE order_id IN :order_ids)"
+).bindparams(bindparam('order_ids', expanding=True))
+
+_last_refresh = 0.0
+_refresh_lock = threading.Lock()
+
+
+def init_app(app):
+    global REFRESH_INTERVAL
+    REFRESH_INTERVAL = app.config.setdefault('ANALYTICS_REFRESH_INTERVAL', REFRESH_INTERVAL)
+    app.config.setdefault('LOW_STOCK_THRESHOLD', 5)
+
+
+def _snapshot_params():
+    return {'since': (date.today() - timedelta(days=VELOCITY_DAYS)).isoformat(),
+            'now': datetime.utcnow().isoformat(' ')}
+
+
+def record_orders(order_ids, sign=1):
+    """Add (sign=1) or take back (sign=-1) orders' lines in sales_daily and
+    refresh the snapshot rows of their products.
+
+    Does not commit: call it in the transaction that changes the orders'
+    status, so the rollup moves exactly when the order does.
+    """
+    order_ids = list(order_ids)
+    if not order_ids:
+        return
+    params = {'order_ids': order_ids, 'sign': sign}
+    db.session.execute(_ADD_ORDERS, params)
+    db.session.execute(_ADD_ORDER_TOTALS, params)
+    if sign < 0:
+        SalesDaily.query.filter(SalesDaily.orders <= 0).delete(synchronize_session=False)
+        OrderDaily.query.filter(OrderDaily.orders <= 0).delete(synchronize_session=False)
+    db.session.execute(_SNAPSHOT_FOR_ORDERS, {'order_ids': order_ids, **_snapshot_params()})
+
+
+def status_changed(order_id, old, new):
+    """Keep sales_daily in step with an admin status change. Does not commit."""
+    if (old in COUNTED) != (new in COUNTED):
+        record_orders([order_id], 1 if new in COUNTED else -1)
+
+
+def rebuild(since=None):
+    """Recompute sales_daily and order_daily from `since` (a date; None =
+    everything) and refresh the whole inventory snapshot. Commits."""
+    since_key = since.isoformat() if since else '0000-01-01'
+    try:
+        params = {'since': since_key, 'statuses': list(COUNTED)}
+        SalesDaily.query.filter(SalesDaily.day >= (since or date.min)).delete(synchronize_session=False)
+        OrderDaily.query.filter(OrderDaily.day >= (since or date.min)).delete(synchronize_session=False)
+        db.session.execute(_REBUILD, params)
+        db.session.execute(_REBUILD_ORDER_TOTALS, params)
+        db.session.execute(_SNAPSHOT_ALL, _snapshot_params())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def refresh_inventory():
+    """Re-copy every product's stock into inventory_snapshot. Commits."""
+    global _last_refresh
+    try:
+        db.session.execute(_SNAPSHOT_ALL, _snapshot_params())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    _last_refresh = time.monotonic()
+
+
+def maybe_refresh(interval=None):
+    """refresh_inventory() at most once per interval per process."""
+    interval = REFRESH_INTERVAL if interval is None else interval
+    if time.monotonic() - _last_refresh < interval:
+        return False
+    if not _refresh_lock.acquire(blocking=False):
+        return False
+    try:
+        refresh_inventory()
+        return True
+    finally:
+        _refresh_lock.release()
+
+
+def summary(days=30, top=10, low_stock=5):
+    """Everything the dashboard panels show, read from the rollups."""
+    since = date.today() - timedelta(days=days - 1)
+    in_range = SalesDaily.day >= since
+    revenue = db.func.sum(SalesDaily.revenue)
+    units = db.func.sum(SalesDaily.units)
+
+    by_day = (db.session.query(OrderDaily.day, OrderDaily.orders, OrderDaily.units, OrderDaily.revenue)
+              .filter(OrderDaily.day >= since).order_by(OrderDaily.day).all())
+    top_products = (db.session.query(SalesDaily.product_id, InventorySnapshot.name, units, revenue)
+                    .outerjoin(InventorySnapshot, InventorySnapshot.product_id == SalesDaily.product_id)
+                    .filter(in_range).group_by(SalesDaily.product_id).having(units > 0)
+                    .order_by(revenue.desc()).limit(top).all())
+    by_category = (db.session.query(SalesDaily.category, units, revenue)
+                   .filter(in_range).group_by(SalesDaily.category).having(units > 0)
+                   .order_by(revenue.desc()).all())
+    low = (InventorySnapshot.query.filter(InventorySnapshot.stock_quantity <= low_stock)
+           .order_by(InventorySnapshot.stock_quantity, InventorySnapshot.product_id).all())
+
+    return {
+        'since': since.isoformat(),
+        'days': days,
+        'totals': {
+            'products': keyset.cached_count(('product',), Product.query),
+            'customers': keyset.cached_count(('customer',), Customer.query),
+            'orders': sum(row[1] for row in by_day),
+            'revenue': round(sum(row[3] for row in by_day), 2),
+        },
+        'revenue_by_day': [{'day': day.isoformat(), 'orders': orders, 'units': u, 'revenue': round(r, 2)}
+                           for day, orders, u, r in by_day],
+        'top_products': [{'product_id': pid, 'name': name, 'units': u, 'revenue': round(r, 2)}
+                         for pid, name, u, r in top_products],
+        'by_category': [{'category': category, 'units': u, 'revenue': round(r, 2)}
+                        for category, u, r in by_category],
+        'low_stock': [{'product_id': s.product_id, 'name': s.name, 'stock': s.stock_quantity,
+                       'recent_units': s.units_sold,
+                       'days_of_cover': round(s.stock_quantity / (s.units_sold / VELOCITY_DAYS), 1)
+                       if s.units_sold > 0 else None}
+                      for s in low],
+    }
@@ -1,100 +1,136 @@
+import json
 import os
 import random
-import sqlite3
 import string
-from datetime import timedelta
+import time
+from datetime import date, timedelta
 
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, make_response
-from flask_sqlalchemy import SQLAlchemy
+import click
+from flask import Flask, current_app, render_template, request, redirect, url_for, flash, jsonify, session, make_response
+from flask.cli import ScriptInfo
 from flask_cors import CORS
-from flask_bcrypt import Bcrypt
 from flask_jwt_extended import (
-    JWTManager, create_access_token, jwt_required,
-    verify_jwt_in_request, get_jwt, unset_jwt_cookies
+    JWTManager, create_access_token, jwt_required, unset_jwt_cookies
 )
 from flask_migrate import Migrate
-from sqlalchemy import text, asc, desc
+from sqlalchemy import asc, desc
 
 from extensions import db  # ✅ SQLAlchemy instance
 from models import Product, Customer, Order, User, OrderItem  # ✅ All models from models.py
+from pricing import price_cart
+from database import get_db
+import database
+import inventory
+from query_plans import resolve_product_sort
+import query_plans
+import fts
+import keyset
+from catalog_cache import catalog, featured_products, in_stock_products
+from page_cache import cached_page
+from assets import assets
+import assets as asset_pipeline
+from passwords import passwords, HasherBusy
+from identity import current_principal
+from cart_store import carts
+import order_queue
+import product_io
+import exports
+import order_history
+import analytics
+import identity
+import bootstrap
+import serve
+from metrics import metrics
+import slow_queries
+from routing import RouteTable
 
-print("Connected DB path:", os.path.abspath("users.db"))
-
-
-bcrypt = Bcrypt()
 jwt = JWTManager()
 migrate = Migrate()
 cors = CORS()
-
-app = Flask(__name__,
-            template_folder=os.path.join(os.path.dirname(__file__), '../templates'),
-            static_folder=os.path.join(os.path.dirname(__file__), '../static'))
+routes = RouteTable()  # registered on each app by create_app()
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
-# Configuration
-app.config['SECRET_KEY'] = 'super-secret'
-app.config['JWT_SECRET_KEY'] = 'super-secret'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'users.db')
-app.config['JWT_TOKEN_LOCATION'] = ['cookies']
-app.config['JWT_ACCESS_COOKIE_NAME'] = 'access_token_cookie'
-app.config['JWT_COOKIE_SECURE'] = False  # Change to True in prod
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)
-
-# Initialize extensions with app
-db.init_app(app)
-bcrypt.init_app(app)
-jwt.init_app(app)
-migrate.init_app(app, db)
-cors.init_app(app)
-
-if not os.path.exists('users.db'):
-    with app.app_context():
-        db.create_all()
-
-with app.app_context():
-    db.create_all()  # Create tables if not exist
-    print(Customer.query.all())
-    # Check if admin exists
-    admin_email = 'admin123@example.com'
-    admin_password = 'admin123'
-    existing_admin = User.query.filter_by(email=admin_email, role='admin').first()
-    if not existing_admin:
-        hashed_pw = bcrypt.generate_password_hash(admin_password).decode('utf-8')
-        admin = User(name='Admin', email=admin_email, password=hashed_pw, role='admin')
-        db.session.add(admin)
-        db.session.commit()
 
-@app.route('/')
+def create_app(config=None):
+    """Build a configured app. Touches no database: schema and the admin
+    account are set up once with `flask bootstrap`, not on every start."""
+    app = Flask(__name__,
+                template_folder=os.path.join(os.path.dirname(__file__), '../templates'),
+                static_folder=os.path.join(os.path.dirname(__file__), '../static'))
+
+    # Configuration
+    app.config['SECRET_KEY'] = 'super-secret'
+    app.config['JWT_SECRET_KEY'] = 'super-secret'
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+        'DATABASE_URL', 'sqlite:///' + os.path.join(basedir, 'users.db'))
+    app.config['JWT_TOKEN_LOCATION'] = ['cookies']
+    app.config['JWT_ACCESS_COOKIE_NAME'] = 'access_token_cookie'
+    app.config['JWT_COOKIE_SECURE'] = False  # Change to True in prod
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(database.POOL_OPTIONS)
+    app.config['SQLITE_PROFILE'] = os.environ.get('SQLITE_PROFILE', 'performance')  # see database.SQLITE_PROFILES
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)
+    app.config['CART_RESERVATION_TTL'] = timedelta(minutes=15)  # how long add-to-cart holds stock
+    app.config['CART_STORE'] = os.environ.get('CART_STORE', 'memory')  # 'sqlite' to share carts across workers
+    app.config['CATALOG_CACHE_BACKEND'] = os.environ.get('CATALOG_CACHE_BACKEND')  # Redis URL; needed for more than one worker
+    app.config['CART_TTL'] = timedelta(days=1)  # abandoned carts are swept after this
+    app.config['ORDER_WORKERS'] = int(os.environ.get('ORDER_WORKERS', 1))  # 0 = run `flask order-worker` separately
+    app.config['APP_ENV'] = os.environ.get('APP_ENV', 'production')  # picks the bcrypt cost, see passwords.ROUNDS_BY_ENV
+    app.config.update(config or {})
+
+    # Initialize extensions with app. None of these connect; the engine, the
+    # bcrypt pool and the order workers all start on first use.
+    db.init_app(app)
+    database.init_app(app)  # request-scoped raw connections + SQLite pragmas
+    passwords.init_app(app)  # bcrypt in a bounded process pool
+    jwt.init_app(app)
+    migrate.init_app(app, db, render_as_batch=True)  # SQLite can't ALTER most things
+    cors.init_app(app)
+    catalog.init_app(app)
+    assets.init_app(app)  # fingerprinted static URLs once `flask build-assets` has run
+    identity.init_app(app)
+    carts.init_app(app)  # server-side carts; the session only keeps the cart id
+    order_queue.workers.init_app(app)  # stock work for placed orders, off the request path
+    analytics.init_app(app)  # sales/stock rollups behind the dashboard panels
+    metrics.init_app(app)  # Server-Timing + /metrics; METRICS_SAMPLE_RATE for the breakdown
+    slow_queries.slow_queries.init_app(app)  # statements over SLOW_QUERY_MS, with their plans
+    routes.init_app(app)  # every view, error handler and command below
+    return app
+
+
+@routes.route('/')
+@cached_page
 def index():
-    user_name = None
-    try:
-        verify_jwt_in_request(optional=True)
-        claims = get_jwt()
-        user_name = claims.get('name')
-    except Exception as e:
-        featured_products = Product.query.limit(4).all()
-        return render_template('index.html', products=featured_products)
-
-    # ✅ Now also return the same for authenticated users
-    featured_products = Product.query.limit(4).all()
-    return render_template('index.html', products=featured_products, user_name=user_name)
+    # Name comes straight from the token claims; no user lookup.
+    return render_template('index.html', products=featured_products(),
+                           user_name=current_principal().name)
 
 
 
 
 
-DATABASE = os.path.join(os.path.dirname(__file__), 'users.db')
+def upgrade_password_hash(user, password):
+    """Re-hash at the current cost after a successful login, if it changed."""
+    if not passwords.needs_rehash(user.password):
+        return
+    user.password = passwords.hash(password)
+    db.session.commit()
 
-def get_db():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
 
+@routes.errorhandler(HasherBusy)
+def password_hasher_busy(e):
+    # Too many logins in flight; tell the client to back off rather than queue.
+    if request.is_json:
+        resp = jsonify({'msg': 'Server busy, please retry shortly'})
+    else:
+        resp = make_response(render_template('login.html', error="Server busy, please try again in a moment."))
+    resp.status_code = 429
+    resp.headers['Retry-After'] = '1'
+    return resp
 
 
-@app.route('/login', methods=['GET', 'POST'])
+@routes.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'GET':
         return render_template('login.html')
@@ -108,7 +144,8 @@ def login():
 
     if role == 'admin':
         user = User.query.filter_by(email=email, role='admin').first()
-        if user and bcrypt.check_password_hash(user.password, password):
+        if user and passwords.check(user.password, password):
+            upgrade_password_hash(user, password)
             token = create_access_token(
                 identity=user.email,  # must be a string
                 additional_claims={
@@ -122,7 +159,8 @@ def login():
         return render_template('login.html', error="Invalid admin credentials")
 
     user = User.query.filter_by(email=email, role='customer').first()
-    if user and bcrypt.check_password_hash(user.password, password):
+    if user and passwords.check(user.password, password):
+        upgrade_password_hash(user, password)
         token = create_access_token(
             identity=user.email,  # must be a string
             additional_claims={
@@ -138,35 +176,29 @@ def login():
 
 # routes/admin.py or your main app file
 
-@app.route('/register', methods=['GET'])
+@routes.route('/register', methods=['GET'])
 def register_form():
     return render_template('register.html')
 
 
 
-@app.route('/register', methods=['POST'])
+@routes.route('/register', methods=['POST'])
 def register():
     data = request.json
     email = data.get('email')
     name = data.get('name')
     password = data.get('password')
-    role = 'customer'  # Default to customer
-
     if not email or not name or not password:
         return jsonify({'msg': 'All fields are required'}), 400
 
-    hashed_pw = bcrypt.generate_password_hash(password).decode('utf-8')
+    hashed_pw = passwords.hash(password)
 
     try:
-        # Add to 'user' table
-        user = User(name=name, email=email, password=hashed_pw, role=role)
-        db.session.add(user)
-
-        # Also add to 'customer' table
-        customer = Customer(name=name, email=email, password=hashed_pw)
-        db.session.add(customer)
+        # One row in user; Customer sets role='customer' itself.
+        db.session.add(Customer(name=name, email=email, password=hashed_pw))
 
         db.session.commit()
+        keyset.forget_counts('customer')
         return jsonify({'msg': 'Customer registered successfully'}), 201
 
     except Exception as e:
@@ -176,52 +208,50 @@ def register():
         return jsonify({'msg': 'Registration failed'}), 500
 
 
-def debug_tables():
-    conn = get_db()
-    cur = conn.cursor()
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tables = cur.fetchall()
-    print("🛠 Available tables:", [t[0] for t in tables])
-
-# Call this after get_db()
-debug_tables()
-
-@app.route('/customer/dashboard')
+@routes.route('/customer/dashboard')
 def customer_dashboard():
-    db = get_db()
-    
-    # You might want to handle session-based login here if needed
-    user = db.execute("SELECT * FROM user WHERE email = ?", ("guest@example.com",)).fetchone()
-    
-    products = Product.query.filter(Product.stock_quantity > 0).all()
+    principal = current_principal()
+    if principal.is_customer:
+        user = principal  # name and email are all the template needs
+    else:
+        user = identity.load_user("guest@example.com")
+
+    products = in_stock_products()
     return render_template('customer_dashboard.html', user=user, products=products)
 
-@app.route("/explore")
+@routes.route("/explore")
+@cached_page
 def explore():
 
-    products = Product.query.filter(Product.stock_quantity > 0).all()
+    products = in_stock_products()
 
     return render_template("explore.html", products=products)
 
-@app.route('/update_profile', methods=['POST'])
+@routes.route('/update_profile', methods=['POST'])
 @jwt_required()
 def update_profile():
-    claims = get_jwt()
-    if claims['role'] != 'customer':
+    principal = current_principal()
+    if not principal.is_customer:
         return redirect('/login')
 
     name = request.form['name']
     db = get_db()
-    db.execute("UPDATE user SET name = ? WHERE email = ?", (name, claims['sub']))
+    db.execute("UPDATE user SET name = ? WHERE email = ?", (name, principal.sub))
     db.commit()
+    identity.forget_user(principal.sub)
     flash("Profile updated.")
-    return redirect(url_for('customer_dashboard'))
-
-@app.route('/change_password', methods=['POST'])
+    # The name lives in the token claims, so hand out a fresh one.
+    token = create_access_token(identity=principal.sub,
+                                additional_claims={'role': principal.role, 'name': name})
+    resp = make_response(redirect(url_for('customer_dashboard')))
+    resp.set_cookie('access_token_cookie', token, httponly=True)
+    return resp
+
+@routes.route('/change_password', methods=['POST'])
 @jwt_required()
 def change_password():
-    claims = get_jwt()
-    if claims['role'] != 'customer':
+    principal = current_principal()
+    if not principal.is_customer:
         return redirect('/login')
 
     current = request.form['current_password']
@@ -233,22 +263,24 @@ def change_password():
         return redirect(url_for('customer_dashboard'))
 
     db = get_db()
-    user = db.execute("SELECT * FROM user WHERE email = ?", (claims['sub'],)).fetchone()
+    # The one lookup auth still needs: the stored hash is never cached.
+    user = db.execute("SELECT password FROM user WHERE email = ?", (principal.sub,)).fetchone()
 
-    if not bcrypt.check_password_hash(user['password'], current):
+    if not passwords.check(user['password'], current):
         flash("Current password is incorrect.")
         return redirect(url_for('customer_dashboard'))
 
-    hashed = bcrypt.generate_password_hash(new).decode('utf-8')
-    db.execute("UPDATE user SET password = ? WHERE email = ?", (hashed, claims['sub']))
+    hashed = passwords.hash(new)
+    db.execute("UPDATE user SET password = ? WHERE email = ?", (hashed, principal.sub))
     db.commit()
+    identity.forget_user(principal.sub)
     flash("Password changed.")
     return redirect(url_for('customer_dashboard'))
 
 
-@app.route('/create-view_product-table')
+@routes.route('/create-view_product-table')
 def create_view_product_table():
-    conn = sqlite3.connect('users.db')
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS view_product (
@@ -260,14 +292,12 @@ def create_view_product_table():
         )
     ''')
     conn.commit()
-    conn.close()
     return "Products table created!"
 
 
-@app.route('/insert-test-view_product')
+@routes.route('/insert-test-view_product')
 def insert_test_view_product():
-    # conn = sqlite3.connect('backend/users.db')
-    conn = sqlite3.connect('users.db')
+    conn = get_db()
 
     cursor = conn.cursor()
     products = [
@@ -287,55 +317,52 @@ def insert_test_view_product():
         (14,'Salted Caramel Fudge Brownie', 'Rich and fudgy brownie with dark chocolate.', 400, 'static/SaltedCaramelBrownie_600x.webp'),
         (15,'Triple Chocolate Brownie', 'Rich and fudgy brownie with dark chocolate.', 420, 'static/TripleChocolateBrownie_600x.webp'),
     ]
-    for p in products:
-        try:
-            cursor.execute("INSERT INTO view_product (id, name, description, price, image) VALUES (?, ?, ?, ?, ?)", p)
-        except sqlite3.IntegrityError:
-            continue  # skip if already inserted
+    # One executemany; rows already present are skipped.
+    cursor.executemany("INSERT OR IGNORE INTO view_product (id, name, description, price, image) VALUES (?, ?, ?, ?, ?)",
+                       products)
     conn.commit()
-    conn.close()
+    catalog.invalidate()  # product_detail pages read view_product
     return "Test products inserted!"
 
-@app.route('/admin/products/test-insert')
+@routes.route('/admin/products/test-insert')
 def insert_test_products():
-    conn = sqlite3.connect('users.db')
+    conn = get_db()
     cursor = conn.cursor()
 
     product = [
-        (1, 'Dark Chocolate Brownie', 'Rich and fudgy brownie with dark chocolate.', 350, 'static/Fudgy_Dark_Chocolate.jpg','Brownies'),
-        (2, 'Fudge Brownie', 'Brownie with crunchy walnut pieces.', 400, 'static/featured_brownie.jpg','Brownies'),
-        (3, 'Nutty Delight', 'Fudgy brownie with caramel swirls.', 420, 'static/Almond_Flour_Chocolate_Brownies.jpg','Cakes'),
-        (4, 'Boozy Brownie Box', 'Brownie with a hint of rum.', 350, 'static/boozy_brownie.webp','Cakes'),
-        (5, 'Roasted Nuts Brownie', 'Brownie with roasted nuts.', 400, 'static/RoastedNutsBrownie.webp','Cakes'),
-        (6, 'Red Velvet Brownie', 'Brownie with red velvet.', 420, 'static/RedVelvetBrownie.webp','Brownies'),
-        (7, 'Choco Hazelnut Spread Brownie', 'Brownie with choco hazelnut spread.', 350, 'static/choco.jpg','Cakes'),
-        (8,'Eggless Choco Hazelnut Spread Brownie', 'Eggless brownie with choco hazelnut spread.', 400, 'static/EgglessChoco.webp','Brownies'),
-        (9,'Brownie Slab', 'Rich and fudgy brownie with dark chocolate.', 700, 'static/BrownieSlab.webp','Cakes'),
-        (10,'Choco Hazelnut Crunch', 'Rich and fudgy brownie with dark chocolate.', 1150, 'static/crunchhazelnut_600x.jpg','Cakes'),
-        (11,'Heart Unlock Brownie Cake', 'Rich and fudgy brownie with dark chocolate.',400, 'static/heartunlock_600x.jpg','Cakes'),
-        (12,'Nutty Professor Brownie', 'Rich and fudgy brownie with dark chocolate.', 420, 'static/nutty_600x.jpg','Brownies'),
-        (13,'Oreo Brownie', 'Rich and fudgy brownie with dark chocolate.', 350, 'static/OreoBrownie_600x.webp','Brownies'),
-        (14,'Salted Caramel Fudge Brownie', 'Rich and fudgy brownie with dark chocolate.', 400, 'static/SaltedCaramelBrownie_600x.webp','Brownies'),
-        (15,'Triple Chocolate Brownie', 'Rich and fudgy brownie with dark chocolate.', 420, 'static/TripleChocolateBrownie_600x.webp','Brownies'),
+        (1, 'Dark Chocolate Brownie', 'Rich and fudgy brownie with dark chocolate.', 350, 20, 'static/Fudgy_Dark_Chocolate.jpg','Brownies'),
+        (2, 'Fudge Brownie', 'Brownie with crunchy walnut pieces.', 400, 20, 'static/featured_brownie.jpg','Brownies'),
+        (3, 'Nutty Delight', 'Fudgy brownie with caramel swirls.', 420, 20, 'static/Almond_Flour_Chocolate_Brownies.jpg','Cakes'),
+        (4, 'Boozy Brownie Box', 'Brownie with a hint of rum.', 350, 20, 'static/boozy_brownie.webp','Cakes'),
+        (5, 'Roasted Nuts Brownie', 'Brownie with roasted nuts.', 400, 20, 'static/RoastedNutsBrownie.webp','Cakes'),
+        (6, 'Red Velvet Brownie', 'Brownie with red velvet.', 420, 20, 'static/RedVelvetBrownie.webp','Brownies'),
+        (7, 'Choco Hazelnut Spread Brownie', 'Brownie with choco hazelnut spread.', 350, 20, 'static/choco.jpg','Cakes'),
+        (8,'Eggless Choco Hazelnut Spread Brownie', 'Eggless brownie with choco hazelnut spread.', 400, 20, 'static/EgglessChoco.webp','Brownies'),
+        (9,'Brownie Slab', 'Rich and fudgy brownie with dark chocolate.', 700, 20, 'static/BrownieSlab.webp','Cakes'),
+        (10,'Choco Hazelnut Crunch', 'Rich and fudgy brownie with dark chocolate.', 1150, 20, 'static/crunchhazelnut_600x.jpg','Cakes'),
+        (11,'Heart Unlock Brownie Cake', 'Rich and fudgy brownie with dark chocolate.',400, 20, 'static/heartunlock_600x.jpg','Cakes'),
+        (12,'Nutty Professor Brownie', 'Rich and fudgy brownie with dark chocolate.', 420, 20, 'static/nutty_600x.jpg','Brownies'),
+        (13,'Oreo Brownie', 'Rich and fudgy brownie with dark chocolate.', 350, 20, 'static/OreoBrownie_600x.webp','Brownies'),
+        (14,'Salted Caramel Fudge Brownie', 'Rich and fudgy brownie with dark chocolate.', 400, 20, 'static/SaltedCaramelBrownie_600x.webp','Brownies'),
+        (15,'Triple Chocolate Brownie', 'Rich and fudgy brownie with dark chocolate.', 420, 20, 'static/TripleChocolateBrownie_600x.webp','Brownies'),
     ]
 
-    for p in product:
-        try:
-            cursor.execute("""
-                INSERT INTO product (id, name, description, price, stock_quantity, image_url, category)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, p)
-        except sqlite3.IntegrityError:
-            continue  # skip duplicates
+    # One executemany; rows already present are skipped. Bigger catalogs go
+    # through /admin/products/import or `flask import-products`.
+    cursor.executemany("""
+        INSERT OR IGNORE INTO product (id, name, description, price, stock_quantity, image_url, category)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, product)
 
     conn.commit()
-    conn.close()
+    keyset.forget_counts('product')
+    catalog.invalidate()
     return "Test products inserted!"
 
 
-@app.route('/create-product-table')
+@routes.route('/create-product-table')
 def create_products_table():
-    conn = sqlite3.connect('users.db')
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS product (
@@ -347,21 +374,18 @@ def create_products_table():
         )
     ''')
     conn.commit()
-    conn.close()
     return "Products table created!"
-create_products_table()
-
 
 
 
-@app.route('/product/<int:product_id>')
 
+@routes.route('/product/<int:product_id>')
+@cached_page
 def product_detail(product_id):
-    conn = sqlite3.connect('users.db')
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute("SELECT id, name, description, price, image FROM view_product WHERE id=?", (product_id,))
     row = cursor.fetchone()
-    conn.close()
 
     if row:
         product = {
@@ -377,18 +401,17 @@ def product_detail(product_id):
 
 
 
-@app.route('/debug-product')
+@routes.route('/debug-product')
 def debug_products():
-    conn = sqlite3.connect('users.db')
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM product")
     rows = cursor.fetchall()
-    conn.close()
-    return {"product": rows}
+    return {"product": [tuple(row) for row in rows]}
 
 
 # Add Product Route
-@app.route('/admin/product/add', methods=['POST'])
+@routes.route('/admin/product/add', methods=['POST'])
 def add_product():
     data = request.form
     name = data.get("name")
@@ -398,32 +421,31 @@ def add_product():
     image_url = data.get("image_url")
     category = data.get("category")
 
-    conn = sqlite3.connect('users.db')
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute('''
         INSERT INTO product (name, description, price, stock_quantity, image_url, category)
         VALUES (?, ?, ?, ?, ?, ?)
     ''', (name, description, price, stock_quantity, image_url, category))
     conn.commit()
-    conn.close()
+    keyset.forget_counts('product')
+    catalog.invalidate()
 
     flash('Product added successfully!', 'success')
     return redirect(url_for('admin_dashboard'))
-@app.route('/admin/dashboard')
+@routes.route('/admin/dashboard')
 def admin_dashboard():
-    page = request.args.get('page', 1, type=int)
     search = request.args.get('search', '')
     sort_by = request.args.get('sort', 'name')
     direction = request.args.get('direction', 'asc')
 
     query = Product.query
     if search:
-        query = query.filter(Product.name.ilike(f"%{search}%"))
-
-    column = getattr(Product, sort_by, Product.name)
-    query = query.order_by(column.desc() if direction == 'desc' else column.asc())
+        query, _ = fts.match_products(query, search)
 
-    pagination = query.paginate(page=page, per_page=10, error_out=False)
+    column = getattr(Product, resolve_product_sort(sort_by))
+    rows, next_cursor = keyset.paginate(query, column, Product.id,
+                                        request.args.get('cursor'), direction, limit=10)
 
     def serialize_product(product):
         return {
@@ -436,43 +458,52 @@ def admin_dashboard():
             "category": product.category
         }
 
-    products = [serialize_product(p) for p in pagination.items]
-    total_products = Product.query.count()
-    total_customers = Customer.query.count()
+    products = [serialize_product(p) for p in rows]
+    total_products = keyset.cached_count(('product',), Product.query)
+    total_customers = keyset.cached_count(('customer',), Customer.query)
+
+    customers, next_customer_cursor = keyset.paginate(
+        Customer.query, Customer.id, Customer.id, request.args.get('customer_cursor'), limit=50)
 
-    customers = Customer.query.all()  # or however you're loading customers
+    orders, next_order_cursor = order_history.summaries(
+        status=request.args.get('status'), customer=request.args.get('customer'),
+        cursor=request.args.get('order_cursor'))
 
     return render_template(
         'admin_dashboard.html',
         products=products,
-        pagination=pagination,
+        pagination=None,
+        next_cursor=next_cursor,
         search=search,
+        sort_by=sort_by,
+        direction=direction,
         customers=customers,
+        next_customer_cursor=next_customer_cursor,
         total_products=total_products,
-        total_customers=total_customers
+        total_customers=total_customers,
+        orders=orders,
+        next_order_cursor=next_order_cursor
 
     )
 
 
-@app.route('/admin/products/data')
+@routes.route('/admin/products/data')
 def get_products_data():
-    page = request.args.get('page', 1, type=int)
     search = request.args.get('search', '')
     sort_by = request.args.get('sort', 'name')
     direction = request.args.get('direction', 'asc')
+    cursor = request.args.get('cursor')
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
 
     query = Product.query
 
     if search:
-        query = query.filter(Product.name.ilike(f"%{search}%"))
+        query, _ = fts.match_products(query, search)
 
-    if direction == 'asc':
-        query = query.order_by(asc(getattr(Product, sort_by)))
-    else:
-        query = query.order_by(desc(getattr(Product, sort_by)))
+    column = getattr(Product, resolve_product_sort(sort_by))
+    products, next_cursor = keyset.paginate(query, column, Product.id, cursor, direction, limit)
+    total = keyset.cached_count(('product', search), query)
 
-    pagination = query.paginate(page=page, per_page=20)
-    
     return jsonify({
         'products': [{
             'id': p.id,
@@ -480,36 +511,41 @@ def get_products_data():
             'price': p.price,
             'stock_quantity': p.stock_quantity,
             'description': p.description
-        } for p in pagination.items],
-        'total_pages': pagination.pages,
-        'current_page': pagination.page
+        } for p in products],
+        'next_cursor': next_cursor,
+        'total': total,
+        'total_pages': -(-total // limit)
     })
 
 # Product List with Pagination, Search, and Sort
-@app.route('/admin/product')
+@routes.route('/admin/product')
 def admin_products():
     page = request.args.get('page', 1, type=int)
     search = request.args.get('search', '')
     sort_by = request.args.get('sort', 'name')
     direction = request.args.get('direction', 'asc')
 
-    customers = db.execute("SELECT * FROM user WHERE role = 'customer'").fetchall()
+    customers = get_db().execute("SELECT * FROM user WHERE role = 'customer'").fetchall()
 
     query = Product.query
+    rank = None
 
     if search:
-        query = query.filter(Product.name.ilike(f"%{search}%"))
+        query, rank = fts.match_products(query, search)
 
-    if direction == 'asc':
-        query = query.order_by(asc(getattr(Product, sort_by)))
+    column = getattr(Product, resolve_product_sort(sort_by))
+    if rank is not None and 'sort' not in request.args:
+        query = query.order_by(rank)  # best match first
+    elif direction == 'asc':
+        query = query.order_by(asc(column))
     else:
-        query = query.order_by(desc(getattr(Product, sort_by)))
+        query = query.order_by(desc(column))
 
     pagination = query.paginate(page=page, per_page=20)
     return render_template('admin_dashboard.html',customers=customers, products=pagination.items, pagination=pagination, search=search, sort_by=sort_by, direction=direction)
 
 
-@app.route('/admin/products/edit/<int:product_id>', methods=['POST'])
+@routes.route('/admin/products/edit/<int:product_id>', methods=['POST'])
 def edit_product(product_id):
     try:
         product = Product.query.get_or_404(product_id)
@@ -521,6 +557,7 @@ def edit_product(product_id):
         product.image_url = request.form.get('image_url', '')
 
         db.session.commit()
+        catalog.invalidate()
         return redirect('/admin')
     except Exception as e:
         db.session.rollback()
@@ -528,18 +565,62 @@ def edit_product(product_id):
 
 
 
+@routes.route('/admin/products/import', methods=['POST'])
+def import_products():
+    """Upsert products from a CSV or NDJSON upload (multipart 'file' or raw body)."""
+    if not current_principal().is_admin:
+        return jsonify({'msg': 'Admins only'}), 403
+    upload = request.files.get('file')
+    if upload is not None:
+        stream = upload.stream
+        fmt = request.args.get('format') or product_io.guess_format(upload.filename)
+    elif request.mimetype in ('text/csv', 'application/x-ndjson', 'application/jsonl'):
+        stream = request.stream
+        fmt = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+    else:
+        return jsonify({'msg': 'Send a CSV or NDJSON file'}), 400
+    if fmt not in product_io.FORMATS:
+        return jsonify({'msg': f'format must be one of {", ".join(product_io.FORMATS)}'}), 400
+
+    report = product_io.import_products(db.engine, stream, fmt)
+    if report.written:
+        keyset.forget_counts('product')
+        catalog.invalidate()
+    return jsonify(report.as_dict())
+
+
+@routes.route('/admin/products/export')
+def export_products():
+    """Stream the whole catalog as CSV (default) or NDJSON."""
+    if not current_principal().is_admin:
+        return jsonify({'msg': 'Admins only'}), 403
+    fmt = request.args.get('format', 'csv')
+    if fmt not in product_io.FORMATS:
+        return jsonify({'msg': f'format must be one of {", ".join(product_io.FORMATS)}'}), 400
+    engine = db.engine
+
+    def generate():
+        with engine.connect() as connection:
+            rows = product_io.export_rows(connection)
+            yield from exports.chunked(exports.render(rows, product_io.FIELDS, fmt))
+
+    return exports.response(generate(), 'products', fmt)
+
+
 # Delete Product
-@app.route('/admin/products/delete/<int:product_id>', methods=['POST'])
+@routes.route('/admin/products/delete/<int:product_id>', methods=['POST'])
 def delete_product(product_id):
     product = Product.query.get_or_404(product_id)
     db.session.delete(product)
     db.session.commit()
+    keyset.forget_counts('product')
+    catalog.invalidate()
     flash("Product deleted!", "info")
     return redirect(url_for('admin_products'))
 
 
 
-@app.route('/admin/customers')
+@routes.route('/admin/customers')
 def admin_customers():
     search = request.args.get('search', '')
     status_filter = request.args.get('status', 'all')
@@ -547,76 +628,205 @@ def admin_customers():
     query = Customer.query
 
     if search:
-        query = query.filter(
-            (Customer.name.ilike(f'%{search}%')) |
-            (Customer.email.ilike(f'%{search}%'))
-        )
+        query, rank = fts.match_customers(query, search)
+        if rank is not None:
+            query = query.order_by(rank)
 
     if status_filter != 'all':
         active_status = True if status_filter == 'active' else False
         query = query.filter(Customer.active == active_status)
 
-    customers = query.all()
-    return render_template('customers.html', customers=customers)
+    # A page at a time; the full list is what /admin/export/customers is for.
+    if search:
+        customers, next_cursor = query.limit(50).all(), None  # best matches first
+    else:
+        customers, next_cursor = keyset.paginate(query, Customer.id, Customer.id,
+                                                 request.args.get('cursor'), limit=50)
+    return render_template('customers.html', customers=customers, next_cursor=next_cursor)
+
+@routes.route('/admin/customers/data')
+def get_customers_data():
+    search = request.args.get('search', '')
+    status_filter = request.args.get('status', 'all')
+    cursor = request.args.get('cursor')
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+
+    query = Customer.query
+    if search:
+        query, _ = fts.match_customers(query, search)
+    if status_filter != 'all':
+        query = query.filter(Customer.active == (status_filter == 'active'))
+
+    customers, next_cursor = keyset.paginate(query, Customer.id, Customer.id, cursor, limit=limit)
+    total = keyset.cached_count(('customer', search, status_filter), query)
+
+    return jsonify({
+        'customers': [{
+            'id': c.id,
+            'name': c.name,
+            'email': c.email,
+            'active': c.active,
+            'created_at': c.created_at.isoformat() if c.created_at else None
+        } for c in customers],
+        'next_cursor': next_cursor,
+        'total': total
+    })
 
-@app.route('/admin/customer/<int:customer_id>')
+@routes.route('/admin/customer/<int:customer_id>')
 def view_customer(customer_id):
     customer = Customer.query.get_or_404(customer_id)
-    orders = Order.query.filter_by(customer_id=customer.id).all()
-    return render_template('customer_profile.html', customer=customer, orders=orders)
+    orders, next_cursor = order_history.summaries(customer_id=customer.id,
+                                                  cursor=request.args.get('cursor'), limit=50)
+    return render_template('customer_profile.html', customer=customer, orders=orders,
+                           next_cursor=next_cursor)
 
-@app.route('/admin/customer/toggle/<int:customer_id>')
+@routes.route('/admin/customer/toggle/<int:customer_id>')
 def toggle_customer_status(customer_id):
     customer = Customer.query.get_or_404(customer_id)
     customer.active = not customer.active
     db.session.commit()
     return redirect(url_for('admin_customers'))
 
-@app.route('/admin/customer/delete/<int:customer_id>', methods=['POST'])
+@routes.route('/admin/customer/delete/<int:customer_id>', methods=['POST'])
 def delete_customer(customer_id):
     customer = Customer.query.get_or_404(customer_id)
     db.session.delete(customer)
     db.session.commit()
+    keyset.forget_counts('customer')
     flash('Customer deleted successfully.')
     return redirect(url_for('admin_customers'))
 
-@app.route('/admin/customer/reset_password/<int:customer_id>', methods=['POST'])
+@routes.route('/admin/customer/reset_password/<int:customer_id>', methods=['POST'])
 def reset_password(customer_id):
     customer = Customer.query.get_or_404(customer_id)
     temp_password = ''.join(random.choices(string.ascii_letters + string.digits, k=8))
-    hashed = bcrypt.generate_password_hash(temp_password).decode('utf-8')
+    hashed = passwords.hash(temp_password)
     customer.password = hashed
     db.session.commit()
     flash(f"Temporary password: {temp_password}")
     return redirect(url_for('view_customer', customer_id=customer_id))
 
-@app.route('/admin/customer/impersonate/<int:customer_id>')
+@routes.route('/admin/customer/impersonate/<int:customer_id>')
 def impersonate_customer(customer_id):
     customer = Customer.query.get_or_404(customer_id)
     session['impersonated_customer_id'] = customer.id
     session['original_admin'] = True
     return redirect('/customer/dashboard')  # Assume you have customer dashboard
 
-@app.route('/admin/stop_impersonation')
+@routes.route('/admin/stop_impersonation')
 def stop_impersonation():
     session.pop('impersonated_customer_id', None)
     session.pop('original_admin', None)
     return redirect('/admin/dashboard')
 
 
-@app.route('/admin/orders')
+@routes.route('/admin/orders')
 def admin_orders():
-    orders = Order.query.all()  # Assuming you have an Order model
     return render_template('orders.html')
 
-@app.route('/logout')
+@routes.route('/admin/orders/data')
+def admin_orders_data():
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    orders, next_cursor = order_history.summaries(
+        status=request.args.get('status'), customer=request.args.get('customer'),
+        cursor=request.args.get('cursor'), limit=limit)
+    return jsonify({'orders': [order_history.summary_json(o) for o in orders],
+                    'next_cursor': next_cursor})
+
+@routes.route('/admin/orders/<int:order_id>/data')
+def admin_order_data(order_id):
+    order = order_history.detail(order_id)
+    if order is None:
+        return jsonify({'msg': 'Order not found'}), 404
+    return jsonify(order_history.detail_json(order))
+
+@routes.route('/admin/orders/<int:order_id>')
+def view_order(order_id):
+    order = order_history.detail(order_id)
+    if order is None:
+        return "Order not found", 404
+    return render_template('order_detail.html', order=order, statuses=order_history.STATUSES)
+
+@routes.route('/admin/orders/<int:order_id>/update', methods=['GET', 'POST'])
+def update_order(order_id):
+    if request.method == 'POST':
+        order = db.get_or_404(Order, order_id)
+        try:
+            order_history.set_status(order, request.form['status'])
+        except KeyError:
+            flash("Pick a valid status.", "error")
+        except ValueError as e:
+            flash(str(e), "error")
+        else:
+            db.session.commit()
+            flash(f"Order #{order_id} is now {order.status}.", "success")
+    return redirect(url_for('view_order', order_id=order_id))
+
+@routes.route('/admin/orders/<int:order_id>/delete', methods=['POST'])
+def delete_order(order_id):
+    order = db.get_or_404(Order, order_id)
+    order_history.delete(order)
+    db.session.commit()
+    flash(f"Order #{order_id} deleted.", "success")
+    return redirect(url_for('admin_dashboard') + '#orders')
+
+@routes.route('/admin/analytics')
+def admin_analytics():
+    if not current_principal().is_admin:
+        return jsonify({'msg': 'Admins only'}), 403
+    days = min(max(request.args.get('days', 30, type=int), 1), 366)
+    data = analytics.summary(days=days, low_stock=current_app.config['LOW_STOCK_THRESHOLD'])
+    response = jsonify(data)
+    # Rollups only move when an order is confirmed; a short private cache keeps
+    # a polling dashboard from re-reading them on every tick.
+    response.headers['Cache-Control'] = 'private, max-age=15'
+    return response
+
+@routes.route('/admin/export/<dataset>')
+def admin_export(dataset):
+    """Stream customers, orders or order_items as CSV (default) or NDJSON."""
+    if not current_principal().is_admin:
+        return jsonify({'msg': 'Admins only'}), 403
+    fmt = request.args.get('format', 'csv')
+    if dataset not in exports.DATASETS:
+        return jsonify({'msg': f'Unknown dataset {dataset!r}'}), 404
+    if fmt not in exports.FORMATS:
+        return jsonify({'msg': f'format must be one of {", ".join(exports.FORMATS)}'}), 400
+    return exports.response(exports.write_dataset(db.engine, dataset, fmt), dataset, fmt)
+
+@routes.route('/admin/cache/stats')
+def cache_stats():
+    return jsonify(catalog.stats())
+
+@routes.route('/admin/db/pool')
+def db_pool_metrics():
+    return jsonify(database.pool_status())
+
+@routes.route('/admin/slow-queries')
+def slow_query_log():
+    if not current_principal().is_admin:
+        return jsonify({'msg': 'Admins only'}), 403
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 1000)
+    entries = slow_queries.slow_queries.entries()
+    return jsonify({
+        'threshold_ms': current_app.config['SLOW_QUERY_MS'],
+        'summary': slow_queries.summarize(entries),
+        'entries': entries[:limit],
+    })
+
+@routes.route('/metrics')
+def prometheus_metrics():
+    # Scraped per process; see metrics.py.
+    return current_app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@routes.route('/logout')
 def logout():
     response = make_response(redirect(url_for('index')))  # Redirect to homepage or wherever you want
     unset_jwt_cookies(response)  # Clear the JWT cookies
     return response
 
 
-@app.route('/admin/settings', methods=['GET', 'POST'])
+@routes.route('/admin/settings', methods=['GET', 'POST'])
 def admin_settings():
     if request.method == 'POST':
         html_content = request.form.get('editor_html')
@@ -626,84 +836,376 @@ def admin_settings():
 
     return render_template('settings.html')
 
-@app.route('/place-order', methods=['POST'])
+@routes.route('/place-order', methods=['POST'])
 def place_order():
     email = request.form['email']
     name = request.form['name']
 
-    cart = session.get('cart', {})  # {'1': 2, '3': 1}
-    total = 0
-    order_items = []
-
-    for product_id, quantity in cart.items():
-        product = Product.query.get(int(product_id))
-        subtotal = product.price * quantity
-        total += subtotal
-        order_items.append((product.id, quantity, subtotal))
-
-    # Check if customer exists
-    customer = Customer.query.filter_by(email=email).first()
-    if not customer:
-        # Provide a default password
-        customer = Customer(email=email, name=name, password='guest', active=True)
-        db.session.add(customer)
-        db.session.commit()
-
-    # Create order with customer_id
-    order = Order(customer_id=customer.id, status="Pending")
-    db.session.add(order)
-    db.session.commit()
+    cart_id = carts.current_id()
+    quote = price_cart(carts.lines(cart_id))
 
-    # Add order items
-    for pid, qty, sub in order_items:
-        item = OrderItem(order_id=order.id, product_id=pid, quantity=qty, subtotal=sub)
-        db.session.add(item)
+    if not quote['items']:
+        flash("Your cart is empty.", "error")
+        return redirect(url_for('checkout'))
 
-        product = Product.query.get(pid)
-        product.stock_quantity -= qty
+    # Emails are unique across every account, admins included.
+    customer = User.query.filter_by(email=email).first()
+    if customer is not None and customer.role != 'customer':
+        flash("That email belongs to a staff account; use another one to order.", "error")
+        return redirect(url_for('checkout'))
 
-    db.session.commit()
+    # Customer, order, items and the outbox row go in one commit; the stock
+    # is reconciled by order_queue's workers.
+    try:
+        if not customer:
+            # Provide a default password
+            customer = Customer(email=email, name=name, password='guest', active=True)
+            db.session.add(customer)
+            db.session.flush()
+
+        # Create order with customer_id and the totals the customer was quoted
+        order = Order(customer_id=customer.id, status=order_queue.QUEUED,
+                      item_count=len(quote['items']), subtotal=quote['total'],
+                      discount=quote['discount'], tax=quote['tax'],
+                      grand_total=quote['grand_total'])
+        db.session.add(order)
+        db.session.flush()
+
+        # Add order items
+        lines = []
+        for line in quote['items']:
+            product = line['product']
+            item = OrderItem(order_id=order.id, product_id=product.id, quantity=line['quantity'],
+                             unit_price=line['unit_price'], subtotal=line['subtotal'])
+            db.session.add(item)
+            lines.append((product.id, line['quantity']))
+
+        order_queue.enqueue(order, lines, cart_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
 
+    order_queue.workers.wake()
+    carts.discard()
+    # Order ids are sequential; payment and status only answer for this one.
+    session['placed_order_id'] = order.id
     flash("Order placed successfully!", "success")
-    return redirect(url_for('payment'))
+    return redirect(url_for('payment', order_id=order.id))
 
+@routes.route('/orders/<int:order_id>/status')
+def order_status(order_id):
+    """Polled by the payment page while the order waits in the queue."""
+    if order_id != session.get('placed_order_id'):
+        return jsonify({'msg': 'Order not found'}), 404
+    status = db.session.query(Order.status).filter_by(id=order_id).scalar()
+    if status is None:
+        return jsonify({'msg': 'Order not found'}), 404
+    return jsonify({'order_id': order_id, 'status': status,
+                    'processed': status != order_queue.QUEUED})
 
 
-@app.route('/add-to-cart/<int:product_id>')
+
+@routes.route('/add-to-cart/<int:product_id>')
 def add_to_cart(product_id):
-    cart = session.get('cart', {})
+    cart_id = carts.current_id(create=True)
+    inventory.maybe_release_expired()
+    carts.maybe_sweep()
 
-    if str(product_id) in cart:
-        cart[str(product_id)] += 1
-    else:
-        cart[str(product_id)] = 1
+    try:
+        inventory.reserve(cart_id, product_id, 1, current_app.config['CART_RESERVATION_TTL'])
+    except inventory.OutOfStock:
+        flash("Sorry, that brownie just sold out.", "error")
+        return redirect(url_for('checkout'))
 
-    session['cart'] = cart
+    carts.add(product_id, 1)
     return redirect(url_for('checkout'))
 
-@app.route('/checkout')
+@routes.route('/checkout')
 def checkout():
-    cart = session.get('cart', {})
-    items = []
-    total = 0
+    quote = price_cart(carts.lines())
+    return render_template('card.html', **quote)
 
-    for pid_str, qty in cart.items():
-        product = Product.query.get(int(pid_str))
-        subtotal = product.price * qty
-        items.append({'product': product, 'quantity': qty, 'subtotal': subtotal})
-        total += subtotal
 
-    discount = 0
-    tax = round(0.05 * total, 2)
-    grand_total = total - discount + tax
+# JSON cart API: the same cart as /add-to-cart and /checkout, one line at a time.
+
+def cart_json():
+    quote = price_cart(carts.lines())
+    return {
+        'items': [{'product_id': line['product'].id, 'name': line['product'].name,
+                   'price': line['product'].price, 'quantity': line['quantity'],
+                   'subtotal': line['subtotal']} for line in quote['items']],
+        'total': quote['total'],
+        'discount': quote['discount'],
+        'tax': quote['tax'],
+        'grand_total': quote['grand_total'],
+    }
+
+
+def set_cart_line(product_id, quantity):
+    """Move a line to quantity, reserving or releasing only the difference."""
+    cart_id = carts.current_id(create=True)
+    delta = quantity - carts.lines(cart_id).get(product_id, 0)
+    if delta > 0:
+        inventory.reserve(cart_id, product_id, delta, current_app.config['CART_RESERVATION_TTL'])
+    elif delta < 0:
+        inventory.release(cart_id, product_id, -delta)
+    carts.set(product_id, quantity)
+
+
+def requested_quantity(data, minimum):
+    try:
+        quantity = int(data.get('quantity', 1))
+    except (TypeError, ValueError):
+        return None
+    return quantity if quantity >= minimum else None
 
-    return render_template('card.html', items=items, total=total, discount=discount, tax=tax, grand_total=grand_total)
 
-@app.route('/payment')
+@routes.route('/api/cart')
+def cart_api():
+    return jsonify(cart_json())
+
+@routes.route('/api/cart/items', methods=['POST'])
+def cart_add_item():
+    data = request.get_json(silent=True) or {}
+    quantity = requested_quantity(data, minimum=1)
+    try:
+        product_id = int(data['product_id'])
+    except (KeyError, TypeError, ValueError):
+        product_id = None
+    if product_id is None or quantity is None:
+        return jsonify({'msg': 'product_id and a positive quantity are required'}), 400
+
+    carts.maybe_sweep()
+    try:
+        inventory.reserve(carts.current_id(create=True), product_id, quantity,
+                          current_app.config['CART_RESERVATION_TTL'])
+    except inventory.OutOfStock:
+        return jsonify({'msg': 'Not enough stock', 'product_id': product_id}), 409
+    carts.add(product_id, quantity)
+    return jsonify(cart_json())
+
+@routes.route('/api/cart/items/<int:product_id>', methods=['PUT', 'DELETE'])
+def cart_update_item(product_id):
+    if request.method == 'DELETE':
+        quantity = 0
+    else:
+        quantity = requested_quantity(request.get_json(silent=True) or {}, minimum=0)
+        if quantity is None:
+            return jsonify({'msg': 'quantity must be a non-negative integer'}), 400
+    try:
+        set_cart_line(product_id, quantity)
+    except inventory.OutOfStock:
+        return jsonify({'msg': 'Not enough stock', 'product_id': product_id}), 409
+    return jsonify(cart_json())
+
+@routes.route('/payment')
 def payment():
-    return render_template('payment.html')
+    order_id = request.args.get('order_id', type=int)
+    placed = order_id is not None and order_id == session.get('placed_order_id')
+    order = db.session.get(Order, order_id) if placed else None
+    return render_template('payment.html', order=order,
+                           customer_name=order.customer.name if order and order.customer else None)
+
+
+@routes.command('release-reservations')
+def release_reservations_command():
+    """Return stock held by expired cart reservations."""
+    released = inventory.release_expired()
+    print(f"Released {released} expired reservation(s).")
+
+
+@routes.command('sweep-carts')
+def sweep_carts_command():
+    """Delete carts nobody has touched for CART_TTL."""
+    swept = carts.sweep()
+    print(f"Swept {swept} abandoned cart(s).")
+
+
+@routes.command('order-worker')
+@click.option('--workers', default=4, show_default=True, help='Worker threads.')
+@click.option('--once', is_flag=True, help='Drain the queue and exit.')
+def order_worker_command(workers, once):
+    """Process queued orders (stock, status, notifications)."""
+    if once:
+        print(f"Processed {order_queue.workers.drain()} queued order(s).")
+        return
+    order_queue.workers.start(workers)
+    print(f"{workers} order worker(s) running; Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        order_queue.workers.stop()
+
+
+@routes.command('refresh-analytics')
+@click.option('--rebuild-days', type=int, help='Also recompute sales_daily for the last N days.')
+@click.option('--rebuild-all', is_flag=True, help='Recompute sales_daily from every order.')
+def refresh_analytics_command(rebuild_days, rebuild_all):
+    """Refresh the inventory snapshot; optionally rebuild the sales rollup. Cron-friendly."""
+    if rebuild_all or rebuild_days:
+        since = None if rebuild_all else date.today() - timedelta(days=rebuild_days - 1)
+        analytics.rebuild(since)
+        print(f"Rebuilt sales_daily since {since or 'the first order'}.")
+    else:
+        analytics.refresh_inventory()
+    print("Inventory snapshot refreshed.")
+
+
+@routes.command('import-products')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(product_io.FORMATS), help='Default: from the extension.')
+@click.option('--chunk-size', default=product_io.CHUNK_SIZE, show_default=True, help='Rows per transaction.')
+def import_products_command(path, fmt, chunk_size):
+    """Upsert products from a CSV or NDJSON file."""
+    with open(path, 'rb') as stream:
+        report = product_io.import_products(db.engine, stream, fmt or product_io.guess_format(path), chunk_size)
+    if report.written:
+        keyset.forget_counts('product')
+        catalog.invalidate()
+    print(f"{report.rows} row(s) read, {report.written} written, {report.failed} failed.")
+    for error in report.errors[:20]:
+        print(f"  line {error['line']}: {error['error']}")
+    if report.failed > 20:
+        print(f"  ... and {report.failed - 20} more")
+
+
+@routes.command('export-products')
+@click.option('--format', 'fmt', type=click.Choice(product_io.FORMATS), default='csv', show_default=True)
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='Default: stdout.')
+def export_products_command(fmt, output):
+    """Write the catalog as CSV or NDJSON without loading it all into memory."""
+    with db.engine.connect() as connection:
+        rows = product_io.export_rows(connection)
+        for chunk in exports.chunked(exports.render(rows, product_io.FIELDS, fmt)):
+            output.write(chunk)
+
+
+@routes.command('export-data')
+@click.argument('dataset', type=click.Choice(sorted(exports.DATASETS)))
+@click.option('--format', 'fmt', type=click.Choice(exports.FORMATS), default='csv', show_default=True)
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='Default: stdout.')
+def export_data_command(dataset, fmt, output):
+    """Stream customers, orders or order_items as CSV or NDJSON."""
+    for chunk in exports.write_dataset(db.engine, dataset, fmt):
+        output.write(chunk)
+
+
+@routes.command('slow-queries')
+@click.option('--summary', is_flag=True, help='One line per fingerprint instead of every entry.')
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='Default: stdout.')
+def slow_queries_command(summary, output):
+    """Dump SLOW_QUERY_LOG_FILE (rotated files included) as NDJSON."""
+    entries = slow_queries.slow_queries.read_files()
+    for entry in slow_queries.summarize(entries) if summary else entries:
+        output.write(json.dumps(entry) + '\n')
+
+
+@routes.command('init-db')
+def init_db_command():
+    """Create the schema on an empty database, or migrate an existing one."""
+    print(f"Schema {bootstrap.init_schema()}: {db.engine.url}")
+
+
+admin_options = [
+    click.option('--email', default=bootstrap.DEFAULT_ADMIN_EMAIL, show_default=True, envvar='ADMIN_EMAIL'),
+    click.option('--password', default=bootstrap.DEFAULT_ADMIN_PASSWORD, envvar='ADMIN_PASSWORD',
+                 help='Default: the development password. Set ADMIN_PASSWORD in production.'),
+]
+
+
+def with_admin_options(command):
+    for option in reversed(admin_options):
+        command = option(command)
+    return command
+
+
+@routes.command('seed-admin')
+@with_admin_options
+def seed_admin_command(email, password):
+    """Create the admin account if it doesn't exist yet."""
+    created = bootstrap.seed_admin(email, password)
+    print(f"Admin {email} {'created' if created else 'already exists'}.")
+
+
+@routes.command('bootstrap')
+@with_admin_options
+@click.pass_context
+def bootstrap_command(ctx, email, password):
+    """One-time setup for a new deployment: init-db, then seed-admin."""
+    ctx.invoke(init_db_command)
+    ctx.invoke(seed_admin_command, email=email, password=password)
+
+
+@routes.command('serve', with_appcontext=False)
+@click.option('--bind', default='127.0.0.1:8000', show_default=True, envvar='BIND')
+@click.option('--workers', type=int, help='Processes. Default: 2 x CPUs + 1, or WEB_CONCURRENCY.')
+@click.option('--threads', type=int, help='Threads per process. Default: 2 x CPUs up to 8, or WEB_THREADS.')
+@click.option('--max-requests', default=serve.MAX_REQUESTS, show_default=True,
+              help='Recycle a worker after this many requests (0 = never).')
+@click.option('--graceful-timeout', default=serve.GRACEFUL_TIMEOUT, show_default=True,
+              help='Seconds a stopping worker gets to finish in-flight requests.')
+@click.option('--access-log', is_flag=True, help='Log every request to stdout.')
+@click.pass_context
+def serve_command(ctx, bind, workers, threads, max_requests, graceful_timeout, access_log):
+    """Run the production server: pre-forked gunicorn workers with threads."""
+    try:
+        # No app context here: gunicorn forks from this process.
+        app = ctx.ensure_object(ScriptInfo).load_app()
+        workers = workers or serve.default_workers()
+        for warning in serve.prepare(app, workers):
+            click.secho(f"WARNING: {warning}", fg='yellow', err=True)
+        serve.run(app, bind=bind, workers=workers, threads=threads, max_requests=max_requests,
+                  graceful_timeout=graceful_timeout, access_log=access_log)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+
+@routes.command('check-query-plans')
+@click.option('--live', is_flag=True, help='Explain against users.db instead of a scratch schema.')
+def check_query_plans_command(live):
+    """EXPLAIN QUERY PLAN the hot queries; exit 1 on a full scan or temp sort."""
+    failed = False
+    for label, plan, problems in query_plans.check_all(live=live):
+        status = 'FAIL' if problems else 'ok'
+        print(f"[{status}] {label}: {' | '.join(plan)}")
+        for problem in problems:
+            print(f"       {problem}")
+        failed = failed or bool(problems)
+    if failed:
+        raise SystemExit(1)
+
+
+@routes.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Re-index product_fts and customer_fts from their content tables."""
+    with db.engine.begin() as connection:
+        fts.rebuild(connection)
+    print("Search index rebuilt.")
+
+
+@routes.command('build-assets')
+@click.option('--quality', default=80, show_default=True, help='WebP/AVIF quality.')
+def build_assets_command(quality):
+    """Write resized WebP/AVIF variants and a hashed manifest into static/dist/."""
+    manifest = asset_pipeline.build(current_app.static_folder, quality=quality)
+    before = after = 0
+    for name, entry in manifest.items():
+        before += os.path.getsize(os.path.join(current_app.static_folder, name))
+        smallest = min(entry['webp'].values(), key=lambda f: os.path.getsize(os.path.join(current_app.static_folder, f)))
+        after += os.path.getsize(os.path.join(current_app.static_folder, smallest))
+    print(f"Built {len(manifest)} images: {before // 1024} KB of originals, "
+          f"{after // 1024} KB at the smallest WebP width.")
+
+
+app = create_app()
 
 
 if __name__ == '__main__':
-    
+    # `python app.py` is the dev server (production: `flask serve`); it sets
+    # up a fresh checkout on the way.
+    with app.app_context():
+        bootstrap.init_schema()
+        bootstrap.seed_admin()
     app.run(debug=True)
@@ -0,0 +1,138 @@
+# assets.py
+# Static image pipeline. `flask build-assets` writes resized WebP/AVIF
+# derivatives and a content-hashed copy of every image into static/dist/, plus
+# a manifest.json mapping original names to the generated files. At runtime the
+# manifest drives fingerprinted URLs (served with a one-year immutable
+# Cache-Control) and srcset strings for the templates. Without a manifest
+# everything falls back to the plain /static/ URLs.
+#
+# The manifest is read once at startup; restart the workers after a rebuild.
+import hashlib
+import json
+import os
+
+from flask import request, url_for
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+WIDTHS = (320, 480, 768, 1200)
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def _write_fingerprinted(dist, stem, ext, data):
+    name = f'{stem}.{_digest(data)}{ext}'
+    path = os.path.join(dist, name)
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(data)
+    return f'{DIST_DIR}/{name}'
+
+
+def build(static_folder, widths=WIDTHS, quality=80):
+    """Generate derivatives for every image in static_folder. Returns the manifest."""
+    try:
+        from io import BytesIO
+        from PIL import Image, features
+    except ImportError as e:
+        raise RuntimeError("build-assets needs Pillow: pip install Pillow") from e
+
+    formats = ['webp'] + (['avif'] if features.check('avif') else [])
+    dist = os.path.join(static_folder, DIST_DIR)
+    os.makedirs(dist, exist_ok=True)
+    manifest = {}
+
+    for filename in sorted(os.listdir(static_folder)):
+        stem, ext = os.path.splitext(filename)
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+        with open(os.path.join(static_folder, filename), 'rb') as f:
+            original = f.read()
+
+        entry = {'original': _write_fingerprinted(dist, stem, ext.lower(), original)}
+        with Image.open(BytesIO(original)) as image:
+            image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+            entry['width'] = image.width
+            # Always emit at least one variant, even for images narrower than WIDTHS[0].
+            targets = [w for w in widths if w < image.width] + [image.width]
+            for fmt in formats:
+                entry[fmt] = {}
+                for width in targets:
+                    height = round(image.height * width / image.width)
+                    resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                    out = BytesIO()
+                    resized.save(out, fmt.upper(), quality=quality)
+                    entry[fmt][str(width)] = _write_fingerprinted(dist, f'{stem}-{width}w', f'.{fmt}', out.getvalue())
+        manifest[filename] = entry
+
+    with open(os.path.join(dist, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def _static_name(path):
+    """'static/choco.jpg', '/static/choco.jpg' or 'choco.jpg' -> 'choco.jpg'."""
+    if not path:
+        return None
+    path = path.lstrip('/')
+    return path[len('static/'):] if path.startswith('static/') else path
+
+
+class Assets:
+    def __init__(self, app=None):
+        self.manifest = {}
+        self.dist_prefix = f'/static/{DIST_DIR}/'
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.load(os.path.join(app.static_folder, DIST_DIR, MANIFEST))
+        self.dist_prefix = f'{app.static_url_path}/{DIST_DIR}/'
+        app.extensions['assets'] = self
+        app.jinja_env.globals.update(
+            url_for=self.url_for,
+            asset_src=self.src,
+            asset_srcset=self.srcset,
+        )
+        app.after_request(self._long_cache)
+
+    def load(self, manifest_path):
+        try:
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    def url_for(self, endpoint, **values):
+        """Drop-in url_for that swaps static files for their fingerprinted copy."""
+        if endpoint == 'static' and values.get('filename') in self.manifest:
+            values['filename'] = self.manifest[values['filename']]['original']
+        return url_for(endpoint, **values)
+
+    def src(self, path):
+        name = _static_name(path)
+        if not name:
+            return ''
+        if name.startswith(('http://', 'https://')):
+            return path
+        return self.url_for('static', filename=name)
+
+    def srcset(self, path, fmt='webp'):
+        """'url 320w, url 768w, ...' for the derivative format, or '' if not built."""
+        entry = self.manifest.get(_static_name(path) or '')
+        variants = (entry or {}).get(fmt) or {}
+        return ', '.join(f"{url_for('static', filename=file)} {width}w"
+                         for width, file in sorted(variants.items(), key=lambda kv: int(kv[0])))
+
+    def _long_cache(self, response):
+        if (request.path.startswith(self.dist_prefix) and not request.path.endswith(MANIFEST)
+                and response.status_code == 200):
+            response.headers['Cache-Control'] = IMMUTABLE
+        return response
+
+
+assets = Assets()
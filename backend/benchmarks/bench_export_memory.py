@@ -0,0 +1,71 @@
+# benchmarks/bench_export_memory.py
+# Peak Python memory while exporting a large orders table: the streaming export
+# in exports.py against loading the same rows with .all(). The streaming peak
+# should not grow with --rows.
+import argparse
+import resource
+import time
+import tracemalloc
+
+from extensions import db
+from models import Customer, Order
+import exports
+
+from benchmarks.common import make_app
+
+
+def seed(app, rows, customers=1000):
+    with app.app_context():
+        db.session.execute(Customer.__table__.insert(), [
+            {'name': f'Customer {i}', 'email': f'c{i}@example.com', 'password': 'x',
+             'role': 'customer', 'active': True} for i in range(customers)])
+        batch = 50000
+        for start in range(0, rows, batch):
+            db.session.execute(Order.__table__.insert(), [
+                {'customer_id': 1 + i % customers, 'status': 'Pending'}
+                for i in range(start, min(start + batch, rows))])
+        db.session.commit()
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--skip-naive', action='store_true', help='only run the streaming export')
+    args = parser.parse_args()
+
+    app = make_app(SQLITE_PROFILE='performance')
+    seed(app, args.rows)
+
+    with app.app_context():
+        engine = db.engine
+
+        def streaming():
+            return sum(len(chunk) for chunk in exports.write_dataset(engine, 'orders', 'csv'))
+
+        def naive():
+            fields, statement = exports.DATASETS['orders']
+            with engine.connect() as connection:
+                rows = [dict(r._mapping) for r in connection.execute(statement()).all()]
+            return sum(len(s) for s in exports.csv_lines(rows, fields))
+
+        size, elapsed, peak = measure(streaming)
+        print(f"streaming: {args.rows} rows, {size / 1024 / 1024:.1f} MB of CSV in {elapsed:.1f}s, "
+              f"peak {peak:.1f} MB (max RSS so far {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024} MB)")
+        if not args.skip_naive:
+            size, elapsed, peak = measure(naive)
+            print(f"all():     {args.rows} rows, {size / 1024 / 1024:.1f} MB of CSV in {elapsed:.1f}s, "
+                  f"peak {peak:.1f} MB (max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+# benchmarks/bench_keyset.py
+# OFFSET pagination vs keyset pagination as the page number grows.
+import argparse
+
+from models import Product
+import keyset
+
+from benchmarks.common import make_app, seed_products, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=200000)
+    parser.add_argument('--per-page', type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seed_products(args.products)
+        per_page = args.per_page
+        print(f"{'page':>8} {'offset ms':>10} {'keyset ms':>10}")
+        for page in (1, 100, 1000, 5000, args.products // per_page):
+            def offset():
+                Product.query.order_by(Product.price, Product.id).paginate(
+                    page=page, per_page=per_page, error_out=False)
+
+            # The cursor a client would hold after walking to this page.
+            boundary = (Product.query.order_by(Product.price, Product.id)
+                        .offset((page - 1) * per_page - 1).first() if page > 1 else None)
+            cursor = keyset.encode_cursor(boundary.price, boundary.id) if boundary else None
+
+            def seek():
+                keyset.paginate(Product.query, Product.price, Product.id, cursor, limit=per_page)
+
+            print(f"{page:>8} {timed(offset, 5):>10.2f} {timed(seek, 5):>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
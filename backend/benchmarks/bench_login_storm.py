@@ -0,0 +1,95 @@
+# benchmarks/bench_login_storm.py
+# /explore latency while a burst of logins hits the same server. Requests are
+# served by a fixed set of request threads (like a threaded WSGI server), so
+# a slow bcrypt call holds a thread that /explore could have used. Compares
+# hashing inline against the bounded process pool in passwords.py.
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import jsonify, request
+
+from extensions import db
+from models import User, Customer
+from passwords import PasswordHasher, HasherBusy
+from catalog_cache import in_stock_products
+import catalog_cache
+
+from benchmarks.common import make_app, seed_products, percentile
+
+
+def build(workers, rounds):
+    app = make_app(BCRYPT_LOG_ROUNDS=rounds, PASSWORD_HASH_WORKERS=workers)
+    hasher = PasswordHasher(app)
+    catalog_cache.catalog.init_app(app)
+
+    @app.route('/login', methods=['POST'])
+    def login():
+        user = User.query.filter_by(email=request.form['email']).first()
+        ok = user is not None and hasher.check(user.password, request.form['password'])
+        return ('', 204) if ok else ('', 401)
+
+    @app.route('/explore')
+    def explore():
+        return jsonify(len(in_stock_products()))
+
+    @app.errorhandler(HasherBusy)
+    def busy(e):
+        return '', 429, {'Retry-After': '1'}
+
+    with app.app_context():
+        seed_products(100)
+        db.session.add(Customer(name='Storm', email='storm@example.com',
+                                password=hasher.hash('secret', inline=True)))
+        db.session.commit()
+    return app, hasher
+
+
+def run(workers, args):
+    app, hasher = build(workers, args.rounds)
+    client_lock = threading.Lock()
+    latencies, statuses = [], {}
+
+    def call(kind, enqueued):
+        client = app.test_client()
+        if kind == 'login':
+            resp = client.post('/login', data={'email': 'storm@example.com', 'password': 'secret'})
+        else:
+            resp = client.get('/explore')
+        with client_lock:
+            statuses[(kind, resp.status_code)] = statuses.get((kind, resp.status_code), 0) + 1
+            if kind == 'explore':
+                latencies.append((time.perf_counter() - enqueued) * 1000)
+
+    app.test_client().get('/explore')  # warm the catalog cache
+    with ThreadPoolExecutor(max_workers=args.request_threads) as server:
+        start = time.perf_counter()
+        for i in range(args.requests):
+            kind = 'login' if i % args.explore_every else 'explore'
+            server.submit(call, kind, time.perf_counter())
+            time.sleep(args.interval / 1000.0)
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+    return latencies, statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--workers', type=int, default=2, help='hashing processes in pool mode')
+    parser.add_argument('--request-threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--explore-every', type=int, default=4, help='every Nth request is /explore')
+    parser.add_argument('--interval', type=float, default=5, help='ms between arrivals')
+    args = parser.parse_args()
+
+    for label, workers in (('inline', 0), ('pool', args.workers)):
+        latencies, statuses, elapsed = run(workers, args)
+        codes = ', '.join(f'{k}:{c}={n}' for (k, c), n in sorted(statuses.items()))
+        print(f"{label:6} /explore p50 {percentile(latencies, 50):8.1f} ms  "
+              f"p99 {percentile(latencies, 99):8.1f} ms  ({elapsed:.1f}s; {codes})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/bench_metrics.py
+# Per-request cost of metrics.py on a route that does a little of everything
+# the instrumented routes do: ORM queries, raw get_db() queries and a template.
+# Three bare apps on the same data: no instrumentation, instrumentation with
+# METRICS_SAMPLE_RATE=0 (counts and latency only) and with every request sampled.
+import argparse
+import time
+
+from flask import render_template_string
+
+from benchmarks.common import make_app, percentile, seed_products
+from database import get_db
+from extensions import db
+from metrics import Metrics
+from models import Product
+
+TEMPLATE = "<ul>{% for p in products %}<li>{{ p.name }} {{ p.price }}</li>{% endfor %}</ul>"
+
+
+def build(mode):
+    app = make_app(METRICS_SAMPLE_RATE=0.0 if mode == 'unsampled' else 1.0)
+    if mode != 'off':
+        Metrics(app)
+
+    @app.route('/page')
+    def page():
+        products = Product.query.order_by(Product.id).limit(20).all()
+        for p in products[:4]:
+            db.session.get(Product, p.id)
+        conn = get_db()
+        for _ in range(5):
+            conn.execute("SELECT COUNT(*) FROM product WHERE stock_quantity > 0").fetchone()
+        return render_template_string(TEMPLATE, products=products)
+
+    with app.app_context():
+        seed_products(200)
+    return app
+
+
+def measure(app, requests):
+    client = app.test_client()
+    for _ in range(50):
+        client.get('/page')
+    times = []
+    for _ in range(requests):
+        t = time.perf_counter()
+        client.get('/page')
+        times.append((time.perf_counter() - t) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'mode':<12}{'p50 ms':>10}{'p95 ms':>10}{'overhead':>10}")
+    baseline = None
+    for mode in ('off', 'unsampled', 'sampled'):
+        times = measure(build(mode), args.requests)
+        p50 = percentile(times, 50)
+        baseline = baseline or p50
+        print(f"{mode:<12}{p50:>10.3f}{percentile(times, 95):>10.3f}{(p50 / baseline - 1) * 100:>9.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_order_queue.py
+# Intake cost per order (what the request now pays) and how fast 1, 4 and 8
+# order workers drain the outbox.
+import argparse
+import time
+
+from extensions import db
+from models import Customer, Order, OrderItem, Product
+import order_queue
+
+from benchmarks.common import make_app, seed_products
+
+
+def fill_queue(app, orders, products):
+    """Enqueue orders the way place_order does; returns mean ms per order."""
+    with app.app_context():
+        customer = Customer(name='Queue', email='queue@example.com', password='x')
+        db.session.add(customer)
+        db.session.commit()
+        start = time.perf_counter()
+        for i in range(orders):
+            order = Order(customer_id=customer.id)
+            db.session.add(order)
+            db.session.flush()
+            lines = [(1 + i % products, 1), (1 + (i + 7) % products, 2)]
+            for pid, qty in lines:
+                db.session.add(OrderItem(order_id=order.id, product_id=pid, quantity=qty,
+                                         unit_price=100.0, subtotal=100.0 * qty))
+            order_queue.enqueue(order, lines)
+            db.session.commit()
+        return (time.perf_counter() - start) * 1000 / orders
+
+
+def run(workers, args):
+    app = make_app(SQLITE_PROFILE='performance', ORDER_BATCH_SIZE=args.batch, ORDER_POLL_INTERVAL=0.05)
+    with app.app_context():
+        seed_products(args.products, stock=1000000)
+    intake_ms = fill_queue(app, args.orders, args.products)
+
+    pool = order_queue.OrderWorkers(app)
+    start = time.perf_counter()
+    pool.start(workers)
+    with app.app_context():
+        while True:
+            backlog = order_queue.backlog()
+            db.session.rollback()  # fresh snapshot next time round
+            if not backlog.get('queued') and not backlog.get('processing'):
+                break
+            time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    pool.stop()
+
+    with app.app_context():
+        confirmed = Order.query.filter_by(status=order_queue.CONFIRMED).count()
+        sold = 3 * args.orders
+        left = db.session.query(db.func.sum(Product.stock_quantity)).scalar()
+    assert confirmed == args.orders, f"only {confirmed}/{args.orders} confirmed"
+    assert left == args.products * 1000000 - sold, "stock and orders disagree"
+    return intake_ms, args.orders / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--products', type=int, default=50)
+    parser.add_argument('--batch', type=int, default=50)
+    args = parser.parse_args()
+
+    for workers in (1, 4, 8):
+        intake_ms, rate = run(workers, args)
+        print(f"workers={workers}  intake {intake_ms:.2f} ms/order  drain {rate:8.1f} orders/sec")
+
+
+if __name__ == '__main__':
+    main()
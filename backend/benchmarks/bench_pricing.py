@@ -0,0 +1,46 @@
+# benchmarks/bench_pricing.py
+# Per-item Product.query.get() vs the batched pricing.price_cart() as the cart grows.
+from extensions import db
+from models import Product
+from pricing import price_cart
+
+from benchmarks.common import make_app, seed_products, count_queries, timed
+
+
+def legacy_price_cart(cart):
+    items = []
+    total = 0
+    for pid_str, qty in cart.items():
+        product = db.session.get(Product, int(pid_str))
+        subtotal = product.price * qty
+        items.append({'product': product, 'quantity': qty, 'subtotal': subtotal})
+        total += subtotal
+    return total
+
+
+def main():
+    app = make_app()
+    with app.app_context():
+        seed_products(200)
+        print(f"{'cart size':>10} {'legacy q':>9} {'legacy ms':>10} {'batched q':>10} {'batched ms':>11}")
+        for size in (1, 5, 10, 40, 100, 200):
+            cart = {str(i): 2 for i in range(1, size + 1)}
+
+            def run_legacy():
+                db.session.expunge_all()
+                legacy_price_cart(cart)
+
+            def run_batched():
+                db.session.expunge_all()
+                price_cart(cart)
+
+            with count_queries() as legacy_q:
+                run_legacy()
+            with count_queries() as batched_q:
+                run_batched()
+            print(f"{size:>10} {legacy_q[0]:>9} {timed(run_legacy):>10.2f} "
+                  f"{batched_q[0]:>10} {timed(run_batched):>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_search.py
+# ilike('%term%') vs the FTS5 index on a large catalog.
+import argparse
+import random
+
+from sqlalchemy import text
+
+from extensions import db
+from models import Product
+import fts
+
+from benchmarks.common import make_app, timed
+
+FLAVOURS = ['dark', 'chocolate', 'fudge', 'walnut', 'hazelnut', 'caramel', 'salted', 'oreo',
+            'velvet', 'almond', 'eggless', 'triple', 'boozy', 'roasted', 'nutty', 'slab']
+
+
+def vocabulary(rng, size=5000):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return [''.join(rng.choice(letters) for _ in range(rng.randint(5, 9))) for _ in range(size)]
+
+
+def seed(n):
+    rng = random.Random(42)
+    words = vocabulary(rng)
+    rows = []
+    for i in range(1, n + 1):
+        name = f"{rng.choice(words)} {rng.choice(FLAVOURS)} brownie".title()
+        rows.append({'name': name, 'description': ' '.join(rng.sample(words, 8)),
+                     'price': rng.randint(200, 1200), 'stock_quantity': rng.randint(0, 50),
+                     'image_url': '', 'category': rng.choice(['Brownies', 'Cakes'])})
+        if len(rows) == 10000:
+            db.session.execute(Product.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(Product.__table__.insert(), rows)
+    db.session.commit()
+    return words
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=100000)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        words = seed(args.products)
+        terms = [words[0], words[1][:4], 'salted', f'{words[2]} fudge', 'zzzzzz']
+        rows = db.session.execute(text('SELECT count(*) FROM product_fts')).scalar()
+        print(f"{args.products} products, {rows} indexed")
+        print(f"{'term':>16} {'like hits':>10} {'like ms':>9} {'fts hits':>9} {'fts ms':>8}")
+        for term in terms:
+            def like():
+                return Product.query.filter(Product.name.ilike(f'%{term}%')).limit(20).all(), \
+                    Product.query.filter(Product.name.ilike(f'%{term}%')).count()
+
+            def match():
+                query, rank = fts.match_products(Product.query, term)
+                return query.order_by(rank).limit(20).all(), query.count()
+
+            like_hits = like()[1]
+            fts_hits = match()[1]
+            print(f"{term:>16} {like_hits:>10} {timed(like, 5):>9.2f} {fts_hits:>9} {timed(match, 5):>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
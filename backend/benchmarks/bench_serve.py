@@ -0,0 +1,101 @@
+# benchmarks/bench_serve.py
+# Requests per second on /explore: the dev server (`python app.py`, i.e.
+# app.run(debug=True) without the reloader) against `flask serve`. Both run
+# against a throwaway copy of users.db; the load comes from client threads
+# holding keep-alive connections.
+import argparse
+import http.client
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import BACKEND, free_port, percentile, wait_until_up
+
+DEV_SERVER = "import app; app.app.run(port={port}, debug=True, use_reloader=False)"
+
+
+def load(port, path, clients, seconds):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        mine = []
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    raise OSError(response.status)
+            except (OSError, http.client.HTTPException):
+                with lock:
+                    errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+                continue
+            mine.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / seconds, latencies, errors[0]
+
+
+def run_server(name, command, env, args):
+    port = free_port()
+    proc = subprocess.Popen([part.format(port=port) for part in command], cwd=BACKEND, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(port)
+        load(port, '/explore', args.clients, 1)  # warm up caches and connections
+        rps, latencies, errors = load(port, '/explore', args.clients, args.seconds)
+        print(f"{name:<28} {rps:>8.0f} {percentile(latencies, 50):>8.1f} "
+              f"{percentile(latencies, 99):>8.1f} {errors:>7}")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=int, default=10)
+    parser.add_argument('--workers', type=int, help='flask serve --workers (default: its own sizing)')
+    parser.add_argument('--threads', type=int, help='flask serve --threads')
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp()
+    db_path = os.path.join(scratch, 'users.db')
+    shutil.copy(os.path.join(BACKEND, 'users.db'), db_path)
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + db_path, APP_ENV='development')
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'db', 'upgrade'], cwd=BACKEND, env=env,
+                   capture_output=True, check=True)
+
+    serve = [sys.executable, '-m', 'flask', '--app', 'app', 'serve', '--bind', '127.0.0.1:{port}']
+    if args.workers:
+        serve += ['--workers', str(args.workers)]
+    if args.threads:
+        serve += ['--threads', str(args.threads)]
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} clients, {args.seconds}s per server")
+    print(f"{'server':<28} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    try:
+        run_server('dev server (debug)', [sys.executable, '-c', DEV_SERVER], env, args)
+        run_server('flask serve (gunicorn)', serve, env, args)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
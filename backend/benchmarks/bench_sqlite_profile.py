@@ -0,0 +1,84 @@
+# benchmarks/bench_sqlite_profile.py
+# Storefront readers vs an admin writer, once per SQLite profile.
+import argparse
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from extensions import db
+from models import Product
+
+from benchmarks.common import make_app, seed_products, percentile
+
+
+def run(profile, readers, seconds, products):
+    app = make_app(SQLITE_PROFILE=profile)
+    with app.app_context():
+        seed_products(products)
+
+    read_ms = []
+    counts = {'reads': 0, 'writes': 0, 'busy': 0}
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def reader():
+        with app.app_context():
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                try:
+                    Product.query.filter(Product.stock_quantity > 0).all()
+                except OperationalError:
+                    with lock:
+                        counts['busy'] += 1
+                    continue
+                finally:
+                    db.session.remove()
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    counts['reads'] += 1
+                    read_ms.append(elapsed)
+
+    def writer():
+        with app.app_context():
+            pid = 0
+            while time.perf_counter() < stop:
+                pid = pid % products + 1
+                try:
+                    product = db.session.get(Product, pid)
+                    product.price += 1
+                    db.session.commit()
+                    with lock:
+                        counts['writes'] += 1
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        counts['busy'] += 1
+                finally:
+                    db.session.remove()
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    print(f"{profile:>12} {counts['reads'] / seconds:>9.0f} {counts['writes'] / seconds:>9.0f} "
+          f"{percentile(read_ms, 50):>8.2f} {percentile(read_ms, 99):>8.2f} {counts['busy']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--products', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'profile':>12} {'reads/s':>9} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'busy':>6}")
+    for profile in ('default', 'performance'):
+        run(profile, args.readers, args.seconds, args.products)
+
+
+if __name__ == '__main__':
+    main()
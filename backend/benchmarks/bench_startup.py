@@ -0,0 +1,77 @@
+# benchmarks/bench_startup.py
+# Cold start of a fresh process (import app, then serve a first request that
+# doesn't need the database) against customer tables of growing size. With
+# the app factory this should stay flat; the "boot-time load" column is what
+# the old import-time Customer.query.all() cost at the same size.
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import percentile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COLD_START = (
+    "import time; t = time.perf_counter()\n"
+    "import app\n"
+    "app.app.test_client().get('/login')\n"
+    "print((time.perf_counter() - t) * 1000)\n"
+)
+
+BOOT_TIME_LOAD = (
+    "import time\n"
+    "import app\n"
+    "from models import Customer\n"
+    "with app.app.app_context():\n"
+    "    t = time.perf_counter(); Customer.query.all()\n"
+    "    print((time.perf_counter() - t) * 1000)\n"
+)
+
+
+def run(code, env):
+    out = subprocess.run([sys.executable, '-c', code], cwd=BACKEND, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def build_db(path, customers, env):
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'bootstrap'], cwd=BACKEND, env=env,
+                   capture_output=True, check=True)
+    conn = sqlite3.connect(path)
+    batch = 100000
+    for start in range(0, customers, batch):
+        conn.executemany(
+            "INSERT INTO user (name, email, password, role, active) VALUES (?, ?, 'x', 'customer', 1)",
+            ((f'Customer {i}', f'c{i}@example.com') for i in range(start, min(start + batch, customers))))
+        conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--customers', type=int, nargs='+', default=[0, 100000, 1000000])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'customers':>10} {'cold start p50 ms':>18} {'max ms':>8} {'boot-time load ms':>18}")
+    for n in args.customers:
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.remove(path)
+        env = dict(os.environ, DATABASE_URL='sqlite:///' + path, APP_ENV='development', ORDER_WORKERS='0')
+        try:
+            build_db(path, n, env)
+            samples = [run(COLD_START, env) for _ in range(args.runs)]
+            legacy = run(BOOT_TIME_LOAD, env)
+            print(f"{n:>10} {percentile(samples, 50):>18.1f} {max(samples):>8.1f} {legacy:>18.1f}")
+        finally:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+
+if __name__ == '__main__':
+    main()
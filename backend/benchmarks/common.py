@@ -0,0 +1,104 @@
+# benchmarks/common.py
+# Shared helpers for the scripts in this folder. Run them from backend/, e.g.
+#   python -m benchmarks.bench_pricing
+import http.client
+import os
+import socket
+import tempfile
+import time
+from contextlib import contextmanager
+
+from flask import Flask
+from sqlalchemy import event
+
+from extensions import db
+from models import Product
+import database
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_app(db_path=None, **config):
+    """A bare Flask app bound to a throwaway SQLite file.
+
+    Extra keyword arguments are applied to app.config before the engine exists.
+    """
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + db_path
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(database.POOL_OPTIONS)
+    app.config['SECRET_KEY'] = 'bench'
+    app.config.update(config)
+    db.init_app(app)
+    database.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed_products(n, stock=1000):
+    db.session.execute(
+        Product.__table__.insert(),
+        [{'name': f'Brownie {i}', 'description': 'Benchmark brownie', 'price': 100 + i % 50,
+          'stock_quantity': stock, 'image_url': '', 'category': 'Brownies' if i % 2 else 'Cakes'}
+         for i in range(1, n + 1)]
+    )
+    db.session.commit()
+
+
+@contextmanager
+def count_queries():
+    """Yield a one-element list holding the number of statements executed."""
+    counter = [0]
+
+    def _count(*args):
+        counter[0] += 1
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _count)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', _count)
+
+
+def timed(fn, repeat=20):
+    """Median wall time of fn() in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(port, path='/explore', timeout=30):
+    """Poll path until the server on port answers, or raise after timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', path)
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} never came up")
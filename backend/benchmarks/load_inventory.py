@@ -0,0 +1,79 @@
+# benchmarks/load_inventory.py
+# Many threads race to buy a small stock of one product. Proves the conditional
+# UPDATE never oversells and reports committed orders/sec.
+import argparse
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from extensions import db
+from models import Product, Customer, Order, OrderItem
+import inventory
+
+from benchmarks.common import make_app, seed_products
+
+
+def place(app, customer_id, product_id, qty):
+    with app.app_context():
+        try:
+            order = Order(customer_id=customer_id, status='Pending')
+            db.session.add(order)
+            db.session.flush()
+            db.session.add(OrderItem(order_id=order.id, product_id=product_id,
+                                     quantity=qty, unit_price=100.0, subtotal=100.0 * qty))
+            inventory.commit_lines([(product_id, qty)])
+            db.session.commit()
+            return 'ok'
+        except inventory.OutOfStock:
+            db.session.rollback()
+            return 'sold_out'
+        except OperationalError:
+            db.session.rollback()
+            return 'busy'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--attempts', type=int, default=50, help='orders per thread')
+    parser.add_argument('--stock', type=int, default=300)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seed_products(1, stock=args.stock)
+        db.session.add(Customer(name='Load', email='load@example.com', password='x'))
+        db.session.commit()
+
+    results = {'ok': 0, 'sold_out': 0, 'busy': 0}
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(args.attempts):
+            outcome = place(app, 1, 1, 1)
+            with lock:
+                results[outcome] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        stock = db.session.get(Product, 1).stock_quantity
+        sold = db.session.query(db.func.coalesce(db.func.sum(OrderItem.quantity), 0)).scalar()
+
+    print(f"threads={args.threads} attempts={args.threads * args.attempts} initial stock={args.stock}")
+    print(f"committed={results['ok']} sold_out={results['sold_out']} busy={results['busy']}")
+    print(f"final stock={stock} units sold={sold} orders/sec={results['ok'] / elapsed:.1f}")
+    assert stock >= 0, "oversold: stock went negative"
+    assert sold == args.stock - stock, "stock and order items disagree"
+    print("no oversell")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+# benchmarks/load_test.py
+# Mixed-traffic load test against a real server on a synthetic shop
+# (benchmarks/synthetic.py). Each client thread is one visitor with its own
+# cookies, picking scenarios by weight:
+#   browse        GET /explore
+#   product       GET /product/<id>
+#   cart          GET /add-to-cart/<id>, GET /checkout
+#   order         GET /add-to-cart/<id>, GET /checkout, POST /place-order
+#   login         POST /login as a synthetic customer
+#   admin_search  GET /admin/customers/data?search=, GET /admin/products/data?search=
+# Throughput and p50/p95/p99 are reported per route and written as JSON
+# (benchmarks/results/load-<commit>.json by default) so two runs can be
+# compared:
+#   python -m benchmarks.load_test --customers 20000 --seconds 30
+#   python -m benchmarks.load_test --compare results/load-abc1234.json results/load-def5678.json
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+import bootstrap
+from benchmarks import synthetic
+from benchmarks.common import BACKEND, free_port, percentile, wait_until_up
+
+SCENARIOS = {
+    'browse': 35,
+    'product': 25,
+    'cart': 12,
+    'order': 6,
+    'login': 12,
+    'admin_search': 10,
+}
+RESULTS_DIR = os.path.join(BACKEND, 'benchmarks', 'results')
+
+
+class Visitor:
+    """One keep-alive connection and cookie jar; records every request."""
+
+    def __init__(self, port, record):
+        self.port = port
+        self.record = record
+        self.cookies = {}
+        self.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+
+    def request(self, method, path, route, form=None, succeeded=None):
+        """Send one request; it counts as an error on a 4xx/5xx or when
+        succeeded(response) says so."""
+        headers = {}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        start = time.perf_counter()
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.record(route, (time.perf_counter() - start) * 1000, False)
+            self.conn.close()
+            self.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+            return None
+        ok = response.status < 400 and (succeeded is None or succeeded(response))
+        self.record(route, (time.perf_counter() - start) * 1000, ok)
+        for header in response.msg.get_all('Set-Cookie') or ():
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+        return response
+
+
+class Shop:
+    """What the scenarios need to know about the synthetic data."""
+
+    def __init__(self, db_path):
+        conn = sqlite3.connect(db_path)
+        self.products = [r[0] for r in conn.execute('SELECT id FROM product WHERE stock_quantity > 0')]
+        self.customers = [r[0] for r in conn.execute(
+            "SELECT id FROM user WHERE role = 'customer' AND active = 1 AND email LIKE 'customer%@example.com'")]
+        conn.close()
+
+
+def run_scenario(name, visitor, shop, rng):
+    if name == 'browse':
+        visitor.request('GET', '/explore', 'GET /explore')
+    elif name == 'product':
+        visitor.request('GET', f'/product/{rng.choice(shop.products)}', 'GET /product/<id>')
+    elif name in ('cart', 'order'):
+        visitor.request('GET', f'/add-to-cart/{rng.choice(shop.products)}', 'GET /add-to-cart/<id>')
+        visitor.request('GET', '/checkout', 'GET /checkout')
+        if name == 'order':
+            n = rng.choice(shop.customers)
+            # An empty cart redirects back to /checkout instead of /payment.
+            visitor.request('POST', '/place-order', 'POST /place-order',
+                            {'email': synthetic._customer_email(n), 'name': f'Customer {n}'},
+                            succeeded=lambda r: '/payment' in (r.getheader('Location') or ''))
+    elif name == 'login':
+        visitor.request('POST', '/login', 'POST /login', {
+            'email': synthetic._customer_email(rng.choice(shop.customers)),
+            'password': synthetic.PASSWORD, 'role': 'customer'})
+    elif name == 'admin_search':
+        term = rng.choice(synthetic.FIRST_NAMES + synthetic.LAST_NAMES)[:rng.randint(3, 6)]
+        visitor.request('GET', f'/admin/customers/data?{urlencode({"search": term})}',
+                        'GET /admin/customers/data?search')
+        term = rng.choice(synthetic.FLAVOURS).split()[0][:rng.randint(3, 6)]
+        visitor.request('GET', f'/admin/products/data?{urlencode({"search": term})}',
+                        'GET /admin/products/data?search')
+
+
+def drive(port, shop, clients, seconds, seed, mix):
+    """Run the mix for `seconds`; returns {route: [(ms, ok), ...]}."""
+    samples = {}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+    names, weights = list(mix), list(mix.values())
+
+    def client(index):
+        rng = random.Random(seed * 1000 + index)
+        mine = {}
+        visitor = Visitor(port, lambda route, ms, ok: mine.setdefault(route, []).append((ms, ok)))
+        while time.monotonic() < stop:
+            name = rng.choices(names, weights)[0]
+            if name == 'admin_search' and 'access_token_cookie' not in visitor.cookies:
+                # sign in once as admin, outside the measurements
+                admin = Visitor(port, lambda *a: None)
+                admin.request('POST', '/login', None, {'email': bootstrap.DEFAULT_ADMIN_EMAIL,
+                                                       'password': bootstrap.DEFAULT_ADMIN_PASSWORD,
+                                                       'role': 'admin'})
+                visitor.cookies.update(admin.cookies)
+            run_scenario(name, visitor, shop, rng)
+        with lock:
+            for route, values in mine.items():
+                samples.setdefault(route, []).extend(values)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def summarize(samples, seconds):
+    routes = {}
+    for route, values in sorted(samples.items()):
+        latencies = [ms for ms, _ in values]
+        routes[route] = {
+            'requests': len(values),
+            'errors': sum(1 for _, ok in values if not ok),
+            'rps': round(len(values) / seconds, 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'max_ms': round(max(latencies), 2),
+        }
+    everything = [ms for values in samples.values() for ms, _ in values]
+    total = {
+        'requests': len(everything),
+        'errors': sum(r['errors'] for r in routes.values()),
+        'rps': round(len(everything) / seconds, 2),
+        'p50_ms': round(percentile(everything, 50), 2),
+        'p95_ms': round(percentile(everything, 95), 2),
+        'p99_ms': round(percentile(everything, 99), 2),
+    }
+    return total, routes
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=BACKEND, capture_output=True, text=True).stdout.strip()
+    return {'commit': git('rev-parse', '--short', 'HEAD') or 'unknown',
+            'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+
+def print_routes(total, routes):
+    print(f"{'route':<36}{'req':>7}{'err':>5}{'req/s':>8}{'p50':>8}{'p95':>8}{'p99':>8}")
+    for route, r in routes.items():
+        print(f"{route:<36}{r['requests']:>7}{r['errors']:>5}{r['rps']:>8.1f}"
+              f"{r['p50_ms']:>8.1f}{r['p95_ms']:>8.1f}{r['p99_ms']:>8.1f}")
+    print(f"{'all':<36}{total['requests']:>7}{total['errors']:>5}{total['rps']:>8.1f}"
+          f"{total['p50_ms']:>8.1f}{total['p95_ms']:>8.1f}{total['p99_ms']:>8.1f}")
+
+
+def compare(base_path, head_path):
+    """Per-route change from one results file to another, in percent."""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(head_path) as f:
+        head = json.load(f)
+    print(f"{base['meta']['commit']} -> {head['meta']['commit']}")
+    print(f"{'route':<36}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+
+    def delta(old, new):
+        return f"{(new / old - 1) * 100:+.0f}%" if old else 'n/a'
+
+    for route in sorted(set(base['routes']) | set(head['routes'])):
+        old, new = base['routes'].get(route), head['routes'].get(route)
+        if old is None or new is None:
+            print(f"{route:<36}{'only in ' + ('head' if old is None else 'base'):>36}")
+            continue
+        print(f"{route:<36}" + ''.join(f"{delta(old[k], new[k]):>9}"
+                                        for k in ('rps', 'p50_ms', 'p95_ms', 'p99_ms')))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mixed-traffic load test on a synthetic shop.')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'), help='Diff two results files and exit.')
+    parser.add_argument('--db', help='Reuse a database from benchmarks.synthetic (it gets written to).')
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--orders', type=float, default=3.0, help='Mean orders per customer.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=3, help='Seconds of unmeasured traffic first.')
+    parser.add_argument('--mix', help='Scenario weights, e.g. browse=50,login=0 (others keep defaults).')
+    parser.add_argument('--server', choices=('serve', 'dev'), default='serve',
+                        help='`flask serve` (gunicorn) or the single-process dev server.')
+    parser.add_argument('--workers', type=int, help='flask serve --workers')
+    parser.add_argument('--threads', type=int, help='flask serve --threads')
+    parser.add_argument('--app-env', default='development',
+                        help='APP_ENV for the server; production makes login pay the full bcrypt cost.')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/load-<commit>.json).')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    mix = dict(SCENARIOS)
+    for part in filter(None, (args.mix or '').split(',')):
+        name, _, weight = part.partition('=')
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name] = int(weight)
+    mix = {name: weight for name, weight in mix.items() if weight > 0}
+
+    scratch = tempfile.mkdtemp()
+    # Carts must survive a request landing on another worker process.
+    env = dict(os.environ, APP_ENV=args.app_env, CART_STORE='sqlite')
+    try:
+        if args.db:
+            db_path, dataset = os.path.abspath(args.db), {'db': args.db}
+        else:
+            db_path = os.path.join(scratch, 'load.db')
+            os.environ['APP_ENV'] = args.app_env  # generate() hashes the shared password at this cost
+            dataset = synthetic.generate(db_path, args.products, args.customers, args.orders, seed=args.seed)
+            print(f"dataset: {dataset['products']} products, {dataset['customers']} customers, "
+                  f"{dataset['orders']} orders in {dataset['total_seconds']}s")
+        env['DATABASE_URL'] = 'sqlite:///' + db_path
+        shop = Shop(db_path)
+
+        port = free_port()
+        if args.server == 'dev':
+            command = [sys.executable, '-c',
+                       f"import app; app.app.run(port={port}, debug=False, use_reloader=False, threaded=True)"]
+        else:
+            command = [sys.executable, '-m', 'flask', '--app', 'app', 'serve', '--bind', f'127.0.0.1:{port}']
+            if args.workers:
+                command += ['--workers', str(args.workers)]
+            if args.threads:
+                command += ['--threads', str(args.threads)]
+        proc = subprocess.Popen(command, cwd=BACKEND, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_up(port)
+            if args.warmup:
+                drive(port, shop, args.clients, args.warmup, args.seed + 1, mix)
+            started = datetime.utcnow()
+            samples = drive(port, shop, args.clients, args.seconds, args.seed, mix)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=60)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    total, routes = summarize(samples, args.seconds)
+    print(f"{os.cpu_count()} CPUs, {args.clients} clients, {args.seconds}s, server={args.server}")
+    print_routes(total, routes)
+
+    revision = git_revision()
+    result = {
+        'meta': {
+            **revision,
+            'started_at': started.isoformat(timespec='seconds') + 'Z',
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'args': {k: v for k, v in vars(args).items() if k not in ('compare', 'output')},
+            'mix': mix,
+            'dataset': dataset,
+        },
+        'total': total,
+        'routes': routes,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{revision['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f"results: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+# benchmarks/synthetic.py
+# A reproducible shop to load-test against: N products across categories, M
+# customers and an order history for each of them, all derived from --seed.
+#   python -m benchmarks.synthetic --db /tmp/load.db --products 500 --customers 20000
+#
+# The schema and admin account come from bootstrap, exactly as in a real
+# deployment; the rows are bulk-inserted on one sqlite3 connection in batches
+# (the FTS triggers still fire), and the analytics rollups are rebuilt at the
+# end so the dashboard matches the orders.
+#
+# Order histories are skewed the way real ones are: most customers have one
+# or two orders, a few have dozens; a handful of products sell most of the
+# units; old orders are delivered (or cancelled), recent ones still moving.
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from pricing import TAX_RATE
+
+PASSWORD = 'loadtest123'  # every synthetic customer's password
+BATCH = 10000
+
+CATEGORIES = ('Brownies', 'Cakes', 'Cookies', 'Cupcakes', 'Desserts', 'Gift Hampers')
+FLAVOURS = ('Dark Chocolate', 'Salted Caramel', 'Walnut', 'Red Velvet', 'Hazelnut', 'Nutella',
+            'Biscoff', 'Espresso', 'Mint', 'Peanut Butter', 'Orange', 'Coconut', 'Almond',
+            'Raspberry', 'White Chocolate', 'Oreo', 'Cheesecake', 'Banana')
+STYLES = ('Classic', 'Fudgy', 'Double', 'Triple Layer', 'Eggless', 'Vegan', 'Mini', 'Loaded')
+FIRST_NAMES = ('Aarav', 'Priya', 'Rohan', 'Ananya', 'Vikram', 'Meera', 'Arjun', 'Kavya', 'Rahul',
+               'Divya', 'Karthik', 'Sneha', 'Aditya', 'Lakshmi', 'Siddharth', 'Pooja', 'Nikhil',
+               'Deepa', 'Sanjay', 'Nisha', 'Harish', 'Ishita', 'Manoj', 'Revathi')
+LAST_NAMES = ('Sharma', 'Iyer', 'Reddy', 'Nair', 'Patel', 'Kumar', 'Menon', 'Rao', 'Gupta',
+              'Pillai', 'Singh', 'Krishnan', 'Das', 'Joshi', 'Subramanian', 'Bose')
+
+
+def _customer_email(n):
+    return f'customer{n}@example.com'
+
+
+def _status(age_days, rng):
+    if age_days < 1:
+        return rng.choice(('Pending', 'In Progress'))
+    if age_days < 7:
+        return rng.choice(('In Progress', 'Shipped', 'Shipped'))
+    return 'Cancelled' if rng.random() < 0.08 else 'Delivered'
+
+
+def _products(rng, first_id, count):
+    for pid in range(first_id, first_id + count):
+        category = CATEGORIES[pid % len(CATEGORIES)]
+        flavour = rng.choice(FLAVOURS)
+        name = f'{rng.choice(STYLES)} {flavour} {category.rstrip("s")} #{pid}'
+        yield {
+            'id': pid, 'name': name, 'category': category,
+            'description': f'{flavour} {category.lower()} baked fresh every morning.',
+            'price': float(rng.randrange(80, 900, 10)),
+            # about one in twenty sold out, the rest anywhere from a few to plenty
+            'stock_quantity': 0 if rng.random() < 0.05 else rng.randint(5, 2000),
+            'image_url': '',
+        }
+
+
+def generate(db_path, products=200, customers=5000, orders=3.0, days=365, seed=42):
+    """Bootstrap db_path (if needed) and add the synthetic rows. Returns counts."""
+    # Imported here so DATABASE_URL is already set for app's module-level app.
+    from app import create_app
+    from extensions import db
+    from passwords import passwords
+    import analytics
+    import bootstrap
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.abspath(db_path)})
+    with app.app_context():
+        bootstrap.init_schema()
+        bootstrap.seed_admin()
+        hashed = passwords.hash(PASSWORD, inline=True)  # once; bcrypt per row would take hours
+        db.engine.dispose()
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    start = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA synchronous = OFF')  # a crash just means generating again
+
+    def next_id(table):
+        return conn.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM "{table}"').fetchone()[0]
+
+    def insert(table, rows):
+        rows = iter(rows)
+        while True:
+            batch = [row for _, row in zip(range(BATCH), rows)]
+            if not batch:
+                return
+            columns = list(batch[0])
+            conn.executemany(
+                f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})',
+                [tuple(row[c] for c in columns) for row in batch])
+
+    with conn:
+        catalog = list(_products(rng, next_id('product'), products))
+        insert('product', catalog)
+        insert('view_product', ({'id': p['id'], 'name': p['name'], 'description': p['description'],
+                                 'price': int(p['price']), 'image': p['image_url']} for p in catalog))
+
+        # Zipf-like popularity: the top product sells ~10x the 20th.
+        product_ids = [p['id'] for p in catalog]
+        prices = {p['id']: p['price'] for p in catalog}
+        popularity = [1 / (rank + 1) ** 0.8 for rank in range(len(product_ids))]
+        rng.shuffle(product_ids)
+
+        first_customer = next_id('user')
+        signups = {}
+
+        def customer_rows():
+            for n in range(first_customer, first_customer + customers):
+                signups[n] = now - timedelta(days=rng.uniform(0, days), seconds=rng.randrange(86400))
+                yield {'id': n, 'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                       'email': _customer_email(n), 'password': hashed, 'role': 'customer',
+                       'created_at': signups[n].isoformat(sep=' '), 'active': rng.random() > 0.05}
+        insert('user', customer_rows())
+
+        order_id = next_id('order')
+        item_id = next_id('order_item')
+        order_rows, item_rows = [], []
+        counts = {'orders': 0, 'order_items': 0}
+
+        def flush():
+            insert('order', order_rows)
+            insert('order_item', item_rows)
+            counts['orders'] += len(order_rows)
+            counts['order_items'] += len(item_rows)
+            order_rows.clear()
+            item_rows.clear()
+
+        for customer_id, signup in signups.items():
+            # exponential with mean `orders`: lots of one-offs, a long tail of regulars
+            for _ in range(int(rng.expovariate(1 / orders)) if orders else 0):
+                placed = signup + (now - signup) * rng.random()
+                picks = set(rng.choices(product_ids, popularity, k=rng.choices((1, 2, 3, 4), (50, 30, 15, 5))[0]))
+                subtotal = 0.0
+                for pid in picks:
+                    quantity = rng.choices((1, 2, 3), (70, 20, 10))[0]
+                    line = prices[pid] * quantity
+                    item_rows.append({'id': item_id, 'order_id': order_id, 'product_id': pid,
+                                      'quantity': quantity, 'unit_price': prices[pid], 'subtotal': line})
+                    item_id += 1
+                    subtotal += line
+                tax = round(TAX_RATE * subtotal, 2)
+                order_rows.append({'id': order_id, 'customer_id': customer_id,
+                                   'status': _status((now - placed).days, rng),
+                                   'created_at': placed.isoformat(sep=' '), 'item_count': len(picks),
+                                   'subtotal': subtotal, 'discount': 0.0, 'tax': tax,
+                                   'grand_total': subtotal + tax})
+                order_id += 1
+                if len(order_rows) >= BATCH:
+                    flush()
+        flush()
+    conn.execute('PRAGMA optimize')
+    conn.close()
+    loaded = time.perf_counter() - start
+
+    with app.app_context():
+        analytics.rebuild()
+        db.engine.dispose()
+
+    return {'products': products, 'customers': customers, **counts,
+            'load_seconds': round(loaded, 2), 'total_seconds': round(time.perf_counter() - start, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill a database with a synthetic shop.')
+    parser.add_argument('--db', required=True, help='SQLite file; created and bootstrapped if missing.')
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--orders', type=float, default=3.0, help='Mean orders per customer.')
+    parser.add_argument('--days', type=int, default=365, help='How far back the history goes.')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    counts = generate(args.db, args.products, args.customers, args.orders, args.days, args.seed)
+    rows = counts['products'] + counts['customers'] + counts['orders'] + counts['order_items']
+    print(f"{counts['products']} products, {counts['customers']} customers, {counts['orders']} orders, "
+          f"{counts['order_items']} order items")
+    print(f"bulk load {counts['load_seconds']}s ({rows / max(counts['load_seconds'], 1e-9):,.0f} rows/s), "
+          f"{counts['total_seconds']}s with rollups")
+    print(f"customers log in as customerN@example.com / {PASSWORD}")
+
+
+if __name__ == '__main__':
+    main()
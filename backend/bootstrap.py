@@ -0,0 +1,43 @@
+# bootstrap.py
+# One-time setup that used to run on every import of app.py: building the
+# schema and seeding the admin account. It now runs only when asked, through
+# `flask bootstrap` (or `flask init-db` / `flask seed-admin` separately), so a
+# worker process or a test importing the app never touches the database.
+import os
+
+import flask_migrate
+from sqlalchemy import inspect
+
+from extensions import db
+from models import User
+from passwords import passwords
+
+MIGRATIONS_DIR = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'migrations')
+
+DEFAULT_ADMIN_EMAIL = 'admin123@example.com'
+DEFAULT_ADMIN_PASSWORD = 'admin123'
+
+
+def init_schema():
+    """Create the schema on an empty database, or migrate an existing one.
+
+    Returns 'created' or 'upgraded'. Needs an app context.
+    """
+    tables = set(inspect(db.engine).get_table_names())
+    if not tables - {'alembic_version'}:
+        db.create_all()
+        # create_all() builds the current schema, so there is nothing to migrate.
+        flask_migrate.stamp(directory=MIGRATIONS_DIR)
+        return 'created'
+    flask_migrate.upgrade(directory=MIGRATIONS_DIR)
+    return 'upgraded'
+
+
+def seed_admin(email=DEFAULT_ADMIN_EMAIL, password=DEFAULT_ADMIN_PASSWORD, name='Admin'):
+    """Create the admin account unless it exists. Returns True if created."""
+    if db.session.query(User.id).filter_by(email=email, role='admin').first():
+        return False
+    db.session.add(User(name=name, email=email, password=passwords.hash(password, inline=True),
+                        role='admin'))
+    db.session.commit()
+    return True
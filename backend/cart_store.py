@@ -0,0 +1,221 @@
+# cart_store.py
+# Carts live on the server; the session cookie only carries an opaque cart id
+# (the same id inventory uses as the reservation token). Each backend keeps
+# {product_id: quantity} per cart and updates one line at a time, so adding an
+# item never rewrites the whole cart. Carts expire CART_TTL after their last
+# change and are swept opportunistically or with `flask sweep-carts`.
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from flask import session
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from extensions import db
+from models import Cart, CartLine
+
+SESSION_KEY = 'cart_id'
+SWEEP_INTERVAL = 300  # seconds between opportunistic sweeps
+
+
+class MemoryCartStore:
+    """Per-process LRU of carts. The default; carts die with the process."""
+
+    def __init__(self, maxsize=10000, ttl=timedelta(days=1)):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._carts = OrderedDict()  # cart_id -> (expires, {product_id: qty})
+        self._lock = threading.Lock()
+
+    def _live(self, cart_id):
+        entry = self._carts.get(cart_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._carts[cart_id]
+            return None
+        self._carts.move_to_end(cart_id)
+        return entry[1]
+
+    def _touch(self, cart_id, lines):
+        self._carts[cart_id] = (time.monotonic() + self.ttl.total_seconds(), lines)
+        self._carts.move_to_end(cart_id)
+        while len(self._carts) > self.maxsize:
+            self._carts.popitem(last=False)
+
+    def get(self, cart_id):
+        with self._lock:
+            return dict(self._live(cart_id) or {})
+
+    def add(self, cart_id, product_id, quantity):
+        with self._lock:
+            lines = self._live(cart_id) or {}
+            lines[product_id] = lines.get(product_id, 0) + quantity
+            if lines[product_id] <= 0:
+                del lines[product_id]
+            self._touch(cart_id, lines)
+            return lines.get(product_id, 0)
+
+    def set(self, cart_id, product_id, quantity):
+        with self._lock:
+            lines = self._live(cart_id) or {}
+            if quantity > 0:
+                lines[product_id] = quantity
+            else:
+                lines.pop(product_id, None)
+            self._touch(cart_id, lines)
+
+    def clear(self, cart_id):
+        with self._lock:
+            self._carts.pop(cart_id, None)
+
+    def sweep(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [cid for cid, (expires, _) in self._carts.items() if expires <= now]
+            for cart_id in expired:
+                del self._carts[cart_id]
+        return len(expired)
+
+    def __len__(self):
+        return len(self._carts)
+
+
+class SQLiteCartStore:
+    """cart / cart_line tables. Shared by every worker process. Commits."""
+
+    def __init__(self, ttl=timedelta(days=1)):
+        self.ttl = ttl
+
+    def _touch(self, cart_id):
+        expires = datetime.utcnow() + self.ttl
+        db.session.execute(
+            insert(Cart).values(id=cart_id, expires_at=expires)
+            .on_conflict_do_update(index_elements=[Cart.id], set_={'expires_at': expires}))
+
+    def _write(self, fn):
+        try:
+            result = fn()
+            db.session.commit()
+            return result
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def get(self, cart_id):
+        rows = (db.session.query(CartLine.product_id, CartLine.quantity)
+                .join(Cart, Cart.id == CartLine.cart_id)
+                .filter(Cart.id == cart_id, Cart.expires_at > datetime.utcnow())
+                .all())
+        return {pid: qty for pid, qty in rows}
+
+    def add(self, cart_id, product_id, quantity):
+        def write():
+            self._touch(cart_id)
+            new_qty = db.session.execute(
+                insert(CartLine).values(cart_id=cart_id, product_id=product_id, quantity=quantity)
+                .on_conflict_do_update(
+                    index_elements=[CartLine.cart_id, CartLine.product_id],
+                    set_={'quantity': CartLine.quantity + quantity})
+                .returning(CartLine.quantity)
+            ).scalar()
+            if new_qty <= 0:
+                self._delete_line(cart_id, product_id)
+                return 0
+            return new_qty
+        return self._write(write)
+
+    def set(self, cart_id, product_id, quantity):
+        def write():
+            self._touch(cart_id)
+            if quantity <= 0:
+                self._delete_line(cart_id, product_id)
+                return
+            db.session.execute(
+                insert(CartLine).values(cart_id=cart_id, product_id=product_id, quantity=quantity)
+                .on_conflict_do_update(
+                    index_elements=[CartLine.cart_id, CartLine.product_id],
+                    set_={'quantity': quantity}))
+        self._write(write)
+
+    def _delete_line(self, cart_id, product_id):
+        CartLine.query.filter_by(cart_id=cart_id, product_id=product_id).delete(synchronize_session=False)
+
+    def clear(self, cart_id):
+        def write():
+            CartLine.query.filter_by(cart_id=cart_id).delete(synchronize_session=False)
+            Cart.query.filter_by(id=cart_id).delete(synchronize_session=False)
+        self._write(write)
+
+    def sweep(self):
+        def write():
+            cutoff = datetime.utcnow()
+            expired = select(Cart.id).where(Cart.expires_at <= cutoff)
+            CartLine.query.filter(CartLine.cart_id.in_(expired)).delete(synchronize_session=False)
+            return Cart.query.filter(Cart.expires_at <= cutoff).delete(synchronize_session=False)
+        return self._write(write)
+
+    def __len__(self):
+        return Cart.query.filter(Cart.expires_at > datetime.utcnow()).count()
+
+
+class CartStore:
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryCartStore()
+        self._last_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+
+    def init_app(self, app):
+        ttl = app.config.setdefault('CART_TTL', timedelta(days=1))
+        kind = app.config.setdefault('CART_STORE', 'memory')  # or 'sqlite'
+        if kind == 'sqlite':
+            self.backend = SQLiteCartStore(ttl)
+        else:
+            self.backend = MemoryCartStore(app.config.setdefault('CART_STORE_SIZE', 10000), ttl)
+        app.extensions['cart_store'] = self
+
+    def current_id(self, create=False):
+        """The cart id from the session, minting one if create is set."""
+        cart_id = session.get(SESSION_KEY)
+        if cart_id is None and create:
+            cart_id = session[SESSION_KEY] = uuid.uuid4().hex
+        return cart_id
+
+    def lines(self, cart_id=None):
+        """{product_id: qty} for the cart, {} when there isn't one."""
+        cart_id = cart_id or self.current_id()
+        return self.backend.get(cart_id) if cart_id else {}
+
+    def add(self, product_id, quantity=1):
+        """Adjust one line by quantity (may be negative); returns the new quantity."""
+        return self.backend.add(self.current_id(create=True), product_id, quantity)
+
+    def set(self, product_id, quantity):
+        self.backend.set(self.current_id(create=True), product_id, quantity)
+
+    def discard(self):
+        """Drop the current cart, e.g. once it has become an order."""
+        cart_id = session.pop(SESSION_KEY, None)
+        if cart_id:
+            self.backend.clear(cart_id)
+
+    def sweep(self):
+        return self.backend.sweep()
+
+    def maybe_sweep(self, interval=SWEEP_INTERVAL):
+        """Sweep at most once per interval per process."""
+        if time.monotonic() - self._last_sweep < interval:
+            return 0
+        if not self._sweep_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._last_sweep = time.monotonic()
+            return self.sweep()
+        finally:
+            self._sweep_lock.release()
+
+
+carts = CartStore()
@@ -0,0 +1,208 @@
+# catalog_cache.py
+# Read-through cache for the storefront catalog queries (featured products, the
+# in-stock list). Entries are plain dicts, not ORM objects, so they are safe to
+# share between requests and threads, and to pickle into a shared backend.
+#
+# Invalidation is by version: every key embeds the current catalog version, and
+# a write bumps it. Old entries are never read again and age out via TTL/LRU.
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+from extensions import db
+from models import Product
+
+
+class LRUCache:
+    """In-process TTL + LRU store. The default backend."""
+
+    def __init__(self, maxsize=256, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._counters = {}  # kept apart from _data so LRU never evicts them
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (ttl or self.ttl)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def read_counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache:
+    """Shared backend for multi-process deployments. Needs the redis package."""
+
+    def __init__(self, url, ttl=300, prefix='brownie:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CATALOG_CACHE_BACKEND points at Redis but 'redis' is not installed") from e
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self.prefix + key, pickle.dumps(value), ex=ttl or self.ttl)
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+    def incr(self, key):
+        return self._client.incr(self.prefix + key)
+
+    def read_counter(self, key):
+        return int(self._client.get(self.prefix + key) or 0)
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + 'catalog:*'):
+            self._client.delete(key)
+
+    def __len__(self):
+        return sum(1 for _ in self._client.scan_iter(self.prefix + 'catalog:*'))
+
+
+class CatalogCache:
+    VERSION_KEY = 'catalog-version'
+
+    def __init__(self, backend=None):
+        self.backend = backend or LRUCache()
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def init_app(self, app):
+        ttl = app.config.setdefault('CATALOG_CACHE_TTL', 300)
+        size = app.config.setdefault('CATALOG_CACHE_SIZE', 256)
+        url = app.config.setdefault('CATALOG_CACHE_BACKEND', None)
+        self.backend = RedisCache(url, ttl) if url else LRUCache(size, ttl)
+        app.extensions['catalog_cache'] = self
+
+    def version(self):
+        return self.backend.read_counter(self.VERSION_KEY)
+
+    def get_or_load(self, name, loader):
+        key = f'catalog:{self.version()}:{name}'
+        value = self.backend.get(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if value is None:
+            value = loader()
+            self.backend.set(key, value)
+        return value
+
+    def invalidate(self):
+        """Call after any committed write that changes what the storefront shows."""
+        return self.backend.incr(self.VERSION_KEY)
+
+    def stats(self):
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'backend': type(self.backend).__name__,
+            'version': self.version(),
+            'entries': len(self.backend),
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / lookups, 4) if lookups else None,
+        }
+
+
+catalog = CatalogCache()
+
+
+def product_snapshot(product):
+    # No stock_quantity on purpose: the storefront only needs to know a product
+    # is in stock, which lets inventory invalidate just when stock crosses zero.
+    return {
+        'id': product.id,
+        'name': product.name,
+        'description': product.description,
+        'price': product.price,
+        'image_url': product.image_url,
+        'category': product.category,
+    }
+
+
+def featured_products(limit=4):
+    return catalog.get_or_load(
+        f'featured:{limit}',
+        lambda: [product_snapshot(p) for p in Product.query.limit(limit).all()])
+
+
+def in_stock_products():
+    return catalog.get_or_load(
+        'in-stock',
+        # Alphabetical, which ix_product_in_stock (name WHERE stock > 0) serves as-is.
+        lambda: [product_snapshot(p) for p in
+                 Product.query.filter(Product.stock_quantity > 0).order_by(Product.name).all()])
+
+
+def mark_dirty(session):
+    """Invalidate once the session's outermost transaction commits."""
+    session.info['catalog_dirty'] = True
+
+
+# after_commit also fires when a SAVEPOINT is released, before anything is
+# visible to other connections; bumping the version then would let a reader
+# cache the old rows under the new version. Only the root transaction counts.
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.in_nested_transaction():
+        return
+    if session.info.pop('catalog_dirty', False):
+        catalog.invalidate()
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_on_rollback(session, previous_transaction):
+    # A rolled-back SAVEPOINT (one order in a batch) keeps the flag an earlier
+    # one set; at worst the outer commit invalidates once too often.
+    if previous_transaction.nested:
+        return
+    session.info.pop('catalog_dirty', None)
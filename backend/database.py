@@ -0,0 +1,130 @@
+# database.py
+# One pooled engine for everything: the ORM session and the raw-SQL routes both
+# check connections out of db.engine, and the raw ones go back at teardown.
+import sqlite3
+import threading
+
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+from extensions import db
+import metrics
+import slow_queries
+
+POOL_OPTIONS = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout': 10,
+    'pool_pre_ping': True,
+}
+
+# PRAGMAs applied to every new SQLite connection, selected with SQLITE_PROFILE.
+# 'default' leaves SQLite's rollback journal as-is; 'performance' switches to WAL
+# so storefront reads no longer block behind an admin write.
+SQLITE_PROFILES = {
+    'default': {},
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,            # ms
+        'cache_size': -64000,            # negative = KiB, so ~64MB
+        'mmap_size': 256 * 1024 * 1024,  # bytes
+        'temp_store': 'MEMORY',
+    },
+}
+
+_counters = {'checkouts': 0, 'checkins': 0, 'connects': 0}
+_counters_lock = threading.Lock()
+
+
+def get_db():
+    """Request-scoped DB-API connection from the shared pool.
+
+    Behaves like the old sqlite3.connect() handle (rows are sqlite3.Row), but is
+    reused for the rest of the request and returned to the pool at teardown.
+    """
+    if 'db_conn' not in g:
+        conn = db.engine.raw_connection()
+        conn.driver_connection.row_factory = sqlite3.Row
+        g.db_conn = conn
+    # timed on sampled requests, then past the slow-query recorder
+    return slow_queries.wrap_connection(metrics.wrap_connection(g.db_conn))
+
+
+def close_db(exc=None):
+    conn = g.pop('db_conn', None)
+    if conn is None:
+        return
+    try:
+        if exc is not None:
+            conn.rollback()
+        conn.driver_connection.row_factory = None
+    finally:
+        conn.close()  # back to the pool, not a real close
+
+
+@event.listens_for(Pool, 'connect')
+def _on_connect(dbapi_conn, record):
+    with _counters_lock:
+        _counters['connects'] += 1
+
+
+@event.listens_for(Pool, 'checkout')
+def _on_checkout(dbapi_conn, record, proxy):
+    with _counters_lock:
+        _counters['checkouts'] += 1
+
+
+@event.listens_for(Pool, 'checkin')
+def _on_checkin(dbapi_conn, record):
+    with _counters_lock:
+        _counters['checkins'] += 1
+
+
+def pool_status():
+    """Snapshot of the engine pool: open, idle and checked-out connections."""
+    pool = db.engine.pool
+    status = {'pool': type(pool).__name__}
+    if hasattr(pool, 'checkedout'):
+        idle = pool.checkedin()
+        checked_out = pool.checkedout()
+        status.update({
+            'size': pool.size(),
+            'overflow': pool.overflow(),
+            'idle': idle,
+            'checked_out': checked_out,
+            'open': idle + checked_out,
+        })
+    with _counters_lock:
+        status.update(_counters)
+    return status
+
+
+def sqlite_pragmas(app):
+    """The profile named by SQLITE_PROFILE, with SQLITE_PRAGMAS overrides on top."""
+    pragmas = dict(SQLITE_PROFILES[app.config.get('SQLITE_PROFILE', 'performance')])
+    pragmas.update(app.config.get('SQLITE_PRAGMAS', {}))
+    return pragmas
+
+
+def apply_pragmas(dbapi_conn, pragmas):
+    cursor = dbapi_conn.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def init_app(app):
+    """Call after db.init_app(app), before anything has connected."""
+    app.teardown_appcontext(close_db)
+
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name == 'sqlite':
+            pragmas = sqlite_pragmas(app)
+            if pragmas:
+                event.listen(engine, 'connect',
+                             lambda dbapi_conn, record: apply_pragmas(dbapi_conn, pragmas))
@@ -0,0 +1,106 @@
+# exports.py
+# Streaming admin exports. Rows come off a server-side cursor yield_per rows at
+# a time, get rendered as CSV or NDJSON, and leave as ~64KB chunks of a
+# generator response (chunked transfer encoding), so memory use is the same
+# for a hundred rows or a million.
+import csv
+import io
+import json
+
+from flask import Response
+from sqlalchemy import select
+
+from models import Customer, Order, OrderItem, Product
+
+FORMATS = ('csv', 'ndjson')
+YIELD_PER = 1000
+CHUNK_BYTES = 64 * 1024
+
+MIMETYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+def _customers():
+    return select(Customer.id, Customer.name, Customer.email, Customer.created_at,
+                  Customer.active).order_by(Customer.id)
+
+
+def _orders():
+    return (select(Order.id, Order.customer_id, Customer.name.label('customer_name'),
+                   Customer.email.label('customer_email'), Order.status, Order.created_at,
+                   Order.item_count, Order.subtotal, Order.discount, Order.tax, Order.grand_total)
+            .outerjoin(Customer, Customer.id == Order.customer_id)
+            .order_by(Order.id))
+
+
+def _order_items():
+    return (select(OrderItem.id, OrderItem.order_id, OrderItem.product_id,
+                   Product.name.label('product_name'), OrderItem.quantity, OrderItem.unit_price,
+                   OrderItem.subtotal)
+            .outerjoin(Product, Product.id == OrderItem.product_id)
+            .order_by(OrderItem.id))
+
+
+# name -> (columns, statement factory)
+DATASETS = {
+    'customers': (('id', 'name', 'email', 'created_at', 'active'), _customers),
+    'orders': (('id', 'customer_id', 'customer_name', 'customer_email', 'status', 'created_at',
+                'item_count', 'subtotal', 'discount', 'tax', 'grand_total'), _orders),
+    'order_items': (('id', 'order_id', 'product_id', 'product_name', 'quantity', 'unit_price',
+                     'subtotal'), _order_items),
+}
+
+
+def stream_rows(connection, statement, yield_per=YIELD_PER):
+    """Dict rows from a server-side cursor, yield_per at a time."""
+    result = connection.execution_options(yield_per=yield_per).execute(statement)
+    for row in result:
+        yield dict(row._mapping)
+
+
+def csv_lines(rows, fields):
+    """Render dict rows as CSV text, header first, one piece per row."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, default=str) + '\n'
+
+
+def render(rows, fields, fmt):
+    return csv_lines(rows, fields) if fmt == 'csv' else ndjson_lines(rows)
+
+
+def chunked(pieces, size=CHUNK_BYTES):
+    """Coalesce many small strings into ~size byte chunks for the response."""
+    parts, length = [], 0
+    for piece in pieces:
+        parts.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield ''.join(parts)
+            parts, length = [], 0
+    if parts:
+        yield ''.join(parts)
+
+
+def write_dataset(engine, name, fmt, yield_per=YIELD_PER):
+    """Generator of output chunks for one dataset; owns its connection."""
+    fields, statement = DATASETS[name]
+    with engine.connect() as connection:
+        rows = stream_rows(connection, statement(), yield_per)
+        yield from chunked(render(rows, fields, fmt))
+
+
+def response(chunks, name, fmt):
+    return Response(chunks, mimetype=MIMETYPES[fmt],
+                    headers={'Content-Disposition': f'attachment; filename={name}.{fmt}'})
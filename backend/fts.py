@@ -0,0 +1,120 @@
+# fts.py
+# SQLite FTS5 indexes for the admin live search. product_fts and customer_fts
+# are external-content tables: they store only the inverted index and read the
+# text back from product/customer by rowid (customer is a view over user).
+# Triggers keep them in sync, so the raw-SQL inserts in app.py are covered as
+# well as the ORM writes.
+import re
+
+from sqlalchemy import event, literal_column, select, text
+
+from models import Product, Customer, User
+
+PRODUCT_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        name, description, category,
+        content='product', content_rowid='id', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF name, description, category ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+        INSERT INTO product_fts(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END""",
+]
+
+CUSTOMER_FTS_DDL = [
+    # 'customer' is the view over user rows with role = 'customer'; the
+    # triggers sit on user and skip admins.
+    """CREATE VIRTUAL TABLE IF NOT EXISTS customer_fts USING fts5(
+        name, email,
+        content='customer', content_rowid='id', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS customer_fts_ai AFTER INSERT ON user
+    WHEN new.role = 'customer' BEGIN
+        INSERT INTO customer_fts(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS customer_fts_ad AFTER DELETE ON user
+    WHEN old.role = 'customer' BEGIN
+        INSERT INTO customer_fts(customer_fts, rowid, name, email)
+        VALUES ('delete', old.id, old.name, old.email);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS customer_fts_au AFTER UPDATE OF name, email, role ON user BEGIN
+        INSERT INTO customer_fts(customer_fts, rowid, name, email)
+        SELECT 'delete', old.id, old.name, old.email WHERE old.role = 'customer';
+        INSERT INTO customer_fts(rowid, name, email)
+        SELECT new.id, new.name, new.email WHERE new.role = 'customer';
+    END""",
+]
+
+
+def _install(connection, statements):
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+def rebuild(connection):
+    """Re-index everything from the content tables (after a bulk load, say)."""
+    connection.exec_driver_sql("INSERT INTO product_fts(product_fts) VALUES ('rebuild')")
+    connection.exec_driver_sql("INSERT INTO customer_fts(customer_fts) VALUES ('rebuild')")
+
+
+# Fresh databases get the FTS tables from db.create_all(); existing ones from
+# the migration.
+@event.listens_for(Product.__table__, 'after_create')
+def _create_product_fts(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        _install(connection, PRODUCT_FTS_DDL)
+
+
+@event.listens_for(User.__table__, 'after_create')
+def _create_customer_fts(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        _install(connection, CUSTOMER_FTS_DDL)
+
+
+def match_expression(term):
+    """User input -> FTS5 prefix query: 'dark choc' -> '"dark"* "choc"*'.
+
+    Every token is quoted, so FTS5 operators typed into the search box are
+    treated as text.
+    """
+    tokens = re.findall(r'\w+', term.lower())
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _hits(fts_table, term):
+    return (select(literal_column('rowid').label('id'),
+                   literal_column(f'bm25({fts_table})').label('rank'))
+            .select_from(text(fts_table))
+            .where(text(f'{fts_table} MATCH :fts_query').bindparams(fts_query=match_expression(term)))
+            .subquery(f'{fts_table}_hits'))
+
+
+def match_products(query, term):
+    """Restrict a Product query to FTS hits for term.
+
+    Returns (query, rank); order by rank for best-match-first (lower bm25 is
+    better). Terms with no searchable characters leave the query unfiltered
+    and rank as None.
+    """
+    if not match_expression(term):
+        return query, None
+    hits = _hits('product_fts', term)
+    return query.join(hits, Product.id == hits.c.id), hits.c.rank
+
+
+def match_customers(query, term):
+    """Customer counterpart of match_products()."""
+    if not match_expression(term):
+        return query, None
+    hits = _hits('customer_fts', term)
+    return query.join(hits, Customer.id == hits.c.id), hits.c.rank
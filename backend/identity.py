@@ -0,0 +1,87 @@
+# identity.py
+# Who is making this request, without touching the database when we can avoid
+# it. The JWT cookie already carries sub (the email), role and name, signed, so
+# current_principal() just verifies it once per request and keeps the result on
+# flask.g. Pages that need more than that (or a user with no token, like the
+# guest dashboard) go through load_user(), a short-TTL cache keyed on email that
+# profile and password changes clear with forget_user().
+from flask import g
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from sqlalchemy import select
+
+from catalog_cache import LRUCache
+from extensions import db
+from models import User
+
+users = LRUCache(maxsize=1024, ttl=60)
+
+
+class Principal:
+    """The caller as described by verified token claims. Never a DB row."""
+
+    def __init__(self, sub=None, role=None, name=None):
+        self.sub = sub
+        self.role = role
+        self.name = name
+
+    @property
+    def email(self):
+        return self.sub
+
+    @property
+    def is_authenticated(self):
+        return self.sub is not None
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+    @property
+    def is_customer(self):
+        return self.role == 'customer'
+
+    def __repr__(self):
+        return f'<Principal {self.sub or "anonymous"} role={self.role}>'
+
+
+ANONYMOUS = Principal()
+
+
+def init_app(app):
+    users.ttl = app.config.setdefault('USER_CACHE_TTL', 60)
+
+
+def current_principal():
+    """Verify the JWT (if any) once per request and return a Principal."""
+    principal = g.get('_principal')
+    if principal is None:
+        try:
+            verify_jwt_in_request(optional=True)
+            claims = get_jwt()
+        except Exception:
+            claims = {}  # bad or expired token reads as anonymous
+        if claims.get('sub'):
+            principal = Principal(claims['sub'], claims.get('role'), claims.get('name'))
+        else:
+            principal = ANONYMOUS
+        g._principal = principal
+    return principal
+
+
+def load_user(email):
+    """Profile fields for email (no password hash), cached for USER_CACHE_TTL."""
+    key = f'user:{email}'
+    user = users.get(key)
+    if user is None:
+        row = db.session.execute(
+            select(User.id, User.name, User.email, User.role).where(User.email == email)
+        ).first()
+        user = dict(row._mapping) if row is not None else False  # cache misses too
+        users.set(key, user)
+    return user or None
+
+
+def forget_user(email):
+    users.delete(f'user:{email}')
+    if g.get('_principal') is not None and g._principal.sub == email:
+        g.pop('_principal')
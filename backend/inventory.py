@@ -0,0 +1,188 @@
+# inventory.py
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text, func
+
+from extensions import db
+from models import StockReservation
+import catalog_cache
+
+DEFAULT_RESERVATION_TTL = timedelta(minutes=15)
+SWEEP_INTERVAL = 60  # seconds between opportunistic sweeps
+
+_last_sweep = 0.0
+_sweep_lock = threading.Lock()
+
+# Each pair is tried in order. The first statement only matches when the
+# product stays on the same side of zero, so the storefront's in-stock list is
+# invalidated only when the second one has to run.
+_TAKE_STOCK = text(
+    "UPDATE product SET stock_quantity = stock_quantity - :qty "
+    "WHERE id = :pid AND stock_quantity > :qty"
+)
+_TAKE_LAST_STOCK = text(
+    "UPDATE product SET stock_quantity = stock_quantity - :qty "
+    "WHERE id = :pid AND stock_quantity = :qty"
+)
+_RETURN_STOCK = text(
+    "UPDATE product SET stock_quantity = stock_quantity + :qty "
+    "WHERE id = :pid AND stock_quantity > 0"
+)
+_RESTOCK = text(
+    "UPDATE product SET stock_quantity = stock_quantity + :qty WHERE id = :pid"
+)
+
+
+class OutOfStock(Exception):
+    def __init__(self, product_id, quantity):
+        super().__init__(f"Not enough stock for product {product_id} (wanted {quantity})")
+        self.product_id = product_id
+        self.quantity = quantity
+
+
+def take_stock(product_id, quantity):
+    """Atomically decrement stock; raises OutOfStock instead of going negative.
+
+    Runs inside the caller's transaction, so a later failure rolls it back.
+    """
+    if quantity <= 0:
+        return
+    params = {'pid': product_id, 'qty': quantity}
+    if db.session.execute(_TAKE_STOCK, params).rowcount == 1:
+        return
+    if db.session.execute(_TAKE_LAST_STOCK, params).rowcount != 1:
+        raise OutOfStock(product_id, quantity)
+    catalog_cache.mark_dirty(db.session)  # just sold out
+
+
+def return_stock(product_id, quantity):
+    if quantity <= 0:
+        return
+    params = {'pid': product_id, 'qty': quantity}
+    if db.session.execute(_RETURN_STOCK, params).rowcount != 1:
+        db.session.execute(_RESTOCK, params)
+        catalog_cache.mark_dirty(db.session)  # back in stock
+
+
+def reserve(cart_token, product_id, quantity=1, ttl=DEFAULT_RESERVATION_TTL):
+    """Hold stock for a cart until the reservation expires. Commits."""
+    try:
+        take_stock(product_id, quantity)
+        db.session.add(StockReservation(
+            cart_token=cart_token,
+            product_id=product_id,
+            quantity=quantity,
+            expires_at=datetime.utcnow() + ttl,
+        ))
+        hold(cart_token, ttl)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def hold(cart_token, ttl=DEFAULT_RESERVATION_TTL):
+    """Give every hold on this cart the same, refreshed deadline. Does not commit."""
+    StockReservation.query.filter_by(cart_token=cart_token).update(
+        {'expires_at': datetime.utcnow() + ttl}, synchronize_session=False)
+
+
+def release(cart_token, product_id, quantity):
+    """Give back up to quantity units the cart holds for product_id. Commits."""
+    try:
+        held = reserved_quantities(cart_token).get(product_id, 0)
+        released = min(held, quantity)
+        if released <= 0:
+            return 0
+        live = StockReservation.query.filter(
+            StockReservation.cart_token == cart_token,
+            StockReservation.product_id == product_id,
+            StockReservation.expires_at > datetime.utcnow(),
+        )
+        expires_at = max(r.expires_at for r in live)
+        live.delete(synchronize_session=False)
+        if held > released:
+            db.session.add(StockReservation(cart_token=cart_token, product_id=product_id,
+                                            quantity=held - released, expires_at=expires_at))
+        return_stock(product_id, released)
+        db.session.commit()
+        return released
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def reserved_quantities(cart_token):
+    """{product_id: qty} currently held for the cart (expired holds excluded)."""
+    if not cart_token:
+        return {}
+    rows = (db.session.query(StockReservation.product_id, func.sum(StockReservation.quantity))
+            .filter(StockReservation.cart_token == cart_token,
+                    StockReservation.expires_at > datetime.utcnow())
+            .group_by(StockReservation.product_id)
+            .all())
+    return {pid: qty for pid, qty in rows}
+
+
+def commit_lines(lines, cart_token=None):
+    """Turn cart lines into a stock deduction, consuming the cart's reservations.
+
+    lines is an iterable of (product_id, quantity). Units already held by a live
+    reservation are not taken twice; only the remainder is decremented. Does not
+    commit: callers wrap this with the order inserts in one transaction.
+    """
+    held = reserved_quantities(cart_token)
+    for product_id, quantity in lines:
+        remaining = quantity - held.pop(product_id, 0)
+        if remaining > 0:
+            take_stock(product_id, remaining)
+        elif remaining < 0:
+            return_stock(product_id, -remaining)
+    # Held for products that have since left the cart.
+    for product_id, quantity in held.items():
+        return_stock(product_id, quantity)
+    if cart_token:
+        StockReservation.query.filter(
+            StockReservation.cart_token == cart_token,
+            StockReservation.expires_at > datetime.utcnow(),
+        ).delete(synchronize_session=False)
+
+
+def release_expired(now=None):
+    """Return stock held by expired reservations. Commits; returns rows released."""
+    now = now or datetime.utcnow()
+    try:
+        rows = (db.session.query(StockReservation.product_id, func.sum(StockReservation.quantity))
+                .filter(StockReservation.expires_at <= now)
+                .group_by(StockReservation.product_id)
+                .all())
+        for product_id, quantity in rows:
+            return_stock(product_id, quantity)
+        released = (StockReservation.query
+                    .filter(StockReservation.expires_at <= now)
+                    .delete(synchronize_session=False))
+        db.session.commit()
+        return released
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def maybe_release_expired(interval=SWEEP_INTERVAL):
+    """Sweep expired reservations at most once per interval per process.
+
+    Lets a deployment without a scheduled `flask release-reservations` still
+    give abandoned stock back.
+    """
+    global _last_sweep
+    if time.monotonic() - _last_sweep < interval:
+        return 0
+    if not _sweep_lock.acquire(blocking=False):
+        return 0
+    try:
+        _last_sweep = time.monotonic()
+        return release_expired()
+    finally:
+        _sweep_lock.release()
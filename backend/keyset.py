@@ -0,0 +1,113 @@
+# keyset.py
+# Cursor ("seek") pagination. Instead of OFFSET n, each page asks for rows that
+# sort after the last row of the previous page, so page 5,000 costs the same
+# index seek as page 1.
+import base64
+import json
+
+from sqlalchemy import and_, tuple_
+
+from catalog_cache import LRUCache
+
+COUNT_TTL = 60  # seconds a cached total is trusted
+
+# Bounded: live search asks for a total on every keystroke, one key per prefix.
+_counts = LRUCache(maxsize=512, ttl=COUNT_TTL)
+
+
+def encode_cursor(value, row_id):
+    raw = json.dumps([value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Returns (value, id), or None for an empty/garbled token."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def _stretches(column, id_column, position, descending):
+    """Filters for each contiguous stretch of the ordering, starting at position.
+
+    SQLite sorts NULLs first ascending and last descending, and a row-value
+    comparison like (price, id) > (?, ?) is never true for a NULL price. So
+    the NULL rows and the non-NULL rows are walked as two separate stretches,
+    each of which is a plain index range seek.
+    """
+    stretches = ['values', 'nulls'] if descending else ['nulls', 'values']
+    if getattr(column.expression, 'nullable', True) is False:
+        stretches = ['values']  # e.g. paging by id alone: no NULL stretch to walk
+    value = row_id = None
+    if position is not None:
+        value, row_id = position
+        stretches = stretches[stretches.index('nulls' if value is None else 'values'):]
+
+    for i, stretch in enumerate(stretches):
+        resume = i == 0 and position is not None
+        if stretch == 'nulls':
+            if not resume:
+                yield column.is_(None)
+            elif descending:
+                yield and_(column.is_(None), id_column < row_id)
+            else:
+                yield and_(column.is_(None), id_column > row_id)
+        elif not resume:
+            yield column.isnot(None)
+        elif descending:
+            yield tuple_(column, id_column) < tuple_(value, row_id)
+        else:
+            yield tuple_(column, id_column) > tuple_(value, row_id)
+
+
+def paginate(query, column, id_column, cursor=None, direction='asc', limit=20):
+    """One keyset page of query ordered by (column, id).
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if limit < 1:
+        raise ValueError(f'limit must be at least 1, got {limit}')
+    descending = direction == 'desc'
+    if descending:
+        ordered = query.order_by(column.desc(), id_column.desc())
+    else:
+        ordered = query.order_by(column.asc(), id_column.asc())
+
+    rows = []
+    for condition in _stretches(column, id_column, decode_cursor(cursor), descending):
+        rows += ordered.filter(condition).limit(limit + 1 - len(rows)).all()
+        if len(rows) > limit:
+            break
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, column.key), getattr(last, id_column.key))
+    return rows, next_cursor
+
+
+def cached_count(key, query, ttl=COUNT_TTL):
+    """query.count(), recomputed at most once per ttl for the same key.
+
+    key is a tuple starting with a table name, so forget_counts() can retire it.
+    """
+    versioned = (_counts.read_counter(key[0]), *key)
+    total = _counts.get(versioned)
+    if total is None:
+        total = query.order_by(None).count()
+        _counts.set(versioned, total, ttl)
+    return total
+
+
+def forget_counts(table=None):
+    """Drop cached totals: all of them, or those keyed under one table name."""
+    if table is None:
+        _counts.clear()
+    else:
+        _counts.incr(table)  # keys under the old version are never read again
@@ -0,0 +1,295 @@
+# metrics.py
+# Per-request instrumentation. Every request is counted and its latency goes
+# into a per-endpoint histogram; a sampled request (METRICS_SAMPLE_RATE) also
+# gets a breakdown of where its time went:
+#   db      statements run and time spent in them, through the ORM and through
+#           the raw connections handed out by database.get_db()
+#   render  Jinja template rendering
+#   bcrypt  waiting on passwords.hash()/check()
+# The breakdown is sent back as a Server-Timing header and summed per endpoint
+# on /metrics in Prometheus text format.
+#
+# Hooks find the request they belong to through a context variable, so with
+# sampling off each hook is one ContextVar.get() that returns None.
+#
+# Numbers are per process: under `flask serve` each worker keeps its own.
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import before_render_template, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Seconds. Roughly Prometheus' defaults, trimmed at the bottom.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_current = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    __slots__ = ('db_queries', 'db_time', 'spans', '_render_start')
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.spans = defaultdict(float)  # render, bcrypt, ... -> seconds
+        self._render_start = []
+
+
+def current():
+    """The sampled request's RequestTiming, or None."""
+    return _current.get()
+
+
+@contextmanager
+def timed(name):
+    """Add the block's wall time to span `name` of the current sampled request."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.spans[name] += time.perf_counter() - start
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    def __init__(self, app=None):
+        self.sample_rate = 1.0
+        self.server_timing = True
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)  # (endpoint, method, status) -> count
+        self._latency = {}                 # endpoint -> _Histogram
+        self._queries = {}                 # endpoint -> _Histogram of statements per request
+        self._totals = defaultdict(float)  # (name, endpoint) -> seconds
+        self._sampled = defaultdict(int)   # endpoint -> sampled requests
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # 0 turns the per-request breakdown off; counts and latency stay on.
+        self.sample_rate = float(app.config.setdefault(
+            'METRICS_SAMPLE_RATE', float(os.environ.get('METRICS_SAMPLE_RATE', 1.0))))
+        self.server_timing = app.config.setdefault('METRICS_SERVER_TIMING', True)
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+        before_render_template.connect(_render_started, app)
+        template_rendered.connect(_render_finished, app)
+        app.extensions['metrics'] = self
+
+    def _before(self):
+        request.environ['metrics.start'] = time.perf_counter()
+        if self.sample_rate and (self.sample_rate >= 1 or random.random() < self.sample_rate):
+            request.environ['metrics.token'] = _current.set(RequestTiming())
+
+    def _after(self, response):
+        start = request.environ.get('metrics.start')
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or 'unmatched'
+        timing = _current.get()
+        with self._lock:
+            self._requests[(endpoint, request.method, response.status_code)] += 1
+            self._histogram(self._latency, endpoint, LATENCY_BUCKETS).observe(elapsed)
+            if timing is not None:
+                self._sampled[endpoint] += 1
+                self._histogram(self._queries, endpoint, QUERY_BUCKETS).observe(timing.db_queries)
+                self._totals[('db', endpoint)] += timing.db_time
+                for name, seconds in timing.spans.items():
+                    self._totals[(name, endpoint)] += seconds
+        if timing is not None and self.server_timing:
+            response.headers['Server-Timing'] = server_timing(timing, elapsed)
+        return response
+
+    def _teardown(self, exc=None):
+        token = request.environ.pop('metrics.token', None)
+        if token is not None:
+            _current.reset(token)
+
+    @staticmethod
+    def _histogram(table, endpoint, buckets):
+        histogram = table.get(endpoint)
+        if histogram is None:
+            histogram = table[endpoint] = _Histogram(buckets)
+        return histogram
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._latency.clear()
+            self._queries.clear()
+            self._totals.clear()
+            self._sampled.clear()
+
+    def render(self):
+        """Everything recorded so far, in Prometheus text exposition format."""
+        with self._lock:
+            requests = dict(self._requests)
+            latency = {k: (list(h.counts), h.sum, h.count) for k, h in self._latency.items()}
+            queries = {k: (list(h.counts), h.sum, h.count) for k, h in self._queries.items()}
+            totals = dict(self._totals)
+            sampled = dict(self._sampled)
+
+        lines = [
+            '# HELP http_requests_total Requests served, by endpoint, method and status.',
+            '# TYPE http_requests_total counter',
+        ]
+        for (endpoint, method, status), count in sorted(requests.items()):
+            lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",'
+                         f'status="{status}"}} {count}')
+        lines += _histogram_lines('http_request_duration_seconds',
+                                  'Request latency, by endpoint.', LATENCY_BUCKETS, latency)
+        lines += _histogram_lines('db_queries_per_request',
+                                  'SQL statements per sampled request, by endpoint.', QUERY_BUCKETS, queries)
+        lines += [
+            '# HELP sampled_requests_total Requests with a timing breakdown, by endpoint.',
+            '# TYPE sampled_requests_total counter',
+        ]
+        lines += [f'sampled_requests_total{{endpoint="{e}"}} {n}' for e, n in sorted(sampled.items())]
+        for name, help_text in (('db', 'in SQL statements'), ('render', 'rendering templates'),
+                                ('bcrypt', 'waiting on bcrypt')):
+            metric = f'{name}_seconds_total'
+            lines += [f'# HELP {metric} Time sampled requests spent {help_text}, by endpoint.',
+                      f'# TYPE {metric} counter']
+            lines += [f'{metric}{{endpoint="{endpoint}"}} {seconds:.6f}'
+                      for (kind, endpoint), seconds in sorted(totals.items()) if kind == name]
+        return '\n'.join(lines) + '\n'
+
+
+def _histogram_lines(name, help_text, buckets, series):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for endpoint, (counts, total, count) in sorted(series.items()):
+        cumulative = 0
+        for bound, n in zip(buckets, counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {count}')
+        lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {total:.6f}')
+        lines.append(f'{name}_count{{endpoint="{endpoint}"}} {count}')
+    return lines
+
+
+def server_timing(timing, elapsed):
+    parts = [f'db;dur={timing.db_time * 1000:.1f};desc="{timing.db_queries} queries"']
+    for name, seconds in sorted(timing.spans.items()):
+        parts.append(f'{name};dur={seconds * 1000:.1f}')
+    parts.append(f'total;dur={elapsed * 1000:.1f}')
+    return ', '.join(parts)
+
+
+# SQLAlchemy: every engine, ORM and Core alike. The start time rides on the
+# statement's execution context, so a statement that raises (and never reaches
+# after_cursor_execute) leaves nothing behind on the pooled connection.
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current.get() is not None:
+        context._metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    timing = _current.get()
+    start = getattr(context, '_metrics_start', None)
+    if timing is None or start is None:
+        return
+    timing.db_queries += 1
+    timing.db_time += time.perf_counter() - start
+
+
+# Raw sqlite3: database.get_db() hands out connections through this proxy
+# while a sampled request is running.
+
+class _TimedCursor:
+    def __init__(self, cursor, timing):
+        self._cursor = cursor
+        self._timing = timing
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._timing.db_queries += 1
+            self._timing.db_time += time.perf_counter() - start
+
+    def execute(self, *args):
+        self._timed(self._cursor.execute, *args)
+        return self
+
+    def executemany(self, *args):
+        self._timed(self._cursor.executemany, *args)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TimedConnection:
+    def __init__(self, connection, timing):
+        self._connection = connection
+        self._timing = timing
+
+    def cursor(self, *args):
+        return _TimedCursor(self._connection.cursor(*args), self._timing)
+
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        return self.cursor().executemany(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def wrap_connection(connection):
+    """connection, timed if the current request is sampled."""
+    timing = _current.get()
+    return connection if timing is None else TimedConnection(connection, timing)
+
+
+def _render_started(sender, template, context, **extra):
+    timing = _current.get()
+    if timing is not None:
+        timing._render_start.append(time.perf_counter())
+
+
+def _render_finished(sender, template, context, **extra):
+    timing = _current.get()
+    if timing is not None and timing._render_start:
+        timing.spans['render'] += time.perf_counter() - timing._render_start.pop()
+
+
+metrics = Metrics()
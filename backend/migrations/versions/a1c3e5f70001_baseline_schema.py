@@ -0,0 +1,126 @@
+"""baseline schema
+
+Creates the tables db.create_all() has been creating so far. Every table is
+guarded with has_table(), so running this against an existing users.db is a
+no-op apart from recording the revision.
+
+Revision ID: a1c3e5f70001
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5f70001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _missing(name):
+    return not sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if _missing('product'):
+        op.create_table(
+            'product',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=True),
+            sa.Column('description', sa.String(length=200), nullable=True),
+            sa.Column('price', sa.Float(), nullable=True),
+            sa.Column('stock_quantity', sa.Integer(), nullable=True),
+            sa.Column('image_url', sa.String(length=200), nullable=True),
+            sa.Column('category', sa.String(length=100), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if _missing('customer'):
+        op.create_table(
+            'customer',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password', sa.String(length=200), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('active', sa.Boolean(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+        )
+    if _missing('user'):
+        op.create_table(
+            'user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password', sa.String(length=200), nullable=False),
+            sa.Column('role', sa.String(length=20), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+        )
+    if _missing('order'):
+        op.create_table(
+            'order',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('customer_id', sa.Integer(), nullable=True),
+            sa.Column('status', sa.String(length=50), nullable=True),
+            sa.ForeignKeyConstraint(['customer_id'], ['customer.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if _missing('order_item'):
+        op.create_table(
+            'order_item',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('order_id', sa.Integer(), nullable=True),
+            sa.Column('product_id', sa.Integer(), nullable=True),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.Column('subtotal', sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(['order_id'], ['order.id']),
+            sa.ForeignKeyConstraint(['product_id'], ['product.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if _missing('view__products'):
+        op.create_table(
+            'view__products',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('image', sa.String(length=255), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if _missing('view_product'):
+        op.create_table(
+            'view_product',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.Text(), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('price', sa.Integer(), nullable=True),
+            sa.Column('image', sa.Text(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if _missing('stock_reservation'):
+        op.create_table(
+            'stock_reservation',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('cart_token', sa.String(length=32), nullable=False),
+            sa.Column('product_id', sa.Integer(), nullable=False),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['product_id'], ['product.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_stock_reservation_cart_token', 'stock_reservation', ['cart_token'])
+        op.create_index('ix_stock_reservation_expires_at', 'stock_reservation', ['expires_at'])
+
+
+def downgrade():
+    op.drop_table('stock_reservation')
+    op.drop_table('view_product')
+    op.drop_table('view__products')
+    op.drop_table('order_item')
+    op.drop_table('order')
+    op.drop_table('user')
+    op.drop_table('customer')
+    op.drop_table('product')
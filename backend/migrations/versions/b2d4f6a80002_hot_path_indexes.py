@@ -0,0 +1,50 @@
+"""indexes for the hot query predicates
+
+explore / customer_dashboard   product WHERE stock_quantity > 0  (partial index)
+admin_dashboard sort           product ORDER BY name|price|stock_quantity|category
+login                          user WHERE email = ? AND role = ?
+admin_customers status filter  customer WHERE active = ?
+view_customer                  order WHERE customer_id = ?
+order lines                    order_item WHERE order_id = ? / product_id = ?
+
+Revision ID: b2d4f6a80002
+Revises: a1c3e5f70001
+Create Date: 2026-10-17 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d4f6a80002'
+down_revision = 'a1c3e5f70001'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, partial WHERE or None)
+INDEXES = [
+    ('ix_product_in_stock', 'product', ['name'], 'stock_quantity > 0'),
+    ('ix_product_name', 'product', ['name'], None),
+    ('ix_product_price', 'product', ['price'], None),
+    ('ix_product_stock_quantity', 'product', ['stock_quantity'], None),
+    ('ix_product_category', 'product', ['category'], None),
+    ('ix_user_email_role', 'user', ['email', 'role'], None),
+    ('ix_customer_active', 'customer', ['active', 'created_at'], None),
+    ('ix_order_customer_id', 'order', ['customer_id', 'id'], None),
+    ('ix_order_item_order_id', 'order_item', ['order_id'], None),
+    ('ix_order_item_product_id', 'order_item', ['product_id'], None),
+]
+
+
+def upgrade():
+    # db.create_all() at startup may already have built these on a fresh database.
+    for name, table, columns, where in INDEXES:
+        kwargs = {'sqlite_where': sa.text(where)} if where else {}
+        op.create_index(name, table, columns, if_not_exists=True, **kwargs)
+    op.execute('ANALYZE')
+
+
+def downgrade():
+    for name, table, columns, where in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
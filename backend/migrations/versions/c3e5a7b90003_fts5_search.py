@@ -0,0 +1,67 @@
+"""FTS5 search tables for product and customer
+
+External-content FTS5 tables kept in sync by triggers, then populated from the
+existing rows with 'rebuild'.
+
+Revision ID: c3e5a7b90003
+Revises: b2d4f6a80002
+Create Date: 2026-10-17 09:20:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e5a7b90003'
+down_revision = 'b2d4f6a80002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        name, description, category,
+        content='product', content_rowid='id', prefix='2 3'
+    )""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF name, description, category ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+        INSERT INTO product_fts(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END""")
+
+    op.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS customer_fts USING fts5(
+        name, email,
+        content='customer', content_rowid='id', prefix='2 3'
+    )""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS customer_fts_ai AFTER INSERT ON customer BEGIN
+        INSERT INTO customer_fts(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS customer_fts_ad AFTER DELETE ON customer BEGIN
+        INSERT INTO customer_fts(customer_fts, rowid, name, email)
+        VALUES ('delete', old.id, old.name, old.email);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS customer_fts_au AFTER UPDATE OF name, email ON customer BEGIN
+        INSERT INTO customer_fts(customer_fts, rowid, name, email)
+        VALUES ('delete', old.id, old.name, old.email);
+        INSERT INTO customer_fts(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END""")
+
+    op.execute("INSERT INTO product_fts(product_fts) VALUES ('rebuild')")
+    op.execute("INSERT INTO customer_fts(customer_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    for trigger in ('product_fts_ai', 'product_fts_ad', 'product_fts_au',
+                    'customer_fts_ai', 'customer_fts_ad', 'customer_fts_au'):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS product_fts")
+    op.execute("DROP TABLE IF EXISTS customer_fts")
@@ -0,0 +1,161 @@
+"""merge customer into user
+
+Every account lives in user now; Customer is the same table filtered on
+role = 'customer'. Customers are matched to user rows by email, customers that
+only ever existed in the customer table (guest checkouts) get a user row, and
+order.customer_id is rewritten to the user id. The customer table is replaced
+by a read-only view with the same columns, and customer_fts is re-pointed at it.
+
+Revision ID: d4f6b8c10004
+Revises: c3e5a7b90003
+Create Date: 2026-10-17 10:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f6b8c10004'
+down_revision = 'c3e5a7b90003'
+branch_labels = None
+depends_on = None
+
+CUSTOMER_VIEW = (
+    "CREATE VIEW customer AS "
+    "SELECT id, name, email, password, created_at, active FROM user WHERE role = 'customer'"
+)
+
+OLD_FTS_TRIGGERS = ('customer_fts_ai', 'customer_fts_ad', 'customer_fts_au')
+
+
+def _is_table(name):
+    row = op.get_bind().exec_driver_sql(
+        "SELECT type FROM sqlite_master WHERE name = ?", (name,)).first()
+    return row is not None and row[0] == 'table'
+
+
+def _create_customer_fts(content):
+    op.execute(f"""CREATE VIRTUAL TABLE customer_fts USING fts5(
+        name, email,
+        content='{content}', content_rowid='id', prefix='2 3'
+    )""")
+
+
+def upgrade():
+    if not _is_table('customer'):
+        return  # created at head by db.create_all(); nothing to merge
+
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('user')}
+    with op.batch_alter_table('user') as batch_op:
+        if 'created_at' not in columns:
+            batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+        if 'active' not in columns:
+            batch_op.add_column(sa.Column('active', sa.Boolean(), nullable=True))
+
+    # Accounts in both tables: user keeps its password (it's the one login
+    # checks) and picks up the customer-only fields.
+    op.execute("""
+        UPDATE user SET
+            created_at = (SELECT c.created_at FROM customer c WHERE c.email = user.email),
+            active = (SELECT c.active FROM customer c WHERE c.email = user.email)
+        WHERE email IN (SELECT email FROM customer)
+    """)
+    op.execute("""
+        INSERT INTO user (name, email, password, role, created_at, active)
+        SELECT c.name, c.email, c.password, 'customer', c.created_at, c.active
+        FROM customer c
+        WHERE c.email NOT IN (SELECT email FROM user)
+    """)
+    op.execute("UPDATE user SET active = 1 WHERE active IS NULL")
+    op.execute("""
+        UPDATE "order" SET customer_id = (
+            SELECT u.id FROM customer c JOIN user u ON u.email = c.email
+            WHERE c.id = "order".customer_id
+        )
+        WHERE customer_id IS NOT NULL
+    """)
+
+    # order.customer_id now points at user.
+    with op.batch_alter_table(
+            'order', recreate='always',
+            reflect_args=[sa.Column('customer_id', sa.Integer(), sa.ForeignKey('user.id'))]):
+        pass
+
+    for trigger in OLD_FTS_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS customer_fts")
+    op.execute("DROP INDEX IF EXISTS ix_customer_active")
+    op.drop_table('customer')
+    op.execute(CUSTOMER_VIEW)
+
+    _create_customer_fts('customer')
+    op.execute("""CREATE TRIGGER customer_fts_ai AFTER INSERT ON user
+    WHEN new.role = 'customer' BEGIN
+        INSERT INTO customer_fts(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END""")
+    op.execute("""CREATE TRIGGER customer_fts_ad AFTER DELETE ON user
+    WHEN old.role = 'customer' BEGIN
+        INSERT INTO customer_fts(customer_fts, rowid, name, email)
+        VALUES ('delete', old.id, old.name, old.email);
+    END""")
+    op.execute("""CREATE TRIGGER customer_fts_au AFTER UPDATE OF name, email, role ON user BEGIN
+        INSERT INTO customer_fts(customer_fts, rowid, name, email)
+        SELECT 'delete', old.id, old.name, old.email WHERE old.role = 'customer';
+        INSERT INTO customer_fts(rowid, name, email)
+        SELECT new.id, new.name, new.email WHERE new.role = 'customer';
+    END""")
+    op.execute("INSERT INTO customer_fts(customer_fts) VALUES ('rebuild')")
+
+    op.create_index('ix_user_role', 'user', ['role'], unique=False, if_not_exists=True)
+    op.create_index('ix_user_role_active', 'user', ['role', 'active'], unique=False, if_not_exists=True)
+    op.execute("ANALYZE")
+
+
+def downgrade():
+    # Customer ids stay equal to their user ids, so orders need no rewrite.
+    for trigger in OLD_FTS_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS customer_fts")
+    op.drop_index('ix_user_role_active', table_name='user', if_exists=True)
+    op.drop_index('ix_user_role', table_name='user', if_exists=True)
+    op.execute("DROP VIEW IF EXISTS customer")
+
+    op.create_table(
+        'customer',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password', sa.String(length=200), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('active', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+    )
+    op.create_index('ix_customer_active', 'customer', ['active', 'created_at'], unique=False)
+    op.execute("""
+        INSERT INTO customer (id, name, email, password, created_at, active)
+        SELECT id, name, email, password, created_at, active FROM user WHERE role = 'customer'
+    """)
+    with op.batch_alter_table(
+            'order', recreate='always',
+            reflect_args=[sa.Column('customer_id', sa.Integer(), sa.ForeignKey('customer.id'))]):
+        pass
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('active')
+        batch_op.drop_column('created_at')
+
+    _create_customer_fts('customer')
+    op.execute("""CREATE TRIGGER customer_fts_ai AFTER INSERT ON customer BEGIN
+        INSERT INTO customer_fts(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END""")
+    op.execute("""CREATE TRIGGER customer_fts_ad AFTER DELETE ON customer BEGIN
+        INSERT INTO customer_fts(customer_fts, rowid, name, email)
+        VALUES ('delete', old.id, old.name, old.email);
+    END""")
+    op.execute("""CREATE TRIGGER customer_fts_au AFTER UPDATE OF name, email ON customer BEGIN
+        INSERT INTO customer_fts(customer_fts, rowid, name, email)
+        VALUES ('delete', old.id, old.name, old.email);
+        INSERT INTO customer_fts(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END""")
+    op.execute("INSERT INTO customer_fts(customer_fts) VALUES ('rebuild')")
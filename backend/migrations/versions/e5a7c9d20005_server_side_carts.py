@@ -0,0 +1,44 @@
+"""server-side carts
+
+cart / cart_line back cart_store.SQLiteCartStore (CART_STORE = 'sqlite').
+
+Revision ID: e5a7c9d20005
+Revises: d4f6b8c10004
+Create Date: 2026-10-17 10:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c9d20005'
+down_revision = 'd4f6b8c10004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'cart',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_cart_expires_at', 'cart', ['expires_at'], unique=False, if_not_exists=True)
+    op.create_table(
+        'cart_line',
+        sa.Column('cart_id', sa.String(length=32), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['cart_id'], ['cart.id']),
+        sa.PrimaryKeyConstraint('cart_id', 'product_id'),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_table('cart_line')
+    op.drop_index('ix_cart_expires_at', table_name='cart')
+    op.drop_table('cart')
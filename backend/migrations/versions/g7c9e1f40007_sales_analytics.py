@@ -0,0 +1,111 @@
+"""sales analytics rollups
+
+Adds order.created_at (backfilled from the outbox row where one exists; older
+orders stay undated and are left out of the daily rollups), the sales_daily,
+order_daily and inventory_snapshot rollup tables, and fills them from existing
+data.
+
+Revision ID: g7c9e1f40007
+Revises: f6b8d0e30006
+Create Date: 2026-10-17 12:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'g7c9e1f40007'
+down_revision = 'f6b8d0e30006'
+branch_labels = None
+depends_on = None
+
+COUNTED = "('Pending', 'In Progress', 'Shipped', 'Delivered')"
+
+
+def upgrade():
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('order')}
+    if 'created_at' not in columns:
+        op.add_column('order', sa.Column('created_at', sa.DateTime(), nullable=True))
+        op.execute("""
+            UPDATE "order" SET created_at = (
+                SELECT min(b.created_at) FROM order_outbox b WHERE b.order_id = "order".id
+            )
+        """)
+    op.create_index('ix_order_created_at', 'order', ['created_at'], unique=False, if_not_exists=True)
+
+    op.create_table(
+        'sales_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=True),
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'product_id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_sales_daily_product_id', 'sales_daily', ['product_id', 'day'],
+                    unique=False, if_not_exists=True)
+
+    op.create_table(
+        'order_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('day'),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        'inventory_snapshot',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=True),
+        sa.Column('category', sa.String(length=100), nullable=True),
+        sa.Column('stock_quantity', sa.Integer(), nullable=False),
+        sa.Column('units_sold', sa.Integer(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('product_id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_inventory_snapshot_stock', 'inventory_snapshot', ['stock_quantity'],
+                    unique=False, if_not_exists=True)
+
+    op.execute(f"""
+        INSERT OR REPLACE INTO sales_daily (day, product_id, category, orders, units, revenue)
+        SELECT date(o.created_at), i.product_id, p.category,
+               count(DISTINCT o.id), sum(i.quantity), sum(i.subtotal)
+        FROM "order" o JOIN order_item i ON i.order_id = o.id
+        LEFT JOIN product p ON p.id = i.product_id
+        WHERE o.created_at IS NOT NULL AND o.status IN {COUNTED}
+        GROUP BY date(o.created_at), i.product_id
+    """)
+    op.execute(f"""
+        INSERT OR REPLACE INTO order_daily (day, orders, units, revenue)
+        SELECT date(o.created_at), count(DISTINCT o.id),
+               coalesce(sum(i.quantity), 0), coalesce(sum(i.subtotal), 0)
+        FROM "order" o LEFT JOIN order_item i ON i.order_id = o.id
+        WHERE o.created_at IS NOT NULL AND o.status IN {COUNTED}
+        GROUP BY date(o.created_at)
+    """)
+    op.execute("""
+        INSERT OR REPLACE INTO inventory_snapshot
+            (product_id, name, category, stock_quantity, units_sold, refreshed_at)
+        SELECT p.id, p.name, p.category, coalesce(p.stock_quantity, 0),
+               coalesce((SELECT sum(s.units) FROM sales_daily s
+                         WHERE s.product_id = p.id AND s.day >= date('now', '-7 days')), 0),
+               datetime('now')
+        FROM product p
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_inventory_snapshot_stock', table_name='inventory_snapshot')
+    op.drop_table('inventory_snapshot')
+    op.drop_table('order_daily')
+    op.drop_index('ix_sales_daily_product_id', table_name='sales_daily')
+    op.drop_table('sales_daily')
+    op.drop_index('ix_order_created_at', table_name='order')
+    with op.batch_alter_table('order') as batch_op:
+        batch_op.drop_column('created_at')
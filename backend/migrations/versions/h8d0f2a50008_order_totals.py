@@ -0,0 +1,65 @@
+"""order totals and unit prices
+
+Orders keep the checkout quote (item_count, subtotal, discount, tax,
+grand_total) and order_item keeps the unit price charged. Existing rows are
+backfilled from order_item: unit_price is what the line actually cost
+(subtotal / quantity), not today's Product.price, and tax is recomputed at the
+5% checkout rate with no discount, which is all checkout has ever applied.
+
+Revision ID: h8d0f2a50008
+Revises: g7c9e1f40007
+Create Date: 2026-10-17 13:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'h8d0f2a50008'
+down_revision = 'g7c9e1f40007'
+branch_labels = None
+depends_on = None
+
+TAX_RATE = 0.05  # pricing.TAX_RATE when this was written
+ORDER_COLUMNS = ('item_count', 'subtotal', 'discount', 'tax', 'grand_total')
+
+
+def upgrade():
+    bind = op.get_bind()
+    order_columns = {c['name'] for c in sa.inspect(bind).get_columns('order')}
+    item_columns = {c['name'] for c in sa.inspect(bind).get_columns('order_item')}
+
+    if 'unit_price' not in item_columns:
+        op.add_column('order_item', sa.Column('unit_price', sa.Float(), nullable=True))
+        op.execute("""
+            UPDATE order_item SET unit_price =
+                CASE WHEN quantity > 0 THEN subtotal / quantity ELSE 0 END
+        """)
+        with op.batch_alter_table('order_item') as batch_op:
+            batch_op.alter_column('unit_price', existing_type=sa.Float(), nullable=False)
+
+    if 'grand_total' not in order_columns:
+        with op.batch_alter_table('order') as batch_op:
+            batch_op.add_column(sa.Column('item_count', sa.Integer(), nullable=False, server_default='0'))
+            for name in ORDER_COLUMNS[1:]:
+                batch_op.add_column(sa.Column(name, sa.Float(), nullable=False, server_default='0'))
+        op.execute("""
+            UPDATE "order" SET
+                item_count = (SELECT count(*) FROM order_item i WHERE i.order_id = "order".id),
+                subtotal = (SELECT coalesce(sum(i.subtotal), 0) FROM order_item i
+                            WHERE i.order_id = "order".id)
+        """)
+        op.execute(f"""
+            UPDATE "order" SET
+                tax = round({TAX_RATE} * subtotal, 2),
+                grand_total = subtotal + round({TAX_RATE} * subtotal, 2)
+        """)
+
+
+def downgrade():
+    with op.batch_alter_table('order') as batch_op:
+        for name in reversed(ORDER_COLUMNS):
+            batch_op.drop_column(name)
+    with op.batch_alter_table('order_item') as batch_op:
+        batch_op.drop_column('unit_price')
@@ -1,5 +1,6 @@
 
 from datetime import datetime
+from sqlalchemy import event
 from extensions import db  # This is required
 
 class View_Products(db.Model):
@@ -11,6 +12,18 @@ class View_Products(db.Model):
     # created_at = db.Column(db.DateTime, default=datetime.utcnow)
     # updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     image = db.Column(db.String(255)) 
+
+# Read by product_detail with plain SQL; declared here so create_all() (a fresh
+# `flask bootstrap`) builds it like the baseline migration does.
+view_product = db.Table(
+    'view_product',
+    db.Column('id', db.Integer, primary_key=True),
+    db.Column('name', db.Text, nullable=False),
+    db.Column('description', db.Text),
+    db.Column('price', db.Integer),
+    db.Column('image', db.Text),
+)
+
 class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100))
@@ -20,33 +33,170 @@ class Product(db.Model):
     image_url = db.Column(db.String(200))
     category = db.Column(db.String(100))
 
+    __table_args__ = (
+        # explore / customer_dashboard only list what's in stock
+        db.Index('ix_product_in_stock', 'name', sqlite_where=db.text('stock_quantity > 0')),
+        # admin_dashboard can sort by any of these
+        db.Index('ix_product_name', 'name'),
+        db.Index('ix_product_price', 'price'),
+        db.Index('ix_product_stock_quantity', 'stock_quantity'),
+        db.Index('ix_product_category', 'category'),
+    )
 
-class Customer(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(50), nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    password = db.Column(db.String(200), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    active = db.Column(db.Boolean, default=True)
 
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'))
+    customer_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     status = db.Column(db.String(50), default='Pending')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Snapshot of the checkout quote (pricing.price_cart) at placement, so
+    # listings and reports never re-sum order_item or re-read Product.price.
+    item_count = db.Column(db.Integer, nullable=False, default=0)  # order lines
+    subtotal = db.Column(db.Float, nullable=False, default=0)
+    discount = db.Column(db.Float, nullable=False, default=0)
+    tax = db.Column(db.Float, nullable=False, default=0)
+    grand_total = db.Column(db.Float, nullable=False, default=0)
 
     customer = db.relationship('Customer', backref='orders')
+    items = db.relationship('OrderItem', backref='order', order_by='OrderItem.id')
+
+    __table_args__ = (
+        db.Index('ix_order_customer_id', 'customer_id', 'id'),
+        db.Index('ix_order_created_at', 'created_at'),
+    )
 
 class User(db.Model):
+    # One row per account, admins and customers alike. Customer below is the
+    # same table filtered on role, so Customer.query only ever sees customers.
     __tablename__ = 'user'
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(200), nullable=False)
     role = db.Column(db.String(20), nullable=False)  # admin or customer
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    active = db.Column(db.Boolean, default=True)
+
+    __mapper_args__ = {
+        'polymorphic_on': role,
+        'polymorphic_identity': 'admin',  # any row that isn't a customer
+    }
+
+    __table_args__ = (
+        db.Index('ix_user_email_role', 'email', 'role'),
+        # admin customer list: keyset pages walk (role, id); the active filter
+        # narrows on (role, active)
+        db.Index('ix_user_role', 'role'),
+        db.Index('ix_user_role_active', 'role', 'active'),
+    )
+
+
+class Customer(User):
+    __mapper_args__ = {'polymorphic_identity': 'customer'}
+
+
+# Raw SQL and reports written against the old customer table keep working.
+CUSTOMER_VIEW_DDL = (
+    "CREATE VIEW IF NOT EXISTS customer AS "
+    "SELECT id, name, email, password, created_at, active FROM user WHERE role = 'customer'"
+)
+
+
+@event.listens_for(User.__table__, 'after_create')
+def _create_customer_view(target, connection, **kw):
+    connection.exec_driver_sql(CUSTOMER_VIEW_DDL)
+
+
+@event.listens_for(User.__table__, 'before_drop')
+def _drop_customer_view(target, connection, **kw):
+    connection.exec_driver_sql("DROP VIEW IF EXISTS customer")
+
 
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('order.id'))
-    product_id = db.Column(db.Integer, db.ForeignKey('product.id'))
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), index=True)
     quantity = db.Column(db.Integer, nullable=False)
+    unit_price = db.Column(db.Float, nullable=False)  # Product.price when the order was placed
     subtotal = db.Column(db.Float, nullable=False)
+
+    product = db.relationship('Product')
+
+
+class StockReservation(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    cart_token = db.Column(db.String(32), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class Cart(db.Model):
+    # Server-side carts (cart_store.SQLiteCartStore). The browser only holds id.
+    id = db.Column(db.String(32), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class CartLine(db.Model):
+    cart_id = db.Column(db.String(32), db.ForeignKey('cart.id'), primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False)
+
+
+class OrderOutbox(db.Model):
+    # Durable intake queue: place_order writes the order and one row here in the
+    # same commit; order_queue workers do the stock work later.
+    __tablename__ = 'order_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON: {"lines": [[pid, qty], ...], "cart_id": ...}
+    state = db.Column(db.String(20), nullable=False, default='queued')  # queued/processing/done/failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+
+    __table_args__ = (
+        db.Index('ix_order_outbox_state', 'state', 'id'),
+    )
+
+
+class SalesDaily(db.Model):
+    # Rollup kept by analytics.record_orders(); one row per day and product.
+    # No FK on product_id: sales history outlives a deleted product.
+    __tablename__ = 'sales_daily'
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    category = db.Column(db.String(100))
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_sales_daily_product_id', 'product_id', 'day'),
+    )
+
+
+class OrderDaily(db.Model):
+    # Per-day order totals kept next to SalesDaily by analytics.record_orders().
+    __tablename__ = 'order_daily'
+    day = db.Column(db.Date, primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+
+class InventorySnapshot(db.Model):
+    # Stock per product as of refreshed_at, plus recent sales velocity, for
+    # the dashboard's low-stock alerts. See analytics.refresh_inventory().
+    __tablename__ = 'inventory_snapshot'
+    product_id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100))
+    category = db.Column(db.String(100))
+    stock_quantity = db.Column(db.Integer, nullable=False, default=0)
+    units_sold = db.Column(db.Integer, nullable=False, default=0)
+    refreshed_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_inventory_snapshot_stock', 'stock_quantity'),
+    )
@@ -0,0 +1,96 @@
+# order_history.py
+# Read side of orders for the admin screens and customer history. Every loader
+# here runs a fixed number of queries however many orders or items it returns:
+# customers are joined in, items are fetched with one selectin query, and the
+# per-order totals are columns on order itself, written at placement.
+from sqlalchemy.orm import joinedload, selectinload
+
+from extensions import db
+from models import Customer, Order, OrderItem, OrderOutbox
+import analytics
+import fts
+import keyset
+import order_queue
+
+STATUSES = ('Queued', 'Pending', 'In Progress', 'Shipped', 'Delivered', 'Cancelled')
+
+# The dashboard's filter sends slugs.
+STATUS_SLUGS = {status.lower().replace(' ', ''): status for status in STATUSES}
+
+
+def summaries(status=None, customer=None, customer_id=None, cursor=None, limit=20):
+    """A keyset page of orders, newest first: (orders, next_cursor).
+
+    Each order has .customer loaded.
+    """
+    query = Order.query.options(joinedload(Order.customer))
+    if status:
+        query = query.filter(Order.status == STATUS_SLUGS.get(status, status))
+    if customer_id is not None:
+        query = query.filter(Order.customer_id == customer_id)
+    if customer:
+        matches, _ = fts.match_customers(Customer.query, customer)
+        query = query.filter(Order.customer_id.in_(matches.with_entities(Customer.id)))
+    return keyset.paginate(query, Order.id, Order.id, cursor, 'desc', limit)
+
+
+def detail(order_id):
+    """One order with its customer, items and their products, or None."""
+    return (Order.query
+            .options(joinedload(Order.customer),
+                     selectinload(Order.items).joinedload(OrderItem.product))
+            .filter(Order.id == order_id)
+            .one_or_none())
+
+
+def set_status(order, status):
+    """Change order.status, keeping the sales rollups in step. Does not commit.
+
+    Queued belongs to the order workers: an order can't be moved into it, or
+    out of it before its stock has been checked.
+    """
+    if status not in STATUSES:
+        raise ValueError(f'Unknown status {status!r}.')
+    if order.status == order_queue.QUEUED:
+        raise ValueError(f'Order #{order.id} is still queued for its stock check.')
+    if status == order_queue.QUEUED:
+        raise ValueError('Orders cannot be put back in the queue.')
+    old, order.status = order.status, status
+    db.session.flush()
+    analytics.status_changed(order.id, old, status)
+
+
+def delete(order):
+    """Delete order with its items and outbox rows. Does not commit."""
+    if order.status in analytics.COUNTED:
+        analytics.record_orders([order.id], -1)
+    OrderItem.query.filter_by(order_id=order.id).delete(synchronize_session=False)
+    OrderOutbox.query.filter_by(order_id=order.id).delete(synchronize_session=False)
+    db.session.delete(order)
+
+
+def summary_json(order):
+    return {
+        'id': order.id,
+        'status': order.status,
+        'customer': {'id': order.customer.id, 'name': order.customer.name,
+                     'email': order.customer.email} if order.customer else None,
+        'item_count': order.item_count,
+        'subtotal': order.subtotal,
+        'discount': order.discount,
+        'tax': order.tax,
+        'grand_total': order.grand_total,
+    }
+
+
+def detail_json(order):
+    data = summary_json(order)
+    data['items'] = [{
+        'id': item.id,
+        'product_id': item.product_id,
+        'product_name': item.product.name if item.product else None,
+        'quantity': item.quantity,
+        'unit_price': item.unit_price,
+        'subtotal': item.subtotal,
+    } for item in order.items]
+    return data
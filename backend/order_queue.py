@@ -0,0 +1,219 @@
+# order_queue.py
+# Order intake off the request path. place_order() writes the order, its items
+# and an order_outbox row in one commit and returns; workers then claim outbox
+# rows in batches, turn the cart's reservations into real stock deductions, move
+# Order.status on and send the notifications.
+#
+# Claiming is a single UPDATE ... RETURNING, so several workers (threads here,
+# or `flask order-worker` processes) never take the same row. A worker that dies
+# mid-batch leaves rows in 'processing'; requeue_stale() hands them back.
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import text, update
+
+from extensions import db
+from models import Order, OrderOutbox
+import analytics
+import inventory
+
+log = logging.getLogger(__name__)
+
+# Order.status values the pipeline sets. 'Pending' is where the admin
+# dashboard's fulfilment flow (In Progress / Shipped / Delivered) picks up.
+QUEUED = 'Queued'
+CONFIRMED = 'Pending'
+CANCELLED = 'Cancelled'
+
+MAX_ATTEMPTS = 5
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+_CLAIM = text(
+    "UPDATE order_outbox SET state = 'processing', claimed_at = :now, attempts = attempts + 1 "
+    "WHERE id IN (SELECT id FROM order_outbox WHERE state = 'queued' ORDER BY id LIMIT :limit) "
+    "RETURNING id, order_id, payload, attempts"
+)
+
+
+def enqueue(order, lines, cart_id=None):
+    """Queue stock work for order. lines is [(product_id, qty)]. Does not commit."""
+    order.status = QUEUED
+    db.session.add(OrderOutbox(order_id=order.id, payload=json.dumps(
+        {'lines': [[pid, qty] for pid, qty in lines], 'cart_id': cart_id})))
+    if cart_id:
+        # Keep the cart's stock held until a worker gets to it.
+        inventory.hold(cart_id, current_app.config['CART_RESERVATION_TTL'])
+
+
+def _finish(job_ids, state, error=None):
+    if job_ids:
+        (OrderOutbox.query.filter(OrderOutbox.id.in_(job_ids))
+         .update({'state': state, 'last_error': error}, synchronize_session=False))
+
+
+def process_batch(limit=50):
+    """Claim and process up to limit queued orders. Returns how many were claimed."""
+    try:
+        jobs = db.session.execute(_CLAIM, {'now': datetime.utcnow(), 'limit': limit}).all()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    if not jobs:
+        return 0
+
+    statuses = {}  # order id -> new status
+    try:
+        # First write of the batch transaction; every job then runs in a
+        # savepoint inside it, so one sold-out order doesn't undo the others.
+        _finish([job.id for job in jobs], 'done')
+        for job in jobs:
+            payload = json.loads(job.payload)
+            lines = [(pid, qty) for pid, qty in payload['lines']]
+            try:
+                with db.session.begin_nested():
+                    inventory.commit_lines(lines, payload.get('cart_id'))
+                statuses[job.order_id] = CONFIRMED
+            except inventory.OutOfStock as e:
+                log.info("order %s cancelled: %s", job.order_id, e)
+                statuses[job.order_id] = CANCELLED
+            except Exception as e:
+                log.exception("order %s failed", job.order_id)
+                _finish([job.id], 'failed' if job.attempts >= MAX_ATTEMPTS else 'queued', repr(e))
+        changed = {status: _resolve([oid for oid, s in statuses.items() if s == status], status)
+                   for status in (CONFIRMED, CANCELLED)}
+        analytics.record_orders(changed[CONFIRMED])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    for status, order_ids in changed.items():
+        for order_id in order_ids:
+            notify(order_id, status)
+    return len(jobs)
+
+
+def _resolve(order_ids, status):
+    """Move the still-Queued orders among order_ids to status; returns the ids
+    that changed. An order that has left Queued meanwhile keeps its status."""
+    if not order_ids:
+        return []
+    return db.session.execute(
+        update(Order)
+        .where(Order.id.in_(order_ids), Order.status == QUEUED)
+        .values(status=status)
+        .returning(Order.id)
+    ).scalars().all()
+
+
+def notify(order_id, status):
+    # Stand-in for the customer email/SMS; runs after the batch has committed.
+    log.info("order %s is now %s", order_id, status)
+
+
+def requeue_stale(timeout=CLAIM_TIMEOUT):
+    """Return rows claimed by a worker that never finished them. Commits."""
+    try:
+        count = (OrderOutbox.query
+                 .filter(OrderOutbox.state == 'processing',
+                         OrderOutbox.claimed_at < datetime.utcnow() - timeout)
+                 .update({'state': 'queued'}, synchronize_session=False))
+        db.session.commit()
+        return count
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def backlog():
+    """{state: count} over the outbox."""
+    rows = (db.session.query(OrderOutbox.state, db.func.count())
+            .group_by(OrderOutbox.state).all())
+    return dict(rows)
+
+
+class OrderWorkers:
+    """A pool of worker threads draining the outbox for one app."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.size = 0
+        self.batch_size = 50
+        self.poll_interval = 1.0
+        self._threads = []
+        self._pid = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        # 0 = nothing in-process; run `flask order-worker` instead.
+        self.size = app.config.setdefault('ORDER_WORKERS', 1)
+        self.batch_size = app.config.setdefault('ORDER_BATCH_SIZE', 50)
+        self.poll_interval = app.config.setdefault('ORDER_POLL_INTERVAL', 1.0)
+        app.extensions['order_workers'] = self
+
+    def start(self, size=None):
+        """Start the threads in this process if they aren't running yet."""
+        size = self.size if size is None else size
+        with self._lock:
+            if self._pid == os.getpid() and any(t.is_alive() for t in self._threads):
+                return
+            self._stop.clear()
+            self._threads = [threading.Thread(target=self._run, name=f'order-worker-{i}', daemon=True)
+                             for i in range(size)]
+            self._pid = os.getpid()
+            for thread in self._threads:
+                thread.start()
+
+    def wake(self):
+        """Nudge idle workers after an enqueue, starting them on first use."""
+        if self.size:
+            self.start()
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def drain(self):
+        """Process until the queue is empty, on the calling thread."""
+        total = 0
+        with self.app.app_context():
+            while True:
+                claimed = process_batch(self.batch_size)
+                if not claimed:
+                    return total
+                total += claimed
+
+    def _run(self):
+        last_requeue = 0.0
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    if time.monotonic() - last_requeue > CLAIM_TIMEOUT.total_seconds():
+                        last_requeue = time.monotonic()
+                        requeue_stale()
+                    claimed = process_batch(self.batch_size)
+                    analytics.maybe_refresh()
+            except Exception:
+                log.exception("order worker batch failed")
+                claimed = 0
+            if not claimed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+workers = OrderWorkers()
@@ -0,0 +1,56 @@
+# page_cache.py
+# Whole-response cache for anonymous storefront pages. The key includes the
+# catalog version, so any catalog write (see catalog_cache) retires every
+# cached page at once. Responses carry a strong ETag and Last-Modified, and a
+# matching If-None-Match / If-Modified-Since gets a bodyless 304.
+import hashlib
+import time
+from functools import wraps
+
+from flask import Response, current_app, request
+from werkzeug.http import http_date
+
+from catalog_cache import LRUCache, catalog
+
+pages = LRUCache(maxsize=512, ttl=600)
+
+
+def _personalized():
+    # A JWT cookie means the page may greet the user by name (index does).
+    return bool(request.cookies.get(current_app.config['JWT_ACCESS_COOKIE_NAME']))
+
+
+def _key():
+    args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    return f'page:{catalog.version()}:{request.endpoint}:{request.path}?{args}'
+
+
+def cached_page(view):
+    """Serve a GET view from the page cache unless the visitor is logged in."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET' or _personalized():
+            return view(*args, **kwargs)
+
+        key = _key()
+        entry = pages.get(key)
+        if entry is None:
+            rv = current_app.make_response(view(*args, **kwargs))
+            if rv.status_code != 200 or rv.direct_passthrough:
+                return rv
+            body = rv.get_data()
+            entry = {
+                'body': body,
+                'mimetype': rv.mimetype,
+                'etag': hashlib.sha256(body).hexdigest()[:32],
+                'last_modified': time.time(),
+            }
+            pages.set(key, entry)
+
+        response = Response(entry['body'], mimetype=entry['mimetype'])
+        response.set_etag(entry['etag'])
+        response.headers['Last-Modified'] = http_date(entry['last_modified'])
+        response.headers['Cache-Control'] = 'public, no-cache'  # always revalidate
+        response.vary.add('Cookie')
+        return response.make_conditional(request)
+    return wrapper
@@ -0,0 +1,132 @@
+# passwords.py
+# bcrypt off the request threads. Hashing and checking run in a small process
+# pool; a semaphore caps how many calls may be queued or running, and callers
+# that can't get a slot quickly get HasherBusy (turned into a 429 by app.py)
+# instead of piling up behind a login storm.
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+import metrics
+
+# Cost factor per deployment environment (APP_ENV). BCRYPT_LOG_ROUNDS, if set,
+# wins over the table.
+ROUNDS_BY_ENV = {
+    'production': 12,
+    'staging': 12,
+    'development': 10,
+    'testing': 4,
+}
+
+
+class HasherBusy(Exception):
+    """Every hashing slot is taken; the client should retry shortly."""
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check(hashed, password):
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    except ValueError:  # not a bcrypt hash (e.g. the 'guest' placeholder)
+        return False
+
+
+def hash_rounds(hashed):
+    """Cost factor encoded in a '$2b$12$...' hash, or None if unparseable."""
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def _mp_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class PasswordHasher:
+    def __init__(self, app=None):
+        self.rounds = 12
+        self.workers = 0
+        self.max_pending = 0
+        self.acquire_timeout = 0.1
+        self.call_timeout = 10
+        self._pool = None
+        self._pool_pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        env = app.config.setdefault('APP_ENV', os.environ.get('APP_ENV', 'production'))
+        rounds = os.environ.get('BCRYPT_LOG_ROUNDS') or ROUNDS_BY_ENV.get(env, 12)
+        self.rounds = int(app.config.setdefault('BCRYPT_LOG_ROUNDS', int(rounds)))
+        # 0 workers = hash inline on the calling thread (CLI, tests).
+        self.workers = app.config.setdefault('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1))
+        self.max_pending = app.config.setdefault('PASSWORD_HASH_MAX_PENDING', max(1, self.workers) * 2)
+        self.acquire_timeout = app.config.setdefault('PASSWORD_HASH_ACQUIRE_TIMEOUT', 0.1)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        app.extensions['passwords'] = self
+
+    def _executor(self):
+        # Created lazily and per process, so a pre-forking server never
+        # inherits the parent's pool. The caller is a threaded worker (request
+        # and order-worker threads), so children come from a forkserver rather
+        # than a fork that could copy a lock another thread holds.
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context())
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, fn, *args, inline=False):
+        with metrics.timed('bcrypt'):
+            return self._call(fn, *args, inline=inline)
+
+    def _call(self, fn, *args, inline=False):
+        if inline or not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise HasherBusy()
+        try:
+            future = self._executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        return future.result(timeout=self.call_timeout)
+
+    def hash(self, password, inline=False):
+        return self._run(_hash, password, self.rounds, inline=inline)
+
+    def check(self, hashed, password):
+        if not hashed:
+            return False
+        return self._run(_check, hashed, password)
+
+    def needs_rehash(self, hashed):
+        """True when the stored hash was made with a different cost factor."""
+        rounds = hash_rounds(hashed)
+        return rounds is not None and rounds != self.rounds
+
+    def pending(self):
+        """Calls currently queued or running in the pool."""
+        if self._slots is None:
+            return 0
+        return self.max_pending - self._slots._value
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+passwords = PasswordHasher()
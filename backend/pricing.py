@@ -0,0 +1,43 @@
+# pricing.py
+from models import Product
+
+TAX_RATE = 0.05
+
+
+def load_products(product_ids):
+    """Fetch every product in the cart with a single IN query, keyed by id."""
+    ids = {int(pid) for pid in product_ids}
+    if not ids:
+        return {}
+    return {p.id: p for p in Product.query.filter(Product.id.in_(ids)).all()}
+
+
+def price_cart(cart, tax_rate=TAX_RATE):
+    """Price a session cart ({'<product_id>': qty}) in one pass.
+
+    Lines whose product no longer exists are dropped instead of raising.
+    """
+    products = load_products(cart.keys())
+    items = []
+    total = 0
+
+    for pid_str, qty in cart.items():
+        product = products.get(int(pid_str))
+        if product is None:
+            continue
+        subtotal = product.price * qty
+        items.append({'product': product, 'quantity': qty, 'unit_price': product.price,
+                      'subtotal': subtotal})
+        total += subtotal
+
+    discount = 0
+    tax = round(tax_rate * total, 2)
+    grand_total = total - discount + tax
+
+    return {
+        'items': items,
+        'total': total,
+        'discount': discount,
+        'tax': tax,
+        'grand_total': grand_total,
+    }
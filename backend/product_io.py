@@ -0,0 +1,171 @@
+# product_io.py
+# Bulk catalog import/export. Uploads are parsed as a stream (csv.DictReader or
+# one JSON object per line) and written in chunks: each chunk is one executemany
+# upsert in its own transaction, so a 100k-row file never sits in memory and a
+# bad row costs an error entry, not the whole import. Exports stream through
+# exports.py for the same reason.
+import csv
+import io
+import json
+
+from sqlalchemy import select, text
+from sqlalchemy.exc import DBAPIError
+
+from models import Product
+import exports
+
+FIELDS = ('id', 'name', 'description', 'price', 'stock_quantity', 'image_url', 'category')
+FORMATS = ('csv', 'ndjson')
+CHUNK_SIZE = 1000
+MAX_ERRORS = 1000  # per-row errors kept in the report; the count keeps going
+NAME_REQUIRED = 'name is required for new products'
+
+# Missing or empty fields leave the stored value alone on update, so a file
+# with just id,price is a price change. Rows without an id are new products.
+_UPSERT = text(
+    "INSERT INTO product (id, name, description, price, stock_quantity, image_url, category) "
+    "VALUES (:id, :name, :description, :price, :stock_quantity, :image_url, :category) "
+    "ON CONFLICT(id) DO UPDATE SET "
+    + ", ".join(f"{f} = COALESCE(excluded.{f}, product.{f})" for f in FIELDS[1:])
+)
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.written = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {'rows': self.rows, 'written': self.written, 'failed': self.failed,
+                'errors': self.errors, 'errors_truncated': self.failed > len(self.errors)}
+
+
+def guess_format(filename, default='csv'):
+    if filename and filename.rsplit('.', 1)[-1].lower() in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    return default
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def clean_row(raw):
+    """Validate one parsed record into upsert parameters; raises ValueError."""
+    if not isinstance(raw, dict):
+        raise ValueError('expected an object')
+    row = {}
+    for field in FIELDS:
+        value = raw.get(field)
+        row[field] = None if _blank(value) else value
+    if row['id'] is not None:
+        row['id'] = int(row['id'])
+        if row['id'] <= 0:
+            raise ValueError('id must be positive')
+    elif row['name'] is None:
+        raise ValueError(NAME_REQUIRED)
+    if row['price'] is not None:
+        row['price'] = float(row['price'])
+        if row['price'] < 0:
+            raise ValueError('price must not be negative')
+    if row['stock_quantity'] is not None:
+        row['stock_quantity'] = int(row['stock_quantity'])
+        if row['stock_quantity'] < 0:
+            raise ValueError('stock_quantity must not be negative')
+    for field in ('name', 'description', 'image_url', 'category'):
+        if row[field] is not None:
+            row[field] = str(row[field]).strip()
+    return row
+
+
+def parse(stream, fmt):
+    """Yield (line_number, record_or_exception) from a binary or text stream."""
+    if isinstance(stream, (io.TextIOBase, io.StringIO)):
+        text_stream = stream
+    else:
+        text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == 'ndjson':
+        for number, line in enumerate(text_stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                yield number, e
+    else:
+        raise ValueError(f'unknown format {fmt!r}; expected one of {FORMATS}')
+
+
+def import_products(engine, stream, fmt='csv', chunk_size=CHUNK_SIZE):
+    """Upsert every valid record from stream; returns an ImportReport."""
+    report = ImportReport()
+    chunk = []
+
+    def flush():
+        _drop_unnamed_inserts(engine, chunk, report)
+        if not chunk:
+            return
+        try:
+            with engine.begin() as connection:
+                connection.execute(_UPSERT, [row for _, row in chunk])  # executemany
+            report.written += len(chunk)
+        except DBAPIError:
+            # Something in the chunk was refused; redo it row by row to say which.
+            for line, row in chunk:
+                try:
+                    with engine.begin() as connection:
+                        connection.execute(_UPSERT, row)
+                    report.written += 1
+                except DBAPIError as e:
+                    report.error(line, str(e.orig))
+        chunk.clear()
+
+    for line, record in parse(stream, fmt):
+        report.rows += 1
+        if isinstance(record, Exception):
+            report.error(line, f'invalid JSON: {record}')
+            continue
+        try:
+            chunk.append((line, clean_row(record)))
+        except (TypeError, ValueError) as e:
+            report.error(line, str(e))
+            continue
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    return report
+
+
+def _drop_unnamed_inserts(engine, chunk, report):
+    # A row with an id but no name is only an update if that id exists;
+    # otherwise the upsert would insert a product with no name.
+    ids = {row['id'] for _, row in chunk if row['name'] is None}
+    if not ids:
+        return
+    with engine.connect() as connection:
+        existing = set(connection.scalars(select(Product.id).where(Product.id.in_(ids))))
+    kept = []
+    for line, row in chunk:
+        if row['name'] is None and row['id'] not in existing:
+            report.error(line, NAME_REQUIRED)
+        else:
+            kept.append((line, row))
+    chunk[:] = kept
+
+
+def export_rows(connection, batch_size=CHUNK_SIZE):
+    """Every product as a dict, fetched batch_size rows at a time."""
+    statement = select(*(getattr(Product, f) for f in FIELDS)).order_by(Product.id)
+    return exports.stream_rows(connection, statement, batch_size)
@@ -0,0 +1,79 @@
+# query_plans.py
+# EXPLAIN QUERY PLAN guard for the storefront/admin hot paths. tests/test_query_plans.py
+# runs it with the test suite; `flask check-query-plans` prints the plans and
+# exits non-zero if any of these queries falls back to a full table scan
+# or a temp B-tree sort. By default the plans come from a scratch in-memory
+# database built from the models, so the result depends on the declared indexes
+# and not on whatever statistics the local users.db happens to have.
+import re
+
+from sqlalchemy import create_engine, select, text
+
+from extensions import db
+from models import Product, Customer, Order, User, OrderItem
+
+SORTABLE_PRODUCT_COLUMNS = ('name', 'price', 'stock_quantity', 'category')
+_SORT_ALIASES = {'stock': 'stock_quantity'}  # what the admin sort <select> sends
+
+_FULL_SCAN = re.compile(r'^SCAN (\S+)$')
+
+
+def resolve_product_sort(sort_by):
+    """Map a ?sort= value onto an indexed Product column name (default: name)."""
+    sort_by = _SORT_ALIASES.get(sort_by, sort_by)
+    return sort_by if sort_by in SORTABLE_PRODUCT_COLUMNS else 'name'
+
+
+def hot_queries():
+    """(label, statement) pairs for the predicates the routes filter on."""
+    queries = [
+        ('explore: in-stock products',
+         select(Product).where(Product.stock_quantity > 0).order_by(Product.name)),
+        ('login: user by email + role',
+         select(User).where(User.email == 'someone@example.com', User.role == 'customer')),
+        ('admin_customers: active filter', select(Customer).where(Customer.active == True)),  # noqa: E712
+        ('admin_customers: keyset page', select(Customer).order_by(Customer.id).limit(50)),
+        ('checkout: customer by email', select(Customer).where(Customer.email == 'someone@example.com')),
+        ('view_customer: orders by customer', select(Order).where(Order.customer_id == 1)),
+        ('order items by order', select(OrderItem).where(OrderItem.order_id == 1)),
+    ]
+    for name in SORTABLE_PRODUCT_COLUMNS:
+        column = getattr(Product, name)
+        queries.append((f'admin_dashboard: sort by {name}',
+                        select(Product).order_by(column.asc()).limit(10)))
+    return queries
+
+
+def explain(statement, connection):
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    rows = connection.execute(text('EXPLAIN QUERY PLAN ' + sql)).fetchall()
+    return [row[-1] for row in rows]
+
+
+def problems(plan):
+    found = []
+    for detail in plan:
+        if _FULL_SCAN.match(detail):
+            found.append(f'full table scan ({detail})')
+        elif 'USE TEMP B-TREE' in detail:
+            found.append(detail.lower())
+    return found
+
+
+def check_all(live=False):
+    """Returns [(label, plan, problems)] for every hot query.
+
+    live=True explains against the app's own database instead of a scratch one.
+    """
+    if live:
+        engine = db.engine
+    else:
+        engine = create_engine('sqlite://')
+        db.metadata.create_all(engine)
+
+    results = []
+    with engine.connect() as connection:
+        for label, statement in hot_queries():
+            plan = explain(statement, connection)
+            results.append((label, plan, problems(plan)))
+    return results
@@ -0,0 +1,45 @@
+# routing.py
+# Views, error handlers and CLI commands declared once at import time and
+# registered on each app create_app() builds. app.py decorates its functions
+# with routes.route()/routes.errorhandler()/routes.command() instead of the
+# module-level app, and init_app() replays them with the same endpoint names,
+# so url_for() and the templates are unchanged.
+import click
+from flask import cli as flask_cli
+
+
+class RouteTable:
+    def __init__(self):
+        self._rules = []     # (rule, endpoint, view, options)
+        self._handlers = []  # (exception class or code, handler)
+        self._commands = []  # click commands
+
+    def route(self, rule, **options):
+        """Same arguments as Flask.route()."""
+        def decorator(view):
+            self._rules.append((rule, options.pop('endpoint', None), view, options))
+            return view
+        return decorator
+
+    def errorhandler(self, code_or_exception):
+        def decorator(handler):
+            self._handlers.append((code_or_exception, handler))
+            return handler
+        return decorator
+
+    def command(self, name=None, with_appcontext=True, **kwargs):
+        """Same arguments as app.cli.command(). The click command is built here,
+        once; click consumes the function's options when it does."""
+        def decorator(f):
+            command = click.command(name, **kwargs)(flask_cli.with_appcontext(f) if with_appcontext else f)
+            self._commands.append(command)
+            return command
+        return decorator
+
+    def init_app(self, app):
+        for rule, endpoint, view, options in self._rules:
+            app.add_url_rule(rule, endpoint, view, **options)
+        for code_or_exception, handler in self._handlers:
+            app.register_error_handler(code_or_exception, handler)
+        for command in self._commands:
+            app.cli.add_command(command)
@@ -0,0 +1,120 @@
+# serve.py
+# Production serving: `flask serve` runs the app under gunicorn's pre-forking
+# master with a pool of threaded (gthread) workers. The app is built once in
+# the master (preload) and forked, so workers share its memory copy-on-write;
+# anything that must not be shared across processes (DB connections, the
+# bcrypt pool, order worker threads) is created per worker after the fork.
+#
+# Workers are recycled after max_requests (with jitter, so they don't all
+# restart together) and, on SIGTERM, finish in-flight requests for up to
+# graceful_timeout before exiting.
+#
+# State that lives in process memory is not shared between workers: prepare()
+# moves carts to SQLite when there is more than one, and warns when the catalog
+# and page caches are still per process.
+import os
+
+from cart_store import carts
+from extensions import db
+from passwords import passwords
+import order_queue
+import page_cache
+
+MAX_REQUESTS = 2000
+GRACEFUL_TIMEOUT = 30  # seconds
+TIMEOUT = 60  # seconds a worker may go silent before the master kills it
+
+
+def default_workers(cpus=None):
+    # The usual 2n+1: while one worker waits on SQLite or a client, another
+    # has the CPU. WEB_CONCURRENCY is the conventional override.
+    cpus = cpus or os.cpu_count() or 1
+    return int(os.environ.get('WEB_CONCURRENCY', cpus * 2 + 1))
+
+
+def default_threads(cpus=None):
+    # Threads cover slow clients and I/O inside a worker; the GIL caps what
+    # more than a handful buys for a CPU-bound Flask app.
+    cpus = cpus or os.cpu_count() or 1
+    return int(os.environ.get('WEB_THREADS', min(8, 2 * cpus)))
+
+
+def prepare(app, workers):
+    """Adjust app for `workers` processes. Returns warnings for the operator."""
+    warnings = []
+    if workers <= 1:
+        return warnings
+    if app.config['CART_STORE'] == 'memory':
+        # A memory cart only exists in the worker that created it; the next
+        # request may land on another one and find it empty.
+        app.config['CART_STORE'] = 'sqlite'
+        carts.init_app(app)
+        warnings.append(f"CART_STORE=memory can't be shared by {workers} workers; using CART_STORE=sqlite.")
+    if not app.config.get('CATALOG_CACHE_BACKEND'):
+        warnings.append(
+            f"CATALOG_CACHE_BACKEND is not set, so each of the {workers} workers keeps its own catalog "
+            f"and page cache. After an admin edit the other workers serve stale pages for up to "
+            f"{max(app.config['CATALOG_CACHE_TTL'], page_cache.pages.ttl)}s. "
+            f"Set CATALOG_CACHE_BACKEND to a Redis URL, or serve with --workers 1.")
+    return warnings
+
+
+def _post_fork(app):
+    def post_fork(server, worker):
+        # Never reuse a connection the master may have opened: drop the
+        # inherited pool (without closing the parent's sockets/handles) so this
+        # worker connects on its own first query.
+        with app.app_context():
+            db.engine.dispose(close=False)
+    return post_fork
+
+
+def _worker_exit(app):
+    def worker_exit(server, worker):
+        order_queue.workers.stop(timeout=GRACEFUL_TIMEOUT)
+        passwords.shutdown()
+        with app.app_context():
+            db.engine.dispose()
+    return worker_exit
+
+
+def options(app, bind='127.0.0.1:8000', workers=None, threads=None,
+            max_requests=MAX_REQUESTS, graceful_timeout=GRACEFUL_TIMEOUT, access_log=False):
+    """gunicorn settings for serving app."""
+    return {
+        'bind': bind,
+        'workers': workers or default_workers(),
+        'worker_class': 'gthread',
+        'threads': threads or default_threads(),
+        'preload_app': True,
+        'max_requests': max_requests,
+        'max_requests_jitter': max_requests // 10,
+        'graceful_timeout': graceful_timeout,
+        'timeout': TIMEOUT,
+        'keepalive': 5,
+        'accesslog': '-' if access_log else None,
+        'post_fork': _post_fork(app),
+        'worker_exit': _worker_exit(app),
+    }
+
+
+def run(app, **kwargs):
+    """Serve app until the master is stopped. Needs the gunicorn package."""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError as e:
+        raise RuntimeError("`flask serve` needs gunicorn: pip install gunicorn") from e
+
+    class Server(BaseApplication):
+        def __init__(self, settings):
+            self.settings = settings
+            super().__init__()
+
+        def load_config(self):
+            for name, value in self.settings.items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            return app
+
+    Server(options(app, **kwargs)).run()
@@ -0,0 +1,273 @@
+# slow_queries.py
+# Statements slower than SLOW_QUERY_MS, kept with enough context to act on:
+#   fingerprint  the SQL with literals and placeholders folded to ?, so the same
+#                query from different call sites groups together
+#   params       the shape of the bound parameters (types, string lengths),
+#                never the values; these are emails, hashes and addresses
+#   route        the endpoint that ran it, or the thread for CLI/worker code
+#   plan         EXPLAIN QUERY PLAN, captured on the spot from the same
+#                connection
+# Entries go into an in-memory ring buffer (SLOW_QUERY_BUFFER, newest last) for
+# /admin/slow-queries, and are appended as NDJSON to SLOW_QUERY_LOG_FILE, which
+# rotates at SLOW_QUERY_LOG_BYTES. `flask slow-queries` reads the files, since
+# the buffer belongs to the server process.
+#
+# Both paths to SQLite are covered: SQLAlchemy through engine events and the
+# raw get_db() connections through wrap_connection().
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+EXPLAINABLE = ('select', 'insert', 'update', 'delete', 'replace', 'with')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_NAMED = re.compile(r'(?::\w+|%\(\w+\)s|\$\d+)')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_ROWS = re.compile(r'(\(\?(?:\.\.\.)?\))(?:\s*,\s*\1)+')
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(statement):
+    """statement with every literal and placeholder as ?, IN lists and VALUES rows folded."""
+    sql = _STRING.sub('?', statement)
+    sql = _NAMED.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _SPACE.sub(' ', sql).strip()
+    sql = _IN_LIST.sub('(?...)', sql)
+    return _ROWS.sub(r'\1, ...', sql)
+
+
+def _shape(value):
+    if value is None:
+        return 'null'
+    if isinstance(value, (str, bytes)):
+        return f'{type(value).__name__}[{len(value)}]'
+    return type(value).__name__
+
+
+def param_shapes(parameters, executemany=False):
+    if executemany:
+        rows = list(parameters or ())
+        return {'rows': len(rows), 'first': param_shapes(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: _shape(value) for key, value in parameters.items()}
+    return [_shape(value) for value in parameters or ()]
+
+
+def explain(connection, statement, parameters):
+    """EXPLAIN QUERY PLAN for statement as an indented list of steps."""
+    if statement.lstrip().split(None, 1)[0].lower() not in EXPLAINABLE:
+        return []
+    try:
+        rows = connection.execute('EXPLAIN QUERY PLAN ' + statement, parameters or ()).fetchall()
+    except sqlite3.Error as exc:
+        return [f'(no plan: {exc})']
+    depth = {0: -1}
+    plan = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        plan.append('  ' * depth[node] + detail)
+    return plan
+
+
+def _caller():
+    if has_request_context():
+        return {'route': f'{request.method} {request.endpoint or "unmatched"}', 'path': request.path}
+    return {'route': f'thread {threading.current_thread().name}', 'path': None}
+
+
+class SlowQueryLog:
+    def __init__(self, app=None):
+        self.threshold = None  # seconds; None = off
+        self.explain = True
+        self.log_file = None
+        self.max_bytes = 5 * 1024 * 1024
+        self.backups = 3
+        self._entries = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._logger = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        threshold = app.config.setdefault('SLOW_QUERY_MS', int(os.environ.get('SLOW_QUERY_MS', 100)))
+        self.threshold = None if threshold is None else threshold / 1000
+        self.explain = app.config.setdefault('SLOW_QUERY_EXPLAIN', True)
+        self._entries = deque(maxlen=app.config.setdefault('SLOW_QUERY_BUFFER', 200))
+        self.log_file = app.config.setdefault(
+            'SLOW_QUERY_LOG_FILE', os.path.join(app.instance_path, 'slow_queries.log'))
+        self.max_bytes = app.config.setdefault('SLOW_QUERY_LOG_BYTES', 5 * 1024 * 1024)
+        self.backups = app.config.setdefault('SLOW_QUERY_LOG_BACKUPS', 3)
+        app.extensions['slow_queries'] = self
+
+    @property
+    def enabled(self):
+        return self.threshold is not None
+
+    def record(self, connection, statement, parameters, seconds, executemany=False):
+        """Keep statement if it took longer than the threshold."""
+        if self.threshold is None or seconds < self.threshold:
+            return None
+        fp = fingerprint(statement)
+        entry = {
+            'at': datetime.utcnow().isoformat(timespec='milliseconds') + 'Z',
+            'ms': round(seconds * 1000, 2),
+            'id': hashlib.sha1(fp.encode()).hexdigest()[:12],
+            'fingerprint': fp,
+            'params': param_shapes(parameters, executemany),
+            **_caller(),
+            'plan': [],
+        }
+        if self.explain:
+            first = (list(parameters)[:1] or [()])[0] if executemany else parameters
+            entry['plan'] = explain(connection, statement, first)
+        with self._lock:
+            self._entries.append(entry)
+        self._write(entry)
+        return entry
+
+    def _write(self, entry):
+        if not self.log_file:
+            return
+        if self._logger is None:
+            with self._lock:
+                if self._logger is None:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.log_file)), exist_ok=True)
+                    handler = RotatingFileHandler(self.log_file, maxBytes=self.max_bytes,
+                                                  backupCount=self.backups, encoding='utf-8')
+                    logger = logging.getLogger('slow_queries')
+                    logger.addHandler(handler)
+                    logger.setLevel(logging.INFO)
+                    logger.propagate = False  # NDJSON only, not the app log
+                    self._logger = logger
+        self._logger.info(json.dumps(entry))
+
+    def entries(self, limit=None):
+        """Buffered entries, newest first."""
+        with self._lock:
+            entries = list(self._entries)
+        entries.reverse()
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def read_files(self):
+        """Every entry still on disk, oldest first (rotated files included)."""
+        if not self.log_file:
+            return []
+        paths = [f'{self.log_file}.{n}' for n in range(self.backups, 0, -1)] + [self.log_file]
+        entries = []
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8') as stream:
+                entries.extend(json.loads(line) for line in stream if line.strip())
+        return entries
+
+
+def summarize(entries):
+    """Entries grouped by fingerprint, worst total time first."""
+    groups = {}
+    for entry in entries:
+        group = groups.get(entry['id'])
+        if group is None:
+            group = groups[entry['id']] = {
+                'id': entry['id'], 'fingerprint': entry['fingerprint'], 'count': 0,
+                'total_ms': 0.0, 'max_ms': 0.0, 'routes': set(), 'plan': entry['plan'],
+            }
+        group['count'] += 1
+        group['total_ms'] += entry['ms']
+        if entry['ms'] >= group['max_ms']:
+            group['max_ms'] = entry['ms']
+            group['plan'] = entry['plan']
+        group['routes'].add(entry['route'])
+    result = sorted(groups.values(), key=lambda g: g['total_ms'], reverse=True)
+    for group in result:
+        group['total_ms'] = round(group['total_ms'], 2)
+        group['routes'] = sorted(group['routes'])
+    return result
+
+
+# SQLAlchemy: every engine, ORM and Core alike. Timed on the execution
+# context, like metrics.py, so failed statements leave nothing on the connection.
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and slow_queries.threshold is not None:
+        context._slow_query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_slow_query_start', None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    slow_queries.record(cursor.connection, statement, parameters, elapsed, executemany)
+
+
+# Raw sqlite3 connections from database.get_db().
+
+class _RecordingCursor:
+    def __init__(self, cursor, connection):
+        self._cursor = cursor
+        self._connection = connection
+
+    def execute(self, statement, parameters=()):
+        start = time.perf_counter()
+        self._cursor.execute(statement, parameters)
+        slow_queries.record(self._connection, statement, parameters, time.perf_counter() - start)
+        return self
+
+    def executemany(self, statement, rows):
+        rows = list(rows)
+        start = time.perf_counter()
+        self._cursor.executemany(statement, rows)
+        slow_queries.record(self._connection, statement, rows, time.perf_counter() - start, executemany=True)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class RecordingConnection:
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, *args):
+        return _RecordingCursor(self._connection.cursor(*args), self._connection.driver_connection)
+
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        return self.cursor().executemany(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def wrap_connection(connection):
+    """A pooled raw connection whose statements go through the recorder."""
+    return RecordingConnection(connection) if slow_queries.enabled else connection
+
+
+slow_queries = SlowQueryLog()
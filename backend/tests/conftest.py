@@ -0,0 +1,47 @@
+# tests/conftest.py
+# An app from the factory on a throwaway SQLite file, schema built the way
+# `flask init-db` builds it, with the order workers and the slow-query log off.
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from extensions import db
+import bootstrap
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'ORDER_WORKERS': 0,
+        'APP_ENV': 'development',
+        'SLOW_QUERY_MS': None,
+    })
+    with app.app_context():
+        bootstrap.init_schema()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def assert_num_queries(app):
+    """Context manager: the block must run exactly `expected` statements."""
+    @contextmanager
+    def check(expected):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        assert len(statements) == expected, (
+            f'expected {expected} queries, ran {len(statements)}:\n' + '\n'.join(statements))
+    return check
@@ -0,0 +1,51 @@
+# tests/test_order_queries.py
+# N+1 guard for the order screens: the list loader runs one statement and the
+# detail loader two, however many orders or items there are.
+import pytest
+
+from extensions import db
+from models import Customer, Order, OrderItem, Product
+import order_history
+
+LIST_QUERIES = 1    # orders joined to their customer, totals included
+DETAIL_QUERIES = 2  # the order row, then its items with their products
+
+
+def seed_orders(n_orders, items_per_order):
+    db.session.execute(Product.__table__.insert(), [
+        {'id': i, 'name': f'Brownie {i}', 'price': 100, 'stock_quantity': 10} for i in range(1, 11)])
+    customer = Customer(name='Test', email='test@example.com', password='x')
+    db.session.add(customer)
+    db.session.flush()
+    for _ in range(n_orders):
+        order = Order(customer_id=customer.id, status='Pending', item_count=items_per_order)
+        db.session.add(order)
+        db.session.flush()
+        db.session.execute(OrderItem.__table__.insert(), [
+            {'order_id': order.id, 'product_id': 1 + i % 10, 'quantity': 1, 'unit_price': 100.0,
+             'subtotal': 100.0}
+            for i in range(items_per_order)])
+    db.session.commit()
+    db.session.expire_all()
+    return customer.id
+
+
+@pytest.mark.parametrize('n_orders, n_items', [(2, 1), (200, 1), (2, 50)])
+def test_order_list_is_one_query(assert_num_queries, n_orders, n_items):
+    customer_id = seed_orders(n_orders, n_items)
+    with assert_num_queries(LIST_QUERIES):
+        orders, _ = order_history.summaries(customer_id=customer_id, limit=n_orders)
+        for order in orders:
+            order.customer.name, order.item_count, order.grand_total
+    assert len(orders) == n_orders
+
+
+@pytest.mark.parametrize('n_items', [1, 50])
+def test_order_detail_is_two_queries(assert_num_queries, n_items):
+    customer_id = seed_orders(2, n_items)
+    order_id = Order.query.filter_by(customer_id=customer_id).first().id
+    db.session.expire_all()
+    with assert_num_queries(DETAIL_QUERIES):
+        order = order_history.detail(order_id)
+        names = [item.product.name for item in order.items]
+    assert len(names) == n_items
@@ -0,0 +1,57 @@
+# tests/test_order_queue.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from catalog_cache import catalog
+from extensions import db
+from models import Order, Product, StockReservation
+import order_queue
+import page_cache
+
+
+def test_sold_out_product_leaves_explore(app, monkeypatch):
+    page_cache.pages.clear()
+    product = Product(name='Last Brownie', price=100, stock_quantity=1)
+    db.session.add(product)
+    db.session.commit()
+    client = app.test_client()
+    assert b'Last Brownie' in client.get('/explore').data
+
+    order = Order(status=order_queue.QUEUED)
+    db.session.add(order)
+    db.session.flush()
+    order_queue.enqueue(order, [(product.id, 1)])
+    db.session.commit()
+
+    # What another connection sees when the version moves: a reader that fills
+    # the cache right after the bump must already get the sold-out stock.
+    seen = []
+    invalidate = catalog.invalidate
+
+    def spy():
+        with db.engine.connect() as connection:
+            seen.append(connection.scalar(
+                text('SELECT stock_quantity FROM product WHERE id = :id'), {'id': product.id}))
+        return invalidate()
+
+    monkeypatch.setattr(catalog, 'invalidate', spy)
+    assert order_queue.workers.drain() == 1
+
+    assert seen == [0]
+    assert db.session.get(Order, order.id).status == order_queue.CONFIRMED
+    assert b'Last Brownie' not in client.get('/explore').data
+
+
+def test_queued_order_holds_stock_for_the_configured_ttl(app):
+    app.config['CART_RESERVATION_TTL'] = timedelta(hours=2)
+    product = Product(name='Brownie', price=100, stock_quantity=5)
+    db.session.add(product)
+    db.session.commit()
+    client = app.test_client()
+    client.post('/api/cart/items', json={'product_id': product.id, 'quantity': 1})
+
+    client.post('/place-order', data={'email': 'fan@example.com', 'name': 'Fan'})
+
+    hold = StockReservation.query.one()
+    assert hold.expires_at > datetime.utcnow() + timedelta(hours=1)
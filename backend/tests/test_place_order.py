@@ -0,0 +1,51 @@
+# tests/test_place_order.py
+from models import Order, User
+import bootstrap
+
+
+def test_order_with_an_admin_email_is_refused(app):
+    bootstrap.seed_admin('boss@example.com', 'secret123')
+    client = app.test_client()
+    client.post('/api/cart/items', json={'product_id': _product(), 'quantity': 1})
+
+    response = client.post('/place-order', data={'email': 'boss@example.com', 'name': 'Boss'})
+
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/checkout')
+    assert Order.query.count() == 0
+    assert User.query.filter_by(email='boss@example.com').one().role == 'admin'
+
+
+def test_returning_customer_is_reused(app):
+    client = app.test_client()
+    for _ in range(2):
+        client.post('/api/cart/items', json={'product_id': _product(), 'quantity': 1})
+        response = client.post('/place-order', data={'email': 'fan@example.com', 'name': 'Fan'})
+        assert '/payment' in response.headers['Location']
+    assert User.query.filter_by(email='fan@example.com').count() == 1
+    assert Order.query.count() == 2
+
+
+def test_only_the_buyer_sees_the_order(app):
+    buyer, stranger = app.test_client(), app.test_client()
+    buyer.post('/api/cart/items', json={'product_id': _product(), 'quantity': 1})
+    location = buyer.post('/place-order', data={'email': 'fan@example.com', 'name': 'Fan'}).headers['Location']
+    order_id = Order.query.one().id
+
+    assert b'Fan' in buyer.get(location).data
+    assert buyer.get(f'/orders/{order_id}/status').status_code == 200
+
+    page = stranger.get(location).data
+    assert b'Fan' not in page and b'Guest' in page
+    assert stranger.get(f'/orders/{order_id}/status').status_code == 404
+
+
+def _product():
+    from extensions import db
+    from models import Product
+    product = Product.query.first()
+    if product is None:
+        product = Product(name='Brownie', price=100, stock_quantity=10)
+        db.session.add(product)
+        db.session.commit()
+    return product.id
@@ -0,0 +1,54 @@
+# tests/test_product_import.py
+import io
+
+from extensions import db
+from models import Product
+import keyset
+import product_io
+
+
+def _import(text):
+    return product_io.import_products(db.engine, io.StringIO(text), 'csv')
+
+
+def test_unknown_id_without_name_is_rejected(app):
+    with app.app_context():
+        db.session.add(Product(id=1, name='Brownie', price=100, stock_quantity=5))
+        db.session.commit()
+
+        report = _import('id,price\n1,120\n99,50\n')
+
+        assert (report.written, report.failed) == (1, 1)
+        assert report.errors == [{'line': 3, 'error': product_io.NAME_REQUIRED}]
+        assert db.session.get(Product, 1).price == 120
+        assert db.session.get(Product, 99) is None
+
+
+def test_seed_route_stocks_products(app):
+    client = app.test_client()
+    client.get('/admin/products/test-insert')
+    with app.app_context():
+        assert Product.query.count() == 15
+        assert Product.query.filter(Product.stock_quantity.is_(None)).count() == 0
+
+
+def test_catalog_import_and_export_are_admin_only(app):
+    client = app.test_client()
+    assert client.get('/admin/products/export').status_code == 403
+    response = client.post('/admin/products/import', data='id,name\n1,Free\n',
+                           content_type='text/csv')
+    assert response.status_code == 403
+    with app.app_context():
+        assert db.session.get(Product, 1) is None
+
+
+def test_cli_import_refreshes_product_totals(app, tmp_path):
+    keyset.forget_counts()
+    assert keyset.cached_count(('product',), Product.query) == 0
+    path = tmp_path / 'products.csv'
+    path.write_text('name,price\nBrownie,100\nBlondie,90\n')
+
+    result = app.test_cli_runner().invoke(args=['import-products', str(path)])
+
+    assert '2 written' in result.output
+    assert keyset.cached_count(('product',), Product.query) == 2
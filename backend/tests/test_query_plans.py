@@ -0,0 +1,22 @@
+# tests/test_query_plans.py
+# The hot queries must stay on their indexes: no full scans, no temp B-tree
+# sorts. Plans come from a scratch schema built from the models.
+import pytest
+
+import query_plans
+
+
+@pytest.fixture(scope='module')
+def plans():
+    return {label: (plan, problems) for label, plan, problems in query_plans.check_all()}
+
+
+@pytest.mark.parametrize('label', [label for label, _ in query_plans.hot_queries()])
+def test_hot_query_uses_an_index(plans, label):
+    plan, problems = plans[label]
+    assert not problems, f"{label}: {' | '.join(plan)}"
+
+
+def test_explore_reads_the_partial_in_stock_index(plans):
+    plan, _ = plans['explore: in-stock products']
+    assert any('ix_product_in_stock' in step for step in plan), plan
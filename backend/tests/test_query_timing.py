@@ -0,0 +1,28 @@
+# tests/test_query_timing.py
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from extensions import db
+import metrics
+from slow_queries import slow_queries
+
+
+def test_failed_statement_leaves_nothing_on_the_connection(app, monkeypatch):
+    monkeypatch.setattr(slow_queries, 'threshold', 0)  # log every statement
+    monkeypatch.setattr(slow_queries, 'explain', False)
+    monkeypatch.setattr(slow_queries, 'log_file', None)
+    slow_queries.clear()
+    timing = metrics.RequestTiming()
+    token = metrics._current.set(timing)
+    try:
+        with db.engine.connect() as connection:
+            before = dict(connection.info)
+            with pytest.raises(DBAPIError):
+                connection.exec_driver_sql('SELECT * FROM no_such_table')
+            connection.exec_driver_sql('SELECT 1')
+            assert dict(connection.info) == before
+    finally:
+        metrics._current.reset(token)
+
+    assert timing.db_queries == 1
+    assert [e['fingerprint'] for e in slow_queries.entries()] == ['SELECT ?']